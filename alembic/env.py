@@ -10,6 +10,12 @@ from models.category_model import CategoryModel
 from models.product_model import ProductModel
 from models.supplier_model import SupplierModel
 from models.user_model import UserModel
+from models.stock_movement_model import StockMovementModel
+from models.stock_snapshot_model import StockSnapshotModel
+from models.stock_alert_model import StockAlertModel
+from models.inventory_summary_model import InventorySummaryModel
+from models.table_version_model import TableVersionModel
+from models.job_model import JobModel
 from core.configs import settings
 
 # this is the Alembic Config object, which provides
@@ -27,6 +33,20 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+def include_name(name, type_, parent_names):
+    # The SQLite FTS5 search table and its shadow tables are created by
+    # hand-written DDL, not by the metadata; keep autogenerate away from them.
+    if type_ == "table":
+        return not (name or "").startswith("products_search")
+    return True
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Indexes declared with Index.ddl_if(dialect=...) only exist on that backend.
+    ddl_if = getattr(object, "_ddl_if", None)
+    if ddl_if is not None and ddl_if.dialect is not None:
+        return context.get_context().dialect.name == ddl_if.dialect
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +73,8 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,  # Detecta mudança de tipo (ex: Int para Float)
         compare_server_default=True, # Detecta mudanças em valores padrão
+        include_name=include_name,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -83,6 +105,8 @@ def run_migrations_online() -> None:
         target_metadata=target_metadata,
         compare_type=True,  # Detecta mudança de tipo (ex: Int para Float)
         compare_server_default=True, # Detecta mudanças em valores padrão
+        include_name=include_name,
+        include_object=include_object,
 )
 
         with context.begin_transaction():
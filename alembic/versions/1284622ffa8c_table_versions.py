@@ -0,0 +1,38 @@
+"""Table versions
+
+Revision ID: 1284622ffa8c
+Revises: 5987f90c8ace
+Create Date: 2026-10-18 11:20:33.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1284622ffa8c'
+down_revision: Union[str, Sequence[str], None] = '5987f90c8ace'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_versions, [
+        {"name": name, "version": 1, "updated_at": None}
+        for name in ("categories", "products", "suppliers")
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_versions')
@@ -0,0 +1,59 @@
+"""Stock ledger
+
+Revision ID: 2c70427c0c0b
+Revises: 6bdeb0022911
+Create Date: 2026-10-18 09:12:41.201934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c70427c0c0b'
+down_revision: Union[str, Sequence[str], None] = '6bdeb0022911'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_movements',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('delta', sa.Integer(), nullable=False),
+    sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movements_product_id_created_at', 'stock_movements', ['product_id', 'created_at'], unique=False)
+    op.create_index('ix_stock_movements_created_at', 'stock_movements', ['created_at'], unique=False)
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('qtd', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_snapshots_product_id_taken_at', 'stock_snapshots', ['product_id', 'taken_at'], unique=False)
+    op.create_index('ix_stock_snapshots_taken_at', 'stock_snapshots', ['taken_at'], unique=False)
+
+    # Stock on hand before the ledger existed becomes the opening snapshot.
+    now = "timezone('utc', now())" if op.get_bind().dialect.name == "postgresql" else "CURRENT_TIMESTAMP"
+    op.execute(
+        "INSERT INTO stock_snapshots (product_id, qtd, taken_at) "
+        f"SELECT id, qtd, {now} FROM products"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_snapshots_taken_at', table_name='stock_snapshots')
+    op.drop_index('ix_stock_snapshots_product_id_taken_at', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
+    op.drop_index('ix_stock_movements_created_at', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_product_id_created_at', table_name='stock_movements')
+    op.drop_table('stock_movements')
@@ -0,0 +1,47 @@
+"""Inventory summary
+
+Revision ID: 5987f90c8ace
+Revises: 2c70427c0c0b
+Create Date: 2026-10-18 10:02:17.845310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5987f90c8ace'
+down_revision: Union[str, Sequence[str], None] = '2c70427c0c0b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_summary',
+    sa.Column('scope', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('scope_id', sa.Integer(), nullable=False),
+    sa.Column('skus', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'scope_id')
+    )
+
+    # Backfill from the current catalog; from here on the services keep it
+    # up to date incrementally.
+    for scope, column in (("total", "0"), ("category", "category_id"), ("supplier", "supplier_id")):
+        group_by = "" if scope == "total" else f" GROUP BY {column}"
+        op.execute(
+            "INSERT INTO inventory_summary (scope, scope_id, skus, units, value) "
+            f"SELECT '{scope}', {column}, COUNT(*), COALESCE(SUM(qtd), 0), COALESCE(SUM(qtd * price), 0) "
+            f"FROM products{group_by}"
+        )
+    op.execute("DELETE FROM inventory_summary WHERE scope = 'total' AND skus = 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inventory_summary')
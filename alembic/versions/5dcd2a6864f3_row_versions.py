@@ -0,0 +1,32 @@
+"""Row versions
+
+Revision ID: 5dcd2a6864f3
+Revises: 09c28d0ec370
+Create Date: 2026-10-18 22:00:58.713109
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5dcd2a6864f3'
+down_revision: Union[str, Sequence[str], None] = '09c28d0ec370'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('categories', 'products', 'suppliers'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('suppliers', 'products', 'categories'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
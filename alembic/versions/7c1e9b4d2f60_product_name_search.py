@@ -0,0 +1,59 @@
+"""Product name search
+
+Revision ID: 7c1e9b4d2f60
+Revises: 1284622ffa8c
+Create Date: 2026-10-18 14:05:12.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e9b4d2f60'
+down_revision: Union[str, Sequence[str], None] = '1284622ffa8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.execute('CREATE INDEX ix_products_lower_name_c ON products ((lower(name) COLLATE "C"))')
+        return
+
+    op.execute("CREATE INDEX ix_products_lower_name ON products (lower(name))")
+    op.execute("CREATE VIRTUAL TABLE products_search USING fts5(name, content='products', content_rowid='id', tokenize='trigram')")
+    op.execute(
+        "CREATE TRIGGER products_search_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_search(rowid, name) VALUES (new.id, new.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER products_search_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_search(products_search, rowid, name) VALUES ('delete', old.id, old.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER products_search_au AFTER UPDATE OF name ON products BEGIN "
+        "INSERT INTO products_search(products_search, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO products_search(rowid, name) VALUES (new.id, new.name); END"
+    )
+    # Index the products that already exist.
+    op.execute("INSERT INTO products_search(products_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_products_lower_name_c', table_name='products')
+        op.drop_index('ix_products_name_trgm', table_name='products', postgresql_using='gin')
+        return
+
+    for trigger in ("products_search_ai", "products_search_ad", "products_search_au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS products_search")
+    op.drop_index('ix_products_lower_name', table_name='products')
@@ -0,0 +1,39 @@
+"""Product filter and sort indexes
+
+Revision ID: a176dee9b8f1
+Revises: 5dcd2a6864f3
+Create Date: 2026-10-18 22:26:04.865512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a176dee9b8f1'
+down_revision: Union[str, Sequence[str], None] = '5dcd2a6864f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_category_id_name_id', 'products', ['category_id', 'name', 'id'], unique=False)
+    op.create_index('ix_products_category_id_price_id', 'products', ['category_id', 'price', 'id'], unique=False)
+    op.create_index('ix_products_category_id_qtd_id', 'products', ['category_id', 'qtd', 'id'], unique=False)
+    op.create_index('ix_products_supplier_id_name_id', 'products', ['supplier_id', 'name', 'id'], unique=False)
+    op.create_index('ix_products_supplier_id_price_id', 'products', ['supplier_id', 'price', 'id'], unique=False)
+    op.create_index('ix_products_supplier_id_qtd_id', 'products', ['supplier_id', 'qtd', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_supplier_id_qtd_id', table_name='products')
+    op.drop_index('ix_products_supplier_id_price_id', table_name='products')
+    op.drop_index('ix_products_supplier_id_name_id', table_name='products')
+    op.drop_index('ix_products_category_id_qtd_id', table_name='products')
+    op.drop_index('ix_products_category_id_price_id', table_name='products')
+    op.drop_index('ix_products_category_id_name_id', table_name='products')
@@ -0,0 +1,37 @@
+"""Product filter indexes
+
+Revision ID: a3f58e21c7d9
+Revises: 7c1e9b4d2f60
+Create Date: 2026-10-18 15:32:47.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f58e21c7d9'
+down_revision: Union[str, Sequence[str], None] = '7c1e9b4d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False)
+    op.create_index('ix_products_supplier_id_id', 'products', ['supplier_id', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_qtd_id', 'products', ['qtd', 'id'], unique=False)
+    op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_name_id', table_name='products')
+    op.drop_index('ix_products_qtd_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_supplier_id_id', table_name='products')
+    op.drop_index('ix_products_category_id_id', table_name='products')
@@ -0,0 +1,43 @@
+"""Stock alerts
+
+Revision ID: e41b7a9c3d52
+Revises: a3f58e21c7d9
+Create Date: 2026-10-18 16:48:09.771204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel 
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7a9c3d52'
+down_revision: Union[str, Sequence[str], None] = 'a3f58e21c7d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.add_column(sa.Column('reorder_point', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_products_low_stock', 'products', ['id'], unique=False, sqlite_where=sa.text('qtd < reorder_point'), postgresql_where=sa.text('qtd < reorder_point'))
+    op.create_table('stock_alerts',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('qtd', sa.Integer(), nullable=False),
+    sa.Column('reorder_point', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stock_alerts')
+    op.drop_index('ix_products_low_stock', table_name='products', sqlite_where=sa.text('qtd < reorder_point'), postgresql_where=sa.text('qtd < reorder_point'))
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_column('reorder_point')
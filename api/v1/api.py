@@ -4,9 +4,15 @@ from api.v1.endpoints import product
 from api.v1.endpoints import category
 from api.v1.endpoints import supplier
 from api.v1.endpoints import user
+from api.v1.endpoints import stock
+from api.v1.endpoints import inventory
+from api.v1.endpoints import job
 
 api_router = APIRouter()
 api_router.include_router(product.router, prefix="/products", tags=["products"])
 api_router.include_router(category.router, prefix="/categories", tags=["categories"])
 api_router.include_router(supplier.router, prefix="/suppliers", tags=["suppliers"])
-api_router.include_router(user.router, prefix="/users", tags=["users"])
\ No newline at end of file
+api_router.include_router(user.router, prefix="/users", tags=["users"])
+api_router.include_router(stock.router, prefix="/stock", tags=["stock"])
+api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
+api_router.include_router(job.router, prefix="/jobs", tags=["jobs"])
\ No newline at end of file
@@ -1,9 +1,12 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter
 from fastapi import status
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Header
+from fastapi import Query
+from fastapi import Request
 from fastapi import Response
 
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -11,8 +14,14 @@ from sqlmodel import select
 
 from models.category_model import CategoryModel
 from models.user_model import UserModel
-from schemas.category_schema import CategorySchemaBase, CategorySchemaResponse, CategorySchemaProducts
-from core.deps import get_session, get_current_user
+from schemas.category_schema import CategorySchemaBase, CategorySchemaUpdate, CategorySchemaResponse, CategorySchemaDetail
+from schemas.product_schema import ProductSchemaResponse
+from schemas.page_schema import Page
+from core.cache import response_cache
+from core.deps import get_session, get_read_session, get_current_user
+from core.replica import is_replica
+from core.pagination import PageParams
+from services.version_service import VersionService
 from services.category_service import CategoryService
 
 router = APIRouter()
@@ -25,25 +34,45 @@ async def post_category(category: CategorySchemaBase, db: AsyncSession = Depends
 
 
 #GET CATEGORIES
-@router.get("/", response_model=List[CategorySchemaResponse], status_code=status.HTTP_200_OK)
-async def get_categories(db: AsyncSession = Depends(get_session)):
-    query = select(CategoryModel).order_by(CategoryModel.id)
-    result = await db.execute(query)
-    categories :List[CategoryModel] = result.scalars().all()
-
-    return categories
+@router.get("/", response_model=Page[CategorySchemaResponse], status_code=status.HTTP_200_OK)
+async def get_categories(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_session)):
+    current = await VersionService.get_version(db, "categories")
+    not_modified = VersionService.not_modified(request, response, "categories", current)
+    if not_modified:
+        return not_modified
+    return await response_cache.listing(
+        "categories", {"limit": page.limit, "after": page.after},
+        lambda: CategoryService.get_all_categories(db, page.limit, page.after),
+        headers=response.headers, version=current[0],
+    )
 
 
 #GET CATEGORY
-@router.get("/{category_id}", response_model=CategorySchemaProducts, status_code=status.HTTP_200_OK)
-async def get_category(category_id: int, db: AsyncSession = Depends(get_session)):
-    return await CategoryService.get_category_by_id(category_id, db)
+@router.get("/{category_id}", response_model=CategorySchemaDetail, status_code=status.HTTP_200_OK)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_session)):
+    return await response_cache.item("categories", category_id, lambda: CategoryService.get_category_detail(category_id, db), replica=is_replica(db))
+
+
+#GET CATEGORY PRODUCTS
+@router.get("/{category_id}/products", response_model=Page[ProductSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_category_products(category_id: int, page: PageParams = Depends(), sort: str = Query("id", description="Sort field, prefixed with '-' for descending: id, name, price, qtd."), db: AsyncSession = Depends(get_read_session)):
+    # Keyed under products: any product write drops these pages too. The
+    # "category" key keeps them apart from /products/?category_id=, which
+    # answers an empty page where this endpoint answers 404.
+    return await response_cache.listing(
+        "products", {"category": category_id, "limit": page.limit, "after": page.after, "sort": sort},
+        lambda: CategoryService.get_category_products(category_id, db, page.limit, page.after, sort),
+        replica=is_replica(db),
+    )
     
 
 #PUT CATEGORY
 @router.put("/{category_id}", response_model=CategorySchemaResponse, status_code=status.HTTP_202_ACCEPTED)
-async def put_category(category_id: int, category: CategorySchemaBase, db: AsyncSession = Depends(get_session), user_logged: UserModel = Depends(get_current_user)):
-   return await CategoryService.update_category(category_id, category, db)
+async def put_category(category_id: int, category: CategorySchemaUpdate, response: Response, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_session), user_logged: UserModel = Depends(get_current_user)):
+   version = VersionService.expected_version(if_match, category.version)
+   category_up = await CategoryService.update_category(category_id, category, db, version)
+   response.headers["ETag"] = f'"{category_up.version}"'
+   return category_up
     
 
 #DELETE CATEGORY
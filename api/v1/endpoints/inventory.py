@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi import status
+from fastapi import Depends
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.user_model import UserModel
+from schemas.inventory_schema import InventorySummary
+from core.deps import get_session, get_read_session, get_current_user
+from services.inventory_service import InventoryService
+
+router = APIRouter()
+
+
+#GET SUMMARY
+@router.get("/summary", response_model=InventorySummary, status_code=status.HTTP_200_OK)
+async def get_summary(db: AsyncSession = Depends(get_read_session)):
+    return await InventoryService.get_summary(db)
+
+
+#POST REBUILD
+@router.post("/summary/rebuild", response_model=InventorySummary, status_code=status.HTTP_200_OK)
+async def rebuild_summary(db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    await InventoryService.rebuild(db)
+    return await InventoryService.get_summary(db)
@@ -0,0 +1,67 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi import status
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi.responses import FileResponse
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.user_model import UserModel
+from schemas.job_schema import JobSchemaCreate, JobSchemaResponse
+from schemas.page_schema import Page
+from core.deps import get_session, get_current_user
+from core.pagination import PageParams
+from services.job_service import JobService
+from services.job_handlers import export_path
+
+router = APIRouter()
+
+# Job status is read from the primary: a lagging replica would report a
+# job as still queued after it finished.
+
+#POST JOB
+@router.post("/", response_model=JobSchemaResponse, status_code=status.HTTP_202_ACCEPTED)
+async def post_job(job: JobSchemaCreate, db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    return await JobService.submit_job(job, db, logged_user.id)
+
+
+#GET JOBS
+@router.get("/", response_model=Page[JobSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_jobs(page: PageParams = Depends(), job_status: Optional[str] = Query(None, alias="status"), db: AsyncSession = Depends(get_session)):
+    return await JobService.get_jobs(db, page.limit, page.after, job_status)
+
+
+#GET JOB
+@router.get("/{job_id}", response_model=JobSchemaResponse, status_code=status.HTTP_200_OK)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_session)):
+    return await JobService.get_job(job_id, db)
+
+
+#GET JOB FILE
+@router.get("/{job_id}/file", status_code=status.HTTP_200_OK)
+async def get_job_file(job_id: int, db: AsyncSession = Depends(get_session)):
+    job = await JobService.get_job(job_id, db)
+    if job.kind != "export_products" or job.status != "succeeded":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job has no file to download.")
+
+    path = export_path(job.id, job.params["format"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Job file is no longer available.")
+    media_type = "text/csv" if job.params["format"] == "csv" else "application/x-ndjson"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
+#POST CANCEL
+@router.post("/{job_id}/cancel", response_model=JobSchemaResponse, status_code=status.HTTP_200_OK)
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    return await JobService.cancel_job(job_id, db)
+
+
+#POST RETRY
+@router.post("/{job_id}/retry", response_model=JobSchemaResponse, status_code=status.HTTP_202_ACCEPTED)
+async def retry_job(job_id: int, db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    return await JobService.retry_job(job_id, db)
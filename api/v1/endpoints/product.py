@@ -1,10 +1,14 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter
 from fastapi import status
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Header
+from fastapi import Query
+from fastapi import Request
 from fastapi import Response
+from fastapi.responses import StreamingResponse
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
@@ -12,8 +16,14 @@ from sqlmodel import select
 from models.product_model import ProductModel
 from models.user_model import UserModel
 from sqlalchemy.exc import IntegrityError
-from schemas.product_schema import ProductSchemaCreate, ProductSchemaResponse
-from core.deps import get_session, get_current_user
+from schemas.product_schema import ProductSchemaCreate, ProductSchemaUpdate, ProductSchemaResponse, ProductFilter, ProductBulkReport
+from schemas.page_schema import Page
+from core.configs import settings
+from core.cache import response_cache
+from core.replica import is_replica, read_session_factory
+from core.deps import get_session, get_read_session, get_current_user
+from core.pagination import PageParams
+from services.version_service import VersionService
 from services.product_service import ProductService
 
 router = APIRouter()
@@ -25,22 +35,63 @@ async def post_product(product: ProductSchemaCreate, db: AsyncSession = Depends(
     return await ProductService.create_product(product, db)
 
 
+#POST BULK
+@router.post("/bulk", response_model=ProductBulkReport, status_code=status.HTTP_200_OK)
+async def post_products_bulk(products: List[ProductSchemaCreate], db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    if len(products) > settings.BULK_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"A bulk import accepts at most {settings.BULK_MAX_ROWS} products.")
+    return await ProductService.create_products_bulk(products, db)
+
+
 #GET PRODUCTS
-@router.get("/", response_model=List[ProductSchemaResponse], status_code=status.HTTP_200_OK)
-async def get_products(db: AsyncSession = Depends(get_session)):
-    return await ProductService.get_all_products(db)
+@router.get("/", response_model=Page[ProductSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_products(request: Request, response: Response, page: PageParams = Depends(), filters: ProductFilter = Depends(), sort: str = Query("id", description="Sort field, prefixed with '-' for descending: id, name, price, qtd."), db: AsyncSession = Depends(get_read_session)):
+    current = await VersionService.get_version(db, "products")
+    not_modified = VersionService.not_modified(request, response, "products", current)
+    if not_modified:
+        return not_modified
+    return await response_cache.listing(
+        "products", {"limit": page.limit, "after": page.after, "sort": sort, **filters.model_dump()},
+        lambda: ProductService.get_all_products(db, page.limit, page.after, sort, filters),
+        headers=response.headers, version=current[0],
+    )
+
+
+#SEARCH PRODUCTS
+@router.get("/search", response_model=List[ProductSchemaResponse], status_code=status.HTTP_200_OK)
+async def search_products(q: str = Query(..., min_length=3, max_length=100, description="Part of the product name; prefixes rank first, small typos are tolerated."), limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT), db: AsyncSession = Depends(get_read_session)):
+    return await response_cache.listing("products", {"search": q, "limit": limit}, lambda: ProductService.search_products(q, db, limit), replica=is_replica(db))
+
+
+#EXPORT PRODUCTS
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_products(request: Request, fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"), category_id: Optional[int] = None, supplier_id: Optional[int] = None):
+    # The stream outlives the request-scoped session, so it owns its own.
+    session_factory = await read_session_factory(request)
+
+    async def content():
+        async with session_factory() as session:
+            async for chunk in ProductService.export_products(session, fmt, category_id, supplier_id):
+                yield chunk
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="products.{fmt}"'}
+    return StreamingResponse(content(), media_type=media_type, headers=headers)
 
 
 #GET PRODUCT
 @router.get("/{product_id}", response_model=ProductSchemaResponse, status_code=status.HTTP_200_OK)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_session)):
-    return await ProductService.get_product_by_id(product_id, db)
+async def get_product(product_id: int, db: AsyncSession = Depends(get_read_session)):
+    return await response_cache.item("products", product_id, lambda: ProductService.get_product_row(product_id, db), replica=is_replica(db))
         
 
 #PUT PRODUCT
 @router.put("/{product_id}", response_model=ProductSchemaResponse, status_code=status.HTTP_202_ACCEPTED)
-async def put_product(product_id: int, product: ProductSchemaCreate, db: AsyncSession = Depends(get_session), user_logged: UserModel = Depends(get_current_user)):
-    return await ProductService.update_product(product_id, product, db)
+async def put_product(product_id: int, product: ProductSchemaUpdate, response: Response, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_session), user_logged: UserModel = Depends(get_current_user)):
+    version = VersionService.expected_version(if_match, product.version)
+    product_up = await ProductService.update_product(product_id, product, db, version)
+    response.headers["ETag"] = f'"{product_up.version}"'
+    return product_up
 
 
 #DELETE PRODUCT
@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter
+from fastapi import status
+from fastapi import Depends
+from fastapi import Header
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.user_model import UserModel
+from schemas.stock_schema import StockAdjustment, StockLevel, StockBalance, StockMovementSchemaResponse, StockSnapshotRun, StockAlertSchemaResponse
+from schemas.product_schema import ProductSchemaResponse
+from schemas.page_schema import Page
+from core.deps import get_session, get_read_session, get_current_user
+from core.pagination import PageParams
+from core.replica import read_session_factory
+from services.alert_service import AlertService
+from services.stock_service import StockService, utcnow
+
+router = APIRouter()
+
+
+#POST ADJUSTMENTS
+@router.post("/adjustments", response_model=List[StockLevel], status_code=status.HTTP_200_OK)
+async def post_adjustments(adjustments: List[StockAdjustment], db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    return await StockService.adjust_stock(adjustments, db)
+
+
+#POST SNAPSHOT
+@router.post("/snapshots", response_model=StockSnapshotRun, status_code=status.HTTP_201_CREATED)
+async def post_snapshot(db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    return await StockService.take_snapshot(db)
+
+
+#GET LOW STOCK
+@router.get("/alerts/low", response_model=Page[ProductSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_low_stock(page: PageParams = Depends(), db: AsyncSession = Depends(get_read_session)):
+    return await AlertService.get_low_stock(db, page.limit, page.after)
+
+
+#GET ALERTS
+@router.get("/alerts", response_model=Page[StockAlertSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_alerts(page: PageParams = Depends(), db: AsyncSession = Depends(get_read_session)):
+    return await AlertService.get_alerts(db, page.limit, page.after)
+
+
+#STREAM ALERTS
+@router.get("/alerts/stream", status_code=status.HTTP_200_OK)
+async def stream_alerts(request: Request, last_event_id: Optional[int] = Header(None)):
+    # The stream outlives the request-scoped session, so it owns its own.
+    session_factory = await read_session_factory(request)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(AlertService.stream_alerts(session_factory, last_event_id), media_type="text/event-stream", headers=headers)
+
+
+#GET BALANCE
+@router.get("/{product_id}/balance", response_model=StockBalance, status_code=status.HTTP_200_OK)
+async def get_balance(product_id: int, at: Optional[datetime] = None, db: AsyncSession = Depends(get_read_session)):
+    return await StockService.get_balance_at(product_id, at or utcnow(), db)
+
+
+#GET MOVEMENTS
+@router.get("/{product_id}/movements", response_model=Page[StockMovementSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_movements(product_id: int, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_session)):
+    return await StockService.get_movements(product_id, db, page.limit, page.after)
@@ -1,9 +1,11 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter
 from fastapi import status
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Header
+from fastapi import Request
 from fastapi import Response
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,8 +13,13 @@ from sqlmodel import select
 
 from models.supplier_model import SupplierModel
 from models.user_model import UserModel
-from schemas.supplier_schema import SupplierSchemaBase, SupplierSchemaResponse
-from core.deps import get_session, get_current_user
+from schemas.supplier_schema import SupplierSchemaBase, SupplierSchemaUpdate, SupplierSchemaResponse
+from schemas.page_schema import Page
+from core.cache import response_cache
+from core.deps import get_session, get_read_session, get_current_user
+from core.replica import is_replica
+from core.pagination import PageParams
+from services.version_service import VersionService
 from services.supplier_service import SupplierService
 
 router = APIRouter()
@@ -24,20 +31,31 @@ async def post_supplier(supplier: SupplierSchemaBase, db: AsyncSession = Depends
     return await SupplierService.create_supplier(supplier, db)
 
 #GET SUPPLIERS
-@router.get("/", response_model=List[SupplierSchemaResponse], status_code=status.HTTP_200_OK)
-async def get_suppliers(db: AsyncSession = Depends(get_session)):
-    return await SupplierService.get_all_suppliers(db)
+@router.get("/", response_model=Page[SupplierSchemaResponse], status_code=status.HTTP_200_OK)
+async def get_suppliers(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_session)):
+    current = await VersionService.get_version(db, "suppliers")
+    not_modified = VersionService.not_modified(request, response, "suppliers", current)
+    if not_modified:
+        return not_modified
+    return await response_cache.listing(
+        "suppliers", {"limit": page.limit, "after": page.after},
+        lambda: SupplierService.get_all_suppliers(db, page.limit, page.after),
+        headers=response.headers, version=current[0],
+    )
 
 #GET SUPPLIER
 @router.get("/{supplier_id}", response_model=SupplierSchemaResponse, status_code=status.HTTP_200_OK)
-async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_session)):
-    return await SupplierService.get_supplier_by_id(supplier_id, db)
+async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_read_session)):
+    return await response_cache.item("suppliers", supplier_id, lambda: SupplierService.get_supplier_row(supplier_id, db), replica=is_replica(db))
     
 
 #PUT SUPPLIER
 @router.put("/{supplier_id}", response_model=SupplierSchemaResponse, status_code=status.HTTP_202_ACCEPTED)
-async def put_supplier(supplier_id: int, supplier: SupplierSchemaBase, db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
-    return await SupplierService.update_supplier(supplier_id, supplier, db)
+async def put_supplier(supplier_id: int, supplier: SupplierSchemaUpdate, response: Response, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_session), logged_user: UserModel = Depends(get_current_user)):
+    version = VersionService.expected_version(if_match, supplier.version)
+    supplier_up = await SupplierService.update_supplier(supplier_id, supplier, db, version)
+    response.headers["ETag"] = f'"{supplier_up.version}"'
+    return supplier_up
     
 
 #DELETE SUPPLIER
@@ -4,18 +4,25 @@ from fastapi import APIRouter, status, Depends, HTTPException, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 
 from models.user_model import UserModel
 from schemas.user_schema import UserSchemaBase, UserSchemaCreate, UserSchemaResponse
-from core.deps import get_session, get_current_user
-from core.security import generate_hash
+from schemas.page_schema import Page
+from core.deps import get_session, get_current_user, invalidate_user
+from core.pagination import PageParams, paginate
+from core.serialization import columns_for
+from core.security import generate_hash_async
 from core.auth import authenticate, create_token_access
+from services.version_service import VersionService
 
 router = APIRouter()
 
+USER_COLUMNS = columns_for(UserSchemaResponse, UserModel.__table__)
+
 #GET LOGGED
 @router.get("/logged", response_model=UserSchemaBase)
 def get_logged(logged_user: UserModel = Depends(get_current_user)):
@@ -27,26 +34,23 @@ def get_logged(logged_user: UserModel = Depends(get_current_user)):
 async def post_user(user: UserSchemaCreate, db: AsyncSession = Depends(get_session)):
     new_user = UserModel.model_validate(user)
 
-    new_user.password = generate_hash(user.password)
+    new_user.password = await generate_hash_async(user.password)
 
     try:
-        db.add(new_user)
+        query = insert(UserModel.__table__).values(**new_user.model_dump(exclude={"id"})).returning(*USER_COLUMNS)
+        row = (await db.execute(query)).mappings().one()
         await db.commit()
-        await db.refresh(new_user)
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User with this email already exists!")
 
-    return new_user
+    return dict(row)
 
 
 #GET USERS
-@router.get("/", response_model=List[UserSchemaResponse])
-async def get_users(db: AsyncSession = Depends(get_session)):
+@router.get("/", response_model=Page[UserSchemaResponse])
+async def get_users(page: PageParams = Depends(), db: AsyncSession = Depends(get_session)):
     query = select(UserModel)
-    result = await db.execute(query)
-    users: List[UserModel] = result.scalars().unique().all()
-
-    return users
+    return await paginate(db, query, UserModel.id, page.limit, page.after)
 
 
 #GET USER
@@ -71,13 +75,15 @@ async def put_user(user_id: int, user: UserSchemaCreate, db: AsyncSession = Depe
         user_data = user.model_dump(exclude_unset=True)
 
         if "password" in user_data:
-            user_data["password"] = generate_hash(user_data["password"])
+            user_data["password"] = await generate_hash_async(user_data["password"])
         
         user_up.sqlmodel_update(user_data)
 
         db.add(user_up)
+        await VersionService.bump(db, "users")
         await db.commit()
         await db.refresh(user_up)
+        invalidate_user(user_id)
 
         return user_up
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found!")
@@ -92,7 +98,9 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_session), log
 
     if user_del:
         await db.delete(user_del)
+        await VersionService.bump(db, "users")
         await db.commit()
+        invalidate_user(user_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found!")
@@ -37,6 +37,16 @@ def get_headers():
 def api_put(endpoint, data):
     return requests.put(f"{BASE_URL}/{endpoint}", json=data, headers=get_headers())
 
+def show_update(res, mensagem):
+    # Edições levam a "version" lida: se alguém salvou o registro nesse meio
+    # tempo, a API recusa com 409 em vez de sobrescrever a alteração dele.
+    if res.status_code in (200, 202):
+        st.success(mensagem); st.rerun()
+    elif res.status_code == 409:
+        st.error("Este registro foi alterado por outra pessoa desde que foi aberto. Recarregue a página e refaça a edição.")
+    else:
+        st.error(f"Erro {res.status_code}: {res.text}")
+
 def api_delete(endpoint):
     return requests.delete(f"{BASE_URL}/{endpoint}", headers=get_headers())
 
@@ -53,10 +63,23 @@ def login(email, password):
     except:
         return False
 
-def api_get(endpoint):
-    res = requests.get(f"{BASE_URL}/{endpoint}", headers=get_headers())
+def api_get(endpoint, params=None):
+    res = requests.get(f"{BASE_URL}/{endpoint}", params=params, headers=get_headers())
     return res.json() if res.status_code == 200 else []
 
+def api_get_all(endpoint, filters=None):
+    # Listagens são paginadas por cursor: segue o next_cursor até a última página.
+    items, params = [], {"limit": 500, **(filters or {})}
+    while True:
+        res = requests.get(f"{BASE_URL}/{endpoint}", params=params, headers=get_headers())
+        if res.status_code != 200:
+            return items
+        page = res.json()
+        items.extend(page["items"])
+        if not page.get("next_cursor"):
+            return items
+        params["after"] = page["next_cursor"]
+
 def api_post(endpoint, data):
     return requests.post(f"{BASE_URL}/{endpoint}", json=data, headers=get_headers())
 
@@ -84,14 +107,26 @@ menu = st.sidebar.radio("Navegação", ["Dashboard", "Produtos", "Categorias", "
 # --- PÁGINA: DASHBOARD ---
 if menu == "Dashboard":
     st.title("📊 Visão Geral")
-    produtos = api_get("products")
+    resumo = api_get("inventory/summary")
     
-    if produtos:
-        df = pd.DataFrame(produtos)
-        c1, c2 = st.columns(2)
-        c1.metric("Produtos Totais", len(df))
-        c2.metric("Valor Total", f"R$ {(df['price'] * df['qtd']).sum():,.2f}")
-        st.dataframe(df, use_container_width=True)
+    if resumo:
+        total = resumo["total"]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Produtos Totais", total["skus"])
+        c2.metric("Unidades em Estoque", total["units"])
+        c3.metric("Valor Total", f"R$ {total['value']:,.2f}")
+
+        g1, g2 = st.columns(2)
+        g1.subheader("Por Categoria")
+        g1.dataframe(pd.DataFrame(resumo["by_category"]), use_container_width=True)
+        g2.subheader("Por Fornecedor")
+        g2.dataframe(pd.DataFrame(resumo["by_supplier"]), use_container_width=True)
+
+        # Só os produtos abaixo do ponto de reposição, sem varrer o catálogo.
+        st.subheader("⚠️ Estoque Baixo")
+        baixo = api_get_all("stock/alerts/low")
+        if baixo: st.dataframe(pd.DataFrame(baixo), use_container_width=True)
+        else: st.success("Nenhum produto abaixo do ponto de reposição.")
     else:
         st.warning("Sem dados para exibir. Realize o login ou verifique a conexão.")
 
@@ -101,7 +136,7 @@ elif menu == "Categorias":
     tab1, tab2, tab3 = st.tabs(["📋 Listar", "➕ Cadastrar", "⚙️ Gerenciar"])
 
     with tab1:
-        categorias = api_get("categories")
+        categorias = api_get_all("categories")
         if categorias:
             st.table(categorias)
         else:
@@ -121,7 +156,7 @@ elif menu == "Categorias":
 
     with tab3:
         st.subheader("Editar ou Excluir Categoria")
-        cats = api_get("categories")
+        cats = api_get_all("categories")
         if cats:
             cat_map = {c['name']: c for c in cats}
             sel_cat_name = st.selectbox("Selecione a Categoria", list(cat_map.keys()))
@@ -132,8 +167,8 @@ elif menu == "Categorias":
                 n_desc = st.text_area("Nova Descrição", value=cat_to_edit.get('description', ''))
                 c1, c2 = st.columns(2)
                 if c1.form_submit_button("💾 Atualizar"):
-                    res = api_put(f"categories/{cat_to_edit['id']}", {"name": n_name, "description": n_desc})
-                    if res.status_code == 200: st.success("Atualizada!"); st.rerun()
+                    res = api_put(f"categories/{cat_to_edit['id']}", {"name": n_name, "description": n_desc, "version": cat_to_edit['version']})
+                    show_update(res, "Atualizada!")
                 if c2.form_submit_button("🗑️ Deletar", type="primary"):
                     res = api_delete(f"categories/{cat_to_edit['id']}")
                     if res.status_code == 204: st.success("Deletada!"); st.rerun()
@@ -143,11 +178,18 @@ elif menu == "Produtos":
     st.title("📦 Gestão de Produtos")
     tab1, tab2, tab3 = st.tabs(["📋 Listar", "➕ Cadastrar", "⚙️ Gerenciar"])
     
-    cats = api_get("categories")
-    sups = api_get("suppliers")
+    cats = api_get_all("categories")
+    sups = api_get_all("suppliers")
     
     with tab1:
-        produtos = api_get("products")
+        # Filtros aplicados no servidor.
+        f1, f2 = st.columns(2)
+        cat_filtro = f1.selectbox("Categoria", ["Todas"] + [c['name'] for c in cats], key="filtro_cat")
+        sup_filtro = f2.selectbox("Fornecedor", ["Todos"] + [s['name'] for s in sups], key="filtro_sup")
+        filtros = {}
+        if cat_filtro != "Todas": filtros["category_id"] = next(c['id'] for c in cats if c['name'] == cat_filtro)
+        if sup_filtro != "Todos": filtros["supplier_id"] = next(s['id'] for s in sups if s['name'] == sup_filtro)
+        produtos = api_get_all("products", filtros)
         if produtos: st.dataframe(pd.DataFrame(produtos), use_container_width=True)
         else: st.info("Nenhum produto cadastrado.")
 
@@ -159,31 +201,37 @@ elif menu == "Produtos":
                 name = st.text_input("Nome")
                 price = st.number_input("Preço", min_value=0.0)
                 qtd = st.number_input("Qtd", min_value=0)
+                reorder_point = st.number_input("Ponto de reposição", min_value=0)
                 cat_name = st.selectbox("Categoria", [c['name'] for c in cats])
                 sup_name = st.selectbox("Fornecedor", [s['name'] for s in sups])
                 cat_id = next(c['id'] for c in cats if c['name'] == cat_name)
                 sup_id = next(s['id'] for s in sups if s['name'] == sup_name)
 
                 if st.form_submit_button("Cadastrar"):
-                    payload = {"name": name, "price": price, "qtd": qtd, "category_id": cat_id, "supplier_id": sup_id}
+                    payload = {"name": name, "price": price, "qtd": qtd, "reorder_point": reorder_point, "category_id": cat_id, "supplier_id": sup_id}
                     res = api_post("products", payload)
                     if res.status_code == 201: st.success("Cadastrado!"); st.rerun()
 
     with tab3:
-        produtos = api_get("products")
+        # Busca no servidor em vez de baixar o catálogo inteiro.
+        termo = st.text_input("Buscar produto", placeholder="Digite ao menos 3 letras do nome")
+        produtos = api_get("products/search", {"q": termo, "limit": 20}) if len(termo.strip()) >= 3 else []
+        if len(termo.strip()) >= 3 and not produtos:
+            st.info("Nenhum produto encontrado.")
         if produtos:
-            prod_map = {p['name']: p for p in produtos}
+            prod_map = {f"{p['name']} (#{p['id']})": p for p in produtos}
             sel_prod_name = st.selectbox("Selecione o Produto", list(prod_map.keys()))
             p_edit = prod_map[sel_prod_name]
             with st.form("edit_prod"):
                 en_name = st.text_input("Nome", value=p_edit['name'])
                 en_price = st.number_input("Preço", value=float(p_edit['price']))
                 en_qtd = st.number_input("Quantidade", value=int(p_edit['qtd']))
+                en_reorder = st.number_input("Ponto de reposição", min_value=0, value=int(p_edit.get('reorder_point', 0)))
                 b1, b2 = st.columns(2)
                 if b1.form_submit_button("💾 Atualizar"):
-                    payload = {"name": en_name, "price": en_price, "qtd": en_qtd, "category_id": p_edit['category_id'], "supplier_id": p_edit['supplier_id']}
+                    payload = {"name": en_name, "price": en_price, "qtd": en_qtd, "reorder_point": en_reorder, "category_id": p_edit['category_id'], "supplier_id": p_edit['supplier_id'], "version": p_edit['version']}
                     res = api_put(f"products/{p_edit['id']}", payload)
-                    if res.status_code == 200: st.success("Atualizado!"); st.rerun()
+                    show_update(res, "Atualizado!")
                 if b2.form_submit_button("🗑️ Deletar", type="primary"):
                     res = api_delete(f"products/{p_edit['id']}")
                     if res.status_code == 204: st.success("Removido!"); st.rerun()
@@ -194,7 +242,7 @@ elif menu == "Fornecedores":
     tab1, tab2, tab3 = st.tabs(["📋 Listar", "➕ Cadastrar", "⚙️ Gerenciar"])
 
     with tab1:
-        fornecedores = api_get("suppliers")
+        fornecedores = api_get_all("suppliers")
         if fornecedores:
             df_sup = pd.DataFrame(fornecedores)
             cols = [c for c in ['id', 'name', 'cnpj', 'address'] if c in df_sup.columns]
@@ -211,7 +259,7 @@ elif menu == "Fornecedores":
                 if res.status_code in [200, 201]: st.success("Cadastrado!"); st.rerun()
 
     with tab3:
-        sups = api_get("suppliers")
+        sups = api_get_all("suppliers")
         if sups:
             sup_map = {s['name']: s for s in sups}
             sel_sup = st.selectbox("Fornecedor", list(sup_map.keys()))
@@ -222,8 +270,8 @@ elif menu == "Fornecedores":
                 es_addr = st.text_input("Endereço", value=s_edit['address'])
                 s1, s2 = st.columns(2)
                 if s1.form_submit_button("💾 Atualizar"):
-                    res = api_put(f"suppliers/{s_edit['id']}", {"name": es_name, "cnpj": es_cnpj, "address": es_addr})
-                    if res.status_code == 200: st.success("Atualizado!"); st.rerun()
+                    res = api_put(f"suppliers/{s_edit['id']}", {"name": es_name, "cnpj": es_cnpj, "address": es_addr, "version": s_edit['version']})
+                    show_update(res, "Atualizado!")
                 if s2.form_submit_button("🗑️ Deletar", type="primary"):
                     res = api_delete(f"suppliers/{s_edit['id']}")
                     if res.status_code == 204: st.success("Deletado!"); st.rerun()
\ No newline at end of file
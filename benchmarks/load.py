@@ -0,0 +1,412 @@
+"""End-to-end load and latency benchmark for the HTTP API.
+
+    python -m benchmarks.load [--products 5000] [--users 20] [--concurrency 16]
+                              [--duration 20] [--warmup 3] [--mix reads=80,writes=15,logins=5]
+                              [--db-url URL] [--server-workers 1] [--no-server-warmup]
+                              [--out results.json]
+                              [--baseline old.json] [--threshold 10]
+    python -m benchmarks.load --results new.json --baseline old.json
+
+Seeds a scratch database (a temporary SQLite file, or --db-url, whose
+tables are DROPPED and recreated), starts `main:app` under uvicorn in a
+subprocess and drives it over real HTTP with an async client: every
+concurrent worker picks reads, writes or logins by the --mix weights and
+records the latency of each request. Requests made during --warmup are
+not counted.
+
+Also measures startup: how long the server takes to listen and to report
+/ready, and the latency of the first requests sent right after that
+(--no-server-warmup starts it without the warmup phase, for comparison).
+
+Prints throughput and p50/p95/p99 per endpoint. --out saves the run as
+JSON; --baseline compares the run (or a saved --results file) against an
+earlier one and exits with status 1 if any endpoint's p95 grew or its
+throughput fell by more than --threshold percent.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models.__all_models  # noqa: F401
+from benchmarks.search import QUERIES, names
+from core.security import generate_hash
+from models.category_model import CategoryModel
+from models.product_model import ProductModel
+from models.supplier_model import SupplierModel
+from models.user_model import UserModel
+from services.inventory_service import InventoryService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = "/api/v1"
+PASSWORD = "benchmark-password"
+CATEGORIES = 20
+SUPPLIERS = 10
+SORTS = ("id", "price", "-price", "name", "-qtd")
+SEARCHES = [q for kind in QUERIES.values() for q in kind]
+
+
+class Client:
+    """One simulated user: an HTTP client, its token and the latencies it saw."""
+
+    def __init__(self, http: httpx.AsyncClient, email: str, products: int, rng: random.Random):
+        self.http = http
+        self.email = email
+        self.products = products
+        self.rng = rng
+        self.token = None
+        self.samples = []
+        self.recording = False
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        if self.token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.token}"
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, API + url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        if self.recording:
+            self.samples.append((name, time.perf_counter() - start, status))
+        return response
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.products)
+
+    # Reads
+
+    async def list_products(self):
+        params = {"limit": 50, "sort": self.rng.choice(SORTS)}
+        if self.rng.random() < 0.3:
+            params["category_id"] = self.rng.randint(1, CATEGORIES)
+        await self.request("GET /products/", "GET", "/products/", params=params)
+
+    async def get_product(self):
+        await self.request("GET /products/{id}", "GET", f"/products/{self.product_id()}")
+
+    async def search_products(self):
+        await self.request("GET /products/search", "GET", "/products/search", params={"q": self.rng.choice(SEARCHES)})
+
+    async def category_products(self):
+        category_id = self.rng.randint(1, CATEGORIES)
+        await self.request("GET /categories/{id}/products", "GET", f"/categories/{category_id}/products", params={"limit": 50})
+
+    async def inventory_summary(self):
+        await self.request("GET /inventory/summary", "GET", "/inventory/summary")
+
+    # Writes
+
+    async def adjust_stock(self):
+        body = [{"product_id": self.product_id(), "delta": self.rng.choice((-1, 1)), "reason": "benchmark"}]
+        await self.request("POST /stock/adjustments", "POST", "/stock/adjustments", json=body)
+
+    async def update_product(self):
+        product_id = self.product_id()
+        body = {
+            "name": f"Product {product_id}",
+            "price": round(self.rng.uniform(1, 100), 2),
+            "qtd": 1000,
+            "category_id": product_id % CATEGORIES + 1,
+            "supplier_id": product_id % SUPPLIERS + 1,
+        }
+        # Blind overwrites on purpose: the benchmark measures the write, not
+        # conflicts between its own simulated users.
+        await self.request("PUT /products/{id}", "PUT", f"/products/{product_id}", json=body, headers={"If-Match": "*"})
+
+    async def create_product(self):
+        body = {
+            "name": f"Bench {self.email} {self.rng.random():.8f}",
+            "price": 9.99,
+            "qtd": 10,
+            "category_id": self.rng.randint(1, CATEGORIES),
+            "supplier_id": self.rng.randint(1, SUPPLIERS),
+        }
+        await self.request("POST /products/", "POST", "/products/", json=body)
+
+    # Logins
+
+    async def login(self):
+        response = await self.request("POST /users/login", "POST", "/users/login", data={"username": self.email, "password": PASSWORD})
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+
+OPERATIONS = {
+    "reads": (Client.list_products, Client.get_product, Client.search_products, Client.category_products, Client.inventory_summary),
+    "writes": (Client.adjust_stock, Client.update_product, Client.create_product),
+    "logins": (Client.login,),
+}
+
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation kind {kind!r}; use {', '.join(OPERATIONS)}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+async def seed(db_url: str, products: int, users: int):
+    engine = create_async_engine(db_url)
+    password = generate_hash(PASSWORD)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+            await conn.execute(insert(CategoryModel.__table__), [{"id": i, "name": f"Category {i}"} for i in range(1, CATEGORIES + 1)])
+            await conn.execute(insert(SupplierModel.__table__), [
+                {"id": i, "name": f"Supplier {i}", "cnpj": f"{i:014d}", "address": "-"} for i in range(1, SUPPLIERS + 1)
+            ])
+            await conn.execute(insert(UserModel.__table__), [
+                {"name": f"Bench {i}", "email": f"bench{i}@example.com", "password": password, "is_admin": False} for i in range(users)
+            ])
+            await conn.execute(insert(ProductModel.__table__), [
+                {"name": name, "price": round(1 + i % 500 * 0.37, 2), "qtd": 1000, "reorder_point": i % 7,
+                 "category_id": i % CATEGORIES + 1, "supplier_id": i % SUPPLIERS + 1}
+                for i, name in enumerate(names(products))
+            ])
+        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            await InventoryService.rebuild(db)
+    finally:
+        await engine.dispose()
+
+
+def start_server(db_url: str, port: int, workers: int, warm: bool = True):
+    env = dict(os.environ, DB_URL=db_url, STOCK_SNAPSHOT_INTERVAL_MINUTES="0", WARMUP_ENABLED=str(warm).lower())
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning", "--workers", str(workers)]
+    return subprocess.Popen(command, env=env, cwd=ROOT)
+
+
+async def wait_ready(base_url: str, spawned_at: float, timeout: float = 30.0):
+    listening = None
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while time.monotonic() < spawned_at + timeout:
+            try:
+                response = await http.get("/ready")
+            except httpx.HTTPError:
+                await asyncio.sleep(0.05)
+                continue
+            if listening is None:
+                listening = time.monotonic() - spawned_at
+            if response.status_code == 200:
+                return {"listening_s": listening, "ready_s": time.monotonic() - spawned_at}
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"server at {base_url} did not become ready in {timeout:.0f}s")
+
+
+async def first_requests(base_url: str):
+    # What the first user after a deploy sees: one request per path on a
+    # fresh connection, sent as soon as /ready answers 200.
+    timings = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as http:
+        for name, method, url, kwargs in (
+            ("GET /products/", "GET", "/products/", {"params": {"limit": 50}}),
+            ("GET /products/{id}", "GET", "/products/1", {}),
+            ("POST /users/login", "POST", "/users/login", {"data": {"username": "bench0@example.com", "password": PASSWORD}}),
+        ):
+            start = time.perf_counter()
+            await http.request(method, API + url, **kwargs)
+            timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+async def drive(base_url: str, args):
+    kinds, weights = zip(*args.mix.items())
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as http:
+        clients = [
+            Client(http, f"bench{i % args.users}@example.com", args.products, random.Random(args.seed + i))
+            for i in range(args.concurrency)
+        ]
+        await asyncio.gather(*(client.login() for client in clients))
+
+        async def work(client: Client, deadline: float):
+            while time.monotonic() < deadline:
+                kind = client.rng.choices(kinds, weights)[0]
+                await client.rng.choice(OPERATIONS[kind])(client)
+
+        started = time.monotonic()
+        recording = asyncio.get_running_loop().call_later(args.warmup, lambda: [setattr(c, "recording", True) for c in clients])
+        await asyncio.gather(*(work(client, started + args.warmup + args.duration) for client in clients))
+        recording.cancel()
+
+    return [sample for client in clients for sample in client.samples]
+
+
+def percentile(ordered, fraction: float) -> float:
+    # Nearest-rank: the smallest sample with at least `fraction` of the
+    # samples at or below it.
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, duration: float):
+    def figures(group):
+        ordered = sorted(latency for _, latency, _ in group)
+        errors = sum(1 for _, _, status in group if status == 0 or status >= 400)
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "rps": len(group) / duration,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+        }
+
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+
+    return {
+        "total": figures(samples) if samples else {},
+        "endpoints": {name: figures(group) for name, group in sorted(by_endpoint.items())},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report):
+    startup = report.get("startup")
+    if startup:
+        print(f"listening after {startup['listening_s']:.2f}s, ready after {startup['ready_s']:.2f}s")
+        print("first request after ready: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in startup["first_request_ms"].items()))
+        print()
+    print(f"{'endpoint':<32}{'reqs':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, result in rows:
+        print(
+            f"{name:<32}{result['requests']:>8}{result['errors']:>8}{result['rps']:>9.1f}"
+            f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+        )
+
+
+def compare(baseline, current, threshold: float) -> bool:
+    """Print per-endpoint changes against a baseline run; True if any regressed."""
+    regressed = False
+    print(f"\nagainst {baseline['meta'].get('revision') or 'baseline'} ({baseline['meta']['started_at']}), threshold {threshold:g}%")
+    print(f"{'endpoint':<32}{'p95 ms':>19}{'change':>9}{'req/s':>19}{'change':>9}")
+
+    for name, now in list(current["endpoints"].items()) + [("total", current["total"])]:
+        before = baseline["endpoints"].get(name) if name != "total" else baseline["total"]
+        if not before:
+            print(f"{name:<32}{'(new)':>19}")
+            continue
+        p95_change = (now["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        rps_change = (now["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+        flag = p95_change > threshold or rps_change < -threshold
+        regressed |= flag
+        print(
+            f"{name:<32}{before['p95_ms']:>8.2f} -> {now['p95_ms']:<7.2f}{p95_change:>+8.1f}%"
+            f"{before['rps']:>8.1f} -> {now['rps']:<7.1f}{rps_change:>+8.1f}%{'  REGRESSION' if flag else ''}"
+        )
+    return regressed
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = args.db_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        started = time.perf_counter()
+        await seed(db_url, args.products, args.users)
+        print(f"seeded {args.products} products and {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        base_url = f"http://127.0.0.1:{args.port}"
+        spawned_at = time.monotonic()
+        server = start_server(db_url, args.port, args.server_workers, warm=not args.no_server_warmup)
+        try:
+            startup = await wait_ready(base_url, spawned_at)
+            startup["first_request_ms"] = await first_requests(base_url)
+            samples = await drive(base_url, args)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    report = summarize(samples, args.duration)
+    report["startup"] = startup
+    report["meta"] = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": db_url.split(":", 1)[0],
+        "products": args.products,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "server_workers": args.server_workers,
+        "server_warmup": not args.no_server_warmup,
+        "mix": args.mix,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured, after the warmup")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("reads=80,writes=15,logins=5"))
+    parser.add_argument("--db-url", help="scratch database to use instead of a temporary SQLite file; its tables are dropped")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--no-server-warmup", action="store_true", help="start the server with WARMUP_ENABLED=false")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--results", help="compare a saved run instead of running the benchmark")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged as a regression")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as saved:
+            report = json.load(saved)
+    else:
+        report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(report, out, indent=2)
+        print(f"\nresults written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as saved:
+            baseline = json.load(saved)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare the ORM list path with the plain-row read path.
+
+    python -m benchmarks.read_path [--rows 5000] [--limit 500] [--repeat 50]
+
+Both paths fetch the same keyset page from a scratch SQLite database and
+produce the same JSON bytes. The ORM path loads ProductModel instances and
+validates them into Page[ProductSchemaResponse]; the row path selects plain
+columns and dumps them directly. Reports median time per page and
+per row, and peak traced allocation for one page.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models.__all_models  # noqa: F401
+from core.pagination import paginate
+from core.serialization import dumps
+from models.category_model import CategoryModel
+from models.product_model import ProductModel
+from models.supplier_model import SupplierModel
+from schemas.page_schema import Page
+from schemas.product_schema import ProductSchemaResponse
+from services.product_service import ProductService
+
+PAGE_ADAPTER = TypeAdapter(Page[ProductSchemaResponse])
+
+
+async def orm_page(db: AsyncSession, limit: int) -> bytes:
+    page = await paginate(db, select(ProductModel), ProductModel.id, limit)
+    return PAGE_ADAPTER.dump_json(PAGE_ADAPTER.validate_python(page, from_attributes=True))
+
+
+async def row_page(db: AsyncSession, limit: int) -> bytes:
+    return dumps(await ProductService.get_all_products(db, limit))
+
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(CategoryModel.__table__), [{"id": 1, "name": "Bench"}])
+        await conn.execute(insert(SupplierModel.__table__), [{"id": 1, "name": "Bench", "cnpj": "0", "address": "-"}])
+        await conn.execute(insert(ProductModel.__table__), [
+            {"name": f"Product {i}", "price": i * 0.25, "qtd": i % 100, "category_id": 1, "supplier_id": 1}
+            for i in range(rows)
+        ])
+
+
+async def measure(session_factory, path, limit: int, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        async with session_factory() as db:
+            start = time.perf_counter()
+            body = await path(db, limit)
+            timings.append(time.perf_counter() - start)
+
+    async with session_factory() as db:
+        tracemalloc.start()
+        await path(db, limit)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return body, {
+        "median_ms": statistics.median(timings) * 1000,
+        "us_per_row": statistics.median(timings) * 1e6 / limit,
+        "peak_kib": peak / 1024,
+    }
+
+
+async def main(rows: int, limit: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        await seed(engine, rows)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        try:
+            results, bodies = {}, {}
+            for name, path in (("orm", orm_page), ("rows", row_page)):
+                bodies[name], results[name] = await measure(session_factory, path, limit, repeat)
+        finally:
+            await engine.dispose()
+
+    assert bodies["orm"] == bodies["rows"], "the two paths must produce the same response body"
+
+    print(f"{'path':<6}{'median ms':>12}{'us/row':>10}{'peak KiB':>11}")
+    for name, result in results.items():
+        print(f"{name:<6}{result['median_ms']:>12.2f}{result['us_per_row']:>10.2f}{result['peak_kib']:>11.1f}")
+    print(f"speedup: {results['orm']['median_ms'] / results['rows']['median_ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat))
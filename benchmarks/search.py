@@ -0,0 +1,101 @@
+"""Product name search latency on a large synthetic catalog.
+
+    python -m benchmarks.search [--rows 1000000] [--repeat 20]
+
+Seeds a scratch SQLite database (FTS5 trigram index, kept by the same
+triggers as production) with generated product names, then times
+ProductService.search_products for prefix, substring and misspelled
+queries. Reports p50 and p95 latency per query kind.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models.__all_models  # noqa: F401
+from models.category_model import CategoryModel
+from models.product_model import ProductModel
+from models.supplier_model import SupplierModel
+from services.product_service import ProductService
+
+WORDS = (
+    "arroz feijao macarrao cafe acucar leite queijo manteiga iogurte biscoito chocolate farinha azeite "
+    "sabonete detergente amaciante shampoo condicionador papel toalha guardanapo refrigerante suco agua "
+    "cerveja vinho tempero molho ketchup maionese mostarda atum sardinha milho ervilha"
+).split()
+BRANDS = "tio joao camil pilao melitta nestle italac tirolez danone piracanjuba ype omo dove coca".split()
+SIZES = ("200g", "500g", "1kg", "5kg", "1l", "2l", "350ml", "12un")
+
+QUERIES = {
+    "prefix": ["arroz", "cafe pil", "chocolate", "queijo", "detergente ype"],
+    "substring": ["joao", "melitta", "amaciante omo", "piracanjuba"],
+    "typo": ["chocolatte", "detergnte", "macaronni", "manteigga"],
+}
+
+
+def names(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(rows):
+        yield f"{rng.choice(WORDS).title()} {rng.choice(BRANDS).title()} {rng.choice(WORDS)} {rng.choice(SIZES)} {i}"
+
+
+async def seed(engine, rows: int, chunk: int = 50000):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(CategoryModel.__table__), [{"id": 1, "name": "Bench"}])
+        await conn.execute(insert(SupplierModel.__table__), [{"id": 1, "name": "Bench", "cnpj": "0", "address": "-"}])
+
+    generated = names(rows)
+    for _ in range(0, rows, chunk):
+        batch = [
+            {"name": name, "price": 1.0, "qtd": 1, "category_id": 1, "supplier_id": 1}
+            for name, _ in zip(generated, range(chunk))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(ProductModel.__table__), batch)
+
+
+async def main(rows: int, repeat: int, limit: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        try:
+            started = time.perf_counter()
+            await seed(engine, rows)
+            print(f"seeded {rows} products in {time.perf_counter() - started:.1f}s")
+
+            session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            print(f"{'kind':<10}{'p50 ms':>9}{'p95 ms':>9}{'hits':>7}")
+            async with session_factory() as db:
+                for kind, queries in QUERIES.items():
+                    timings, hits = [], 0
+                    for _ in range(repeat):
+                        for q in queries:
+                            start = time.perf_counter()
+                            hits += len(await ProductService.search_products(q, db, limit))
+                            timings.append((time.perf_counter() - start) * 1000)
+                    timings.sort()
+                    p95 = timings[int(len(timings) * 0.95) - 1]
+                    print(f"{kind:<10}{statistics.median(timings):>9.2f}{p95:>9.2f}{hits // (repeat * len(queries)):>7}")
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat, args.limit))
@@ -0,0 +1,162 @@
+"""Compare the refresh-based write path with the RETURNING one.
+
+    python -m benchmarks.write_path [--ops 2000] [--concurrency 8] [--db-url URL]
+
+Creates and then updates --ops products, --concurrency writers at a time,
+on a scratch database (a temporary SQLite file, or --db-url, whose tables
+are DROPPED and recreated). The refresh path is the previous
+implementation: existence reads for the category and supplier, an ORM
+flush, then a SELECT to refresh the row after commit (and a locked read
+before an update). The returning path is ProductService as it is now.
+Reports throughput, median latency and SQL statements per write; on a
+networked database each statement is a round trip.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite:///:memory:")
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models.__all_models  # noqa: F401
+from core.database import QueryLog, enforce_foreign_keys, instrument_queries, query_log
+from models.category_model import CategoryModel
+from models.product_model import ProductModel
+from models.supplier_model import SupplierModel
+from schemas.product_schema import ProductSchemaCreate
+from services.inventory_service import InventoryService, figures_of
+from services.product_service import ProductService
+from services.stock_service import StockService
+from services.version_service import VersionService
+
+
+async def refresh_create(data: ProductSchemaCreate, db: AsyncSession):
+    if not await db.get(CategoryModel, data.category_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
+    if not await db.get(SupplierModel, data.supplier_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
+
+    product = ProductModel(**data.model_dump())
+    db.add(product)
+    await db.flush()
+    await StockService.record_movements(db, [(product.id, product.qtd)], "initial")
+    await InventoryService.apply_changes(db, [(None, figures_of(product))])
+    await StockService.evaluate_alerts(db, [(product.id, None, (product.qtd, product.reorder_point))])
+    await VersionService.bump(db, "products")
+    await db.commit()
+    await db.refresh(product)
+    return product
+
+
+async def refresh_update(product_id: int, data: ProductSchemaCreate, db: AsyncSession):
+    product = await db.get(ProductModel, product_id, populate_existing=True, with_for_update=True)
+    if not await db.get(CategoryModel, data.category_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
+    if not await db.get(SupplierModel, data.supplier_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
+
+    before = figures_of(product)
+    position = (product.qtd, product.reorder_point)
+    product.sqlmodel_update(data.model_dump(exclude_unset=True))
+    product.version += 1
+    db.add(product)
+    await StockService.record_movements(db, [(product_id, product.qtd - before[1])], "update")
+    await InventoryService.apply_changes(db, [(before, figures_of(product))])
+    await StockService.evaluate_alerts(db, [(product_id, position, (product.qtd, product.reorder_point))])
+    await VersionService.bump(db, "products")
+    await db.commit()
+    await db.refresh(product)
+    return product
+
+
+PATHS = {
+    "refresh": (refresh_create, refresh_update),
+    "returning": (ProductService.create_product, ProductService.update_product),
+}
+
+
+async def seed(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(CategoryModel.__table__), [{"id": 1, "name": "Bench"}])
+        await conn.execute(insert(SupplierModel.__table__), [{"id": 1, "name": "Bench", "cnpj": "0", "address": "-"}])
+
+
+def product(i: int, qtd: int) -> ProductSchemaCreate:
+    return ProductSchemaCreate(name=f"Product {i}", price=1.0 + i % 50, qtd=qtd, category_id=1, supplier_id=1)
+
+
+async def run(session_factory, write, items, concurrency: int):
+    timings, log = [], QueryLog()
+    queue = list(items)
+
+    async def worker():
+        async with session_factory() as db:
+            while queue:
+                args = queue.pop()
+                token = query_log.set(log)
+                start = time.perf_counter()
+                try:
+                    result = await write(*args, db)
+                finally:
+                    timings.append(time.perf_counter() - start)
+                    query_log.reset(token)
+                created.append(result.id)
+
+    created = []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return created, {
+        "ops_s": len(timings) / elapsed,
+        "median_ms": statistics.median(timings) * 1000,
+        "statements": log.count / len(timings),
+    }
+
+
+async def main(ops: int, concurrency: int, db_url: str = None):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(db_url or f"sqlite+aiosqlite:///{tmp}/bench.db")
+        instrument_queries(engine)
+        enforce_foreign_keys(engine)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        results = {}
+        try:
+            for name, (create, update) in PATHS.items():
+                await seed(engine)
+                ids, results[(name, "create")] = await run(
+                    session_factory, create, [(product(i, 10),) for i in range(ops)], concurrency
+                )
+                _, results[(name, "update")] = await run(
+                    session_factory, update, [(product_id, product(product_id, 11)) for product_id in ids], concurrency
+                )
+        finally:
+            await engine.dispose()
+
+    print(f"{'path':<11}{'write':<8}{'ops/s':>10}{'median ms':>11}{'stmts/op':>10}")
+    for (name, op), result in results.items():
+        print(f"{name:<11}{op:<8}{result['ops_s']:>10.0f}{result['median_ms']:>11.2f}{result['statements']:>10.1f}")
+    for op in ("create", "update"):
+        print(f"{op} throughput: {results[('returning', op)]['ops_s'] / results[('refresh', op)]['ops_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--db-url", help="scratch database to use instead of a temporary SQLite file; its tables are dropped")
+    args = parser.parse_args()
+    asyncio.run(main(args.ops, args.concurrency, args.db_url))
@@ -12,7 +12,7 @@ from jose import jwt
 
 from models.user_model import UserModel
 from core.configs import settings
-from core.security import verify_password
+from core.security import verify_password_async
 
 from pydantic import EmailStr
 
@@ -26,7 +26,7 @@ async def authenticate(email: EmailStr, password: str, db: AsyncSession):
 
         if not user:
             return None
-        if not verify_password(password, user.password):
+        if not await verify_password_async(password, user.password):
             return None
         
         return user
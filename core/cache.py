@@ -0,0 +1,274 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+from urllib.parse import urlencode
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from core.configs import settings
+from core.serialization import dumps
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._data if isinstance(key, str) and key.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend:
+    """Storage for ResponseCache. Values are the serialized response bytes."""
+
+    # A shared backend already sees every process's invalidations; a
+    # per-process one relies on services.cache_sync_service for those.
+    shared = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+        # Generations live outside the LRU so they are never evicted.
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def delete_prefix(self, prefix: str) -> None:
+        self._cache.delete_prefix(prefix)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+        self._counters.clear()
+
+
+class ExternalBackend(CacheBackend):
+    """Adapter for a shared key-value store with a Redis-like async client
+    (get, set(key, value, ex=seconds), delete(*keys), incr, and
+    scan_iter(match=pattern) yielding the matching keys)."""
+
+    shared = True
+
+    def __init__(self, client: Any, prefix: str = "stockflow:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def counter(self, key: str) -> int:
+        return int(await self.client.get(self.prefix + key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self.prefix + key))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        # SCAN walks the keyspace in steps instead of blocking the store
+        # the way KEYS would; the keys are deleted in batches as they come.
+        pattern = _glob_escape(self.prefix + prefix) + "*"
+        batch = []
+        async for key in self.client.scan_iter(match=pattern):
+            batch.append(key)
+            if len(batch) == 500:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+
+    async def clear(self) -> None:
+        # Only this app's keys: the store may be shared with others.
+        await self.delete_prefix("")
+
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class ResponseCache:
+    """Caches serialized GET responses per resource item and per list query.
+
+    Items are invalidated by key. Lists answered with an ETag are keyed by
+    the table version that ETag names, read in the same session, so a body
+    and its ETag always agree, across processes and on a lagging replica
+    alike. Other lists are namespaced by a per-resource generation that
+    every local write bumps, so one increment drops all cached pages and
+    filters of that resource while old entries age out.
+
+    Rows loaded from the read replica may lag behind a write that was just
+    invalidated; they are kept under their own keys (`replica=True`), so a
+    client pinned to the primary after writing never reads them back.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+    async def _load(self, resource: str, key: str, loader: Loader, model: Any, headers: Optional[Mapping[str, str]]) -> Response:
+        if self.backend is None:
+            body = _serialize(model, await loader())
+        else:
+            body = await self.backend.get(key)
+            if body is not None:
+                self.hits[resource] += 1
+            else:
+                self.misses[resource] += 1
+                # A write can commit and invalidate while the loader runs,
+                # and the row loaded before it must not be stored after the
+                # invalidation: the epoch tells whether one happened.
+                epoch = await self.backend.counter(f"{resource}:epoch")
+                body = _serialize(model, await loader())
+                if await self.backend.counter(f"{resource}:epoch") == epoch:
+                    await self.backend.set(key, body, self.ttl)
+        return Response(content=body, media_type="application/json", headers=dict(headers or {}))
+
+    async def item(self, resource: str, item_id: Any, loader: Loader, model: Any = None, headers: Optional[Mapping[str, str]] = None, replica: bool = False) -> Response:
+        return await self._load(resource, _item_key(resource, item_id, replica), loader, model, headers)
+
+    async def listing(self, resource: str, params: Dict[str, Any], loader: Loader, model: Any = None, headers: Optional[Mapping[str, str]] = None, version: Optional[int] = None, replica: bool = False) -> Response:
+        if version is not None:
+            # The primary and a replica at the same version hold the same rows.
+            namespace = f"v{version}"
+        else:
+            generation = await self.backend.counter(f"{resource}:gen") if self.backend is not None else 0
+            namespace = f"{generation}:replica" if replica else str(generation)
+        query = urlencode(sorted((k, v) for k, v in params.items() if v is not None))
+        return await self._load(resource, f"{resource}:list:{namespace}:{query}", loader, model, headers)
+
+    async def invalidate(self, resource: str, *item_ids: Any, lists: bool = True) -> None:
+        if self.backend is None:
+            return
+        if item_ids:
+            keys = [_item_key(resource, item_id, replica) for item_id in item_ids for replica in (False, True)]
+            await self.backend.delete(*keys)
+            await self.backend.incr(f"{resource}:epoch")
+        if lists:
+            await self.backend.incr(f"{resource}:gen")
+
+    async def drop(self, resource: str) -> None:
+        # Everything cached for a resource, for when the changed ids are not
+        # known: a write seen only through its table version bump.
+        if self.backend is None:
+            return
+        await self.backend.delete_prefix(f"{resource}:item:")
+        await self.backend.incr(f"{resource}:epoch")
+        await self.backend.incr(f"{resource}:gen")
+
+    async def clear(self) -> None:
+        self.hits.clear()
+        self.misses.clear()
+        if self.backend is not None:
+            await self.backend.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        resources = set(self.hits) | set(self.misses)
+        return {resource: {"hits": self.hits[resource], "misses": self.misses[resource]} for resource in sorted(resources)}
+
+
+def _item_key(resource: str, item_id: Any, replica: bool) -> str:
+    return f"{resource}:item:replica:{item_id}" if replica else f"{resource}:item:{item_id}"
+
+
+def _glob_escape(text: str) -> str:
+    return "".join("\\" + char if char in "*?[]\\" else char for char in text)
+
+
+def _serialize(model: Any, content: Any) -> bytes:
+    # Without a model the loader already returns plain rows, which are
+    # dumped as they are; a model validates ORM objects on the way out.
+    if model is None:
+        return dumps(content)
+    adapter = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def _build_response_cache() -> ResponseCache:
+    backend = None
+    if settings.RESPONSE_CACHE_TTL_SECONDS > 0:
+        backend = MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return ResponseCache(backend, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+# Swap the backend (e.g. response_cache.backend = ExternalBackend(redis))
+# at startup to share entries and invalidations between processes.
+response_cache = _build_response_cache()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -5,7 +7,91 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
 
+    HASH_WORKERS: int = 4
+    HASH_MAX_QUEUE: int = 1000
+
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+    # 0 disables the response cache.
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    SEARCH_DEFAULT_LIMIT: int = 20
+    SEARCH_MAX_LIMIT: int = 100
+    # Share of the query's trigrams a fuzzy match must contain.
+    SEARCH_MIN_SIMILARITY: float = 0.3
+    EXPORT_CHUNK_SIZE: int = 1000
+    BULK_MAX_ROWS: int = 50000
+    BULK_CHUNK_SIZE: int = 1000
+    # A product update sent without a version is re-read and re-applied
+    # when another write lands first, at most this many times, then 409.
+    UPDATE_MAX_ATTEMPTS: int = 3
+
+    STOCK_SNAPSHOT_INTERVAL_MINUTES: int = 60
+    STOCK_SNAPSHOT_SETTLE_SECONDS: int = 60
+    # Alert streams wake at once on local commits; this bounds how long
+    # alerts written by other processes take to reach them.
+    ALERT_POLL_SECONDS: float = 2.0
+    ALERT_STREAM_BATCH: int = 100
+
+    # Background jobs: JOB_WORKERS jobs run at once per process (0 disables
+    # the runner in this process). A running job whose heartbeat is older
+    # than JOB_STALE_SECONDS is assumed orphaned and claimed again.
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_HEARTBEAT_SECONDS: float = 5.0
+    JOB_STALE_SECONDS: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RESULTS_DIR: str = "job_results"
+
+    # serve.py: WEB_WORKERS processes (0: one per CPU) share one socket.
+    # Each is replaced after WEB_MAX_REQUESTS requests (0: never), plus up
+    # to WEB_MAX_REQUESTS_JITTER so they do not all restart at once, and a
+    # stopping worker gets WEB_GRACEFUL_TIMEOUT seconds to finish requests.
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = 0
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    # How often each process polls table_versions to drop cache entries
+    # made stale by writes in other processes (0 disables).
+    CACHE_SYNC_SECONDS: float = 1.0
+
     DB_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # SQL instrumentation: statement counts and DB time are aggregated per
+    # route (see /metrics and /metrics/sql); SQL_DEBUG_HEADERS also returns
+    # them on every response as X-DB-* headers. A statement shape issued
+    # SQL_N_PLUS_ONE_THRESHOLD times by one request is a likely N+1.
+    SQL_DEBUG_HEADERS: bool = False
+    SQL_SLOW_QUERY_MS: float = 100.0
+    SQL_SLOW_LOG_SIZE: int = 100
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Startup warmup: WARMUP_CONNECTIONS pooled connections (None: the pool
+    # size) are opened and the hot read and auth paths run once before
+    # /ready reports 200. A failed warmup is retried every
+    # WARMUP_RETRY_SECONDS.
+    WARMUP_ENABLED: bool = True
+    WARMUP_CONNECTIONS: Optional[int] = None
+    WARMUP_RETRY_SECONDS: float = 5.0
+
+    DB_REPLICA_URL: Optional[str] = None
+    REPLICA_PIN_SECONDS: int = 5
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_HEALTH_INTERVAL_SECONDS: float = 5.0
+    REPLICA_HEALTH_TIMEOUT_SECONDS: float = 1.0
+
     JWT_SECRET: str
 
     model_config = SettingsConfigDict(
@@ -13,4 +99,4 @@ class Settings(BaseSettings):
         case_sensitive=True
     )
 
-settings: Settings = Settings()
\ No newline at end of file
+settings: Settings = Settings()
@@ -1,11 +1,158 @@
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.configs import settings
 
-engine: AsyncEngine = create_async_engine(settings.DB_URL)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that also counts callers blocked waiting for a connection."""
+
+    waiting: int = 0
+
+    def _do_get(self):
+        exhausted = self._max_overflow > -1 and self._overflow >= self._max_overflow
+        if not exhausted:
+            return super()._do_get()
+
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            self.waiting -= 1
+
+# Bound parameters in every paramstyle we run on (?, %s, %(name)s, $1,
+# :name), then inline literals: after both, two statements that differ only
+# in their values normalize to the same shape.
+_PARAMETERS = re.compile(r"\?|%s|%\(\w+\)s|\$\d+|(?<![:\w]):\w+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    shape = _PARAMETERS.sub("?", statement)
+    shape = _LITERALS.sub("?", shape)
+    shape = _LISTS.sub("(?, ...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+class QueryLog:
+    """Statements issued on behalf of one request, by normalized shape."""
+
+    __slots__ = ("count", "seconds", "shapes", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = defaultdict(int)
+        self.slow: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float):
+        shape = normalize_sql(statement)
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+        if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            self.slow.append((shape, seconds))
+
+    def repeated(self) -> Dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count >= settings.SQL_N_PLUS_ONE_THRESHOLD}
+
+# Set per request by core.metrics.MetricsMiddleware. Statements run outside
+# a request (background loops, jobs) find None and are not recorded.
+query_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # The start time lives on the statement's execution context, which is
+    # discarded with it, so a statement that fails leaves nothing behind.
+    if query_log.get() is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = query_log.get()
+    started = getattr(context, "_query_started", None)
+    if log is not None and started is not None:
+        log.record(statement, time.perf_counter() - started)
+
+def instrument_queries(engine: AsyncEngine):
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def enforce_foreign_keys(engine: AsyncEngine):
+    # Writes rely on the foreign keys instead of reading the parent rows
+    # first; SQLite only checks them on connections that ask it to.
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _enable_foreign_keys)
+
+@compiles(Table, "sqlite")
+def _table_with_hint(table, compiler, fromhints=None, **kw):
+    # SQLite's compiler drops table hints; render them, so that
+    # `with_hint(table, "INDEXED BY ...", "sqlite")` reaches the planner.
+    text = compiler.visit_table(table, fromhints=fromhints, **kw)
+    if fromhints and table in fromhints:
+        text += " " + fromhints[table]
+    return text
+
+def engine_options(url: str) -> Dict[str, Any]:
+    db_url = make_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if db_url.get_backend_name() == "sqlite" and db_url.database in (None, "", ":memory:"):
+        # An in-memory database only exists inside its one connection.
+        options["poolclass"] = StaticPool
+        return options
+
+    options.update(
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+    if db_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    return options
+
+def pool_status(engine: AsyncEngine) -> Dict[str, int]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"size": 1, "checked_in": 0, "checked_out": 0, "overflow": 0, "waiting": 0}
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": getattr(pool, "waiting", 0),
+    }
+
+def dialect_insert(db: AsyncSession):
+    # INSERT ... ON CONFLICT is dialect specific; both backends we run on
+    # (Postgres and SQLite) share the same on_conflict_do_update API.
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+engine: AsyncEngine = create_async_engine(settings.DB_URL, **engine_options(settings.DB_URL))
+instrument_queries(engine)
+enforce_foreign_keys(engine)
 
 Session: AsyncSession = sessionmaker(
     autocommit = False,
@@ -13,4 +160,22 @@ Session: AsyncSession = sessionmaker(
     expire_on_commit = False,
     class_ = AsyncSession,
     bind = engine
-)
\ No newline at end of file
+)
+
+
+# Optional streaming replica for read-only traffic; see core.replica.
+replica_engine: Optional[AsyncEngine] = None
+ReadSession: Optional[AsyncSession] = None
+
+if settings.DB_REPLICA_URL:
+    replica_engine = create_async_engine(settings.DB_REPLICA_URL, **engine_options(settings.DB_REPLICA_URL))
+    instrument_queries(replica_engine)
+    enforce_foreign_keys(replica_engine)
+
+    ReadSession = sessionmaker(
+        autocommit = False,
+        autoflush = False,
+        expire_on_commit = False,
+        class_ = AsyncSession,
+        bind = replica_engine
+    )
\ No newline at end of file
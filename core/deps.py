@@ -1,6 +1,7 @@
+import time
 from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from jose import jwt, JWTError
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,12 +10,26 @@ from pydantic import BaseModel
 
 from core.database import Session
 from core.auth import oauth2_schema
+from core.cache import TTLCache
+from core.replica import read_session_factory
 from core.configs import settings
 from models.user_model import UserModel
 
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+# token -> subject, so a bearer token already seen skips jwt.decode.
+_token_cache = TTLCache(settings.TOKEN_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+# subject -> detached copy of the user row, so it skips the users query.
+_user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+def invalidate_user(user_id: int) -> None:
+    _user_cache.delete(str(user_id))
+
+def clear_auth_cache() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
 async def get_session() -> Generator: # type: ignore
     session: AsyncSession = Session()
     try:
@@ -22,8 +37,18 @@ async def get_session() -> Generator: # type: ignore
     finally:
         await session.close()
 
-async def get_current_user(db: Session = Depends(get_session), token: str = Depends(oauth2_schema)) -> UserModel:
-    credential_exception: HTTPException = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="The credential could not be authenticated.", headers={"WWW-Authenticate": "Bearer"})
+async def get_read_session(request: Request) -> Generator: # type: ignore
+    factory = await read_session_factory(request)
+    session: AsyncSession = factory()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+def _decode_subject(token: str, credential_exception: HTTPException) -> str:
+    username: Optional[str] = _token_cache.get(token)
+    if username is not None:
+        return username
 
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM], options={"verify_aud": False})
@@ -35,13 +60,28 @@ async def get_current_user(db: Session = Depends(get_session), token: str = Depe
         token_data: TokenData = TokenData(username=username)
     except JWTError:
         raise credential_exception
-    
+
+    # Never keep a token cached past its own expiry.
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    _token_cache.set(token, token_data.username, ttl=expires_in)
+    return token_data.username
+
+async def get_current_user(db: Session = Depends(get_session), token: str = Depends(oauth2_schema)) -> UserModel:
+    credential_exception: HTTPException = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="The credential could not be authenticated.", headers={"WWW-Authenticate": "Bearer"})
+
+    username = _decode_subject(token, credential_exception)
+
+    user: Optional[UserModel] = _user_cache.get(username)
+    if user is not None:
+        return user
+
     async with db as session:
-        query = select(UserModel).where(UserModel.id == int(token_data.username))
+        query = select(UserModel).where(UserModel.id == int(username))
         result = await session.execute(query)
         user: UserModel = result.scalars().unique().one_or_none()
 
         if user is None:
             raise credential_exception
         
-        return user
\ No newline at end of file
+        _user_cache.set(username, UserModel.model_validate(user))
+        return user
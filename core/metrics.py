@@ -0,0 +1,260 @@
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import MutableHeaders
+
+from core import database
+from core.cache import response_cache
+from core.configs import settings
+from core.database import QueryLog, query_log
+from core.security import hashing_stats
+
+logger = logging.getLogger(__name__)
+
+# Seconds. Fine-grained at the low end, where cached and indexed reads sit.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Requests that matched no route share one label, so scanners probing
+# random paths cannot blow up the number of series.
+UNMATCHED = "unmatched"
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        # One slot per bucket plus +Inf; cumulated only when rendered.
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+class RequestMetrics:
+    """Per-process request counters and latency histograms, keyed by
+    method and route template. Everything runs on the event loop, so plain
+    dicts and ints need no locking."""
+
+    def __init__(self):
+        self.in_progress = 0
+        self.requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        self.requests[(method, route, str(status))] += 1
+        self.latency[(method, route)].observe(seconds)
+
+    def clear(self):
+        self.in_progress = 0
+        self.requests.clear()
+        self.latency.clear()
+
+request_metrics = RequestMetrics()
+
+class RouteQueries:
+    __slots__ = ("requests", "statements", "seconds", "max_statements", "slow", "n_plus_one")
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.seconds = 0.0
+        self.max_statements = 0
+        self.slow = 0
+        # shape -> [requests that repeated it, most repeats in one request]
+        self.n_plus_one: Dict[str, List[int]] = {}
+
+class QueryStats:
+    """SQL issued per route, folded in from each request's QueryLog, plus
+    the most recent slow statements."""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteQueries] = defaultdict(RouteQueries)
+        self.slow = deque(maxlen=settings.SQL_SLOW_LOG_SIZE)
+
+    def observe(self, method: str, route: str, log: QueryLog):
+        entry = self.routes[(method, route)]
+        entry.requests += 1
+        entry.statements += log.count
+        entry.seconds += log.seconds
+        entry.max_statements = max(entry.max_statements, log.count)
+        entry.slow += len(log.slow)
+
+        for shape, seconds in log.slow:
+            self.slow.append({"method": method, "route": route, "sql": shape, "ms": round(seconds * 1000, 3)})
+
+        for shape, count in log.repeated().items():
+            seen = entry.n_plus_one.get(shape)
+            if seen is None:
+                logger.warning("Likely N+1 on %s %s: statement issued %d times in one request: %s", method, route, count, shape)
+                entry.n_plus_one[shape] = [1, count]
+            else:
+                seen[0] += 1
+                seen[1] = max(seen[1], count)
+
+    def report(self):
+        routes = []
+        for (method, route), entry in sorted(self.routes.items()):
+            routes.append({
+                "method": method,
+                "route": route,
+                "requests": entry.requests,
+                "statements": entry.statements,
+                "statements_per_request": entry.statements / entry.requests,
+                "max_statements": entry.max_statements,
+                "db_ms": round(entry.seconds * 1000, 3),
+                "slow_statements": entry.slow,
+                "n_plus_one": [
+                    {"sql": shape, "requests": requests, "max_repeats": repeats}
+                    for shape, (requests, repeats) in sorted(entry.n_plus_one.items(), key=lambda item: -item[1][1])
+                ],
+            })
+        return {"routes": routes, "slow": list(self.slow)}
+
+    def clear(self):
+        self.routes.clear()
+        self.slow.clear()
+
+query_stats = QueryStats()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: unlike BaseHTTPMiddleware it adds no task or
+    body buffering per request, and leaves streaming responses alone.
+
+    The route template is read from the scope after the router has
+    matched, so /products/1 and /products/2 are one series. Each request
+    also gets a QueryLog that the engine event hooks in core.database
+    fill in."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics, queries: QueryStats = query_stats):
+        self.app = app
+        self.metrics = metrics
+        self.queries = queries
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status_code = 500
+        started = time.perf_counter()
+        log = QueryLog()
+        token = query_log.set(log)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SQL_DEBUG_HEADERS:
+                    # Statements issued while a streaming body is still being
+                    # sent are not in the headers, only in the aggregates.
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Statements"] = str(log.count)
+                    headers["X-DB-Time-Ms"] = f"{log.seconds * 1000:.2f}"
+                    headers["X-DB-Repeated-Statements"] = str(max(log.repeated().values(), default=0))
+            await send(message)
+
+        metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_log.reset(token)
+            metrics.in_progress -= 1
+            route = getattr(scope.get("route"), "path", UNMATCHED)
+            metrics.observe(scope["method"], route, status_code, time.perf_counter() - started)
+            self.queries.observe(scope["method"], route, log)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _family(lines: List[str], name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(**labels)} {value}")
+
+def render(metrics: RequestMetrics = request_metrics, queries: QueryStats = query_stats) -> str:
+    lines: List[str] = []
+
+    _family(lines, "http_requests_in_progress", "gauge", "Requests being handled by this process.", [({}, metrics.in_progress)])
+    _family(lines, "http_requests_total", "counter", "Requests handled, by method, route template and status code.", [
+        ({"method": method, "route": route, "status": status}, count)
+        for (method, route, status), count in sorted(metrics.requests.items())
+    ])
+
+    name = "http_request_duration_seconds"
+    lines.append(f"# HELP {name} Time from receiving a request to sending the end of its response.")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(metrics.latency.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {cumulative}")
+
+    routes = sorted(queries.routes.items())
+    for name, kind, help_text, field in (
+        ("db_statements_total", "counter", "SQL statements issued, by route.", "statements"),
+        ("db_statement_seconds_total", "counter", "Time spent executing SQL statements, by route.", "seconds"),
+        ("db_slow_statements_total", "counter", "SQL statements slower than SQL_SLOW_QUERY_MS, by route.", "slow"),
+        ("db_statements_max", "gauge", "Most SQL statements issued by a single request, by route.", "max_statements"),
+    ):
+        _family(lines, name, kind, help_text, [
+            ({"method": method, "route": route}, getattr(entry, field)) for (method, route), entry in routes
+        ])
+    _family(lines, "db_n_plus_one_requests_total", "counter", "Requests that repeated one statement shape SQL_N_PLUS_ONE_THRESHOLD times or more, by route.", [
+        ({"method": method, "route": route}, sum(requests for requests, _ in entry.n_plus_one.values())) for (method, route), entry in routes
+    ])
+
+    pools = [("primary", database.engine)]
+    if database.replica_engine is not None:
+        pools.append(("replica", database.replica_engine))
+    statuses = [(pool, database.pool_status(engine)) for pool, engine in pools]
+    for field, help_text in (
+        ("size", "Connections the pool keeps open."),
+        ("checked_out", "Connections currently in use."),
+        ("checked_in", "Idle connections in the pool."),
+        ("overflow", "Connections open beyond the pool size."),
+        ("waiting", "Requests waiting for a connection."),
+    ):
+        _family(lines, f"db_pool_{field}", "gauge", help_text, [({"pool": pool}, status[field]) for pool, status in statuses])
+
+    hashing = hashing_stats()
+    for field, kind, help_text in (
+        ("waiting", "gauge", "Password hashes queued for a worker thread."),
+        ("running", "gauge", "Password hashes running on worker threads."),
+        ("completed", "counter", "Password hashes completed."),
+        ("rejected", "counter", "Password hashes rejected because the queue was full."),
+        ("wait_seconds_total", "counter", "Time password hashes spent queued."),
+        ("hash_seconds_total", "counter", "Time spent computing password hashes."),
+        ("hash_seconds_max", "gauge", "Slowest password hash so far."),
+    ):
+        suffix = "" if field.endswith("_total") or kind == "gauge" else "_total"
+        _family(lines, f"bcrypt_{field}{suffix}", kind, help_text, [({}, hashing[field])])
+
+    cache = response_cache.stats()
+    for field in ("hits", "misses"):
+        _family(lines, f"response_cache_{field}_total", "counter", f"Response cache {field}, by resource.", [
+            ({"resource": resource}, counts[field]) for resource, counts in cache.items()
+        ])
+
+    return "\n".join(lines) + "\n"
+
+async def metrics_endpoint(request: Request):
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+async def sql_metrics_endpoint(request: Request):
+    return JSONResponse(query_stats.report())
@@ -0,0 +1,98 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import String, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from core.configs import settings
+from schemas.page_schema import Page
+
+# (column, descending)
+SortOrder = Tuple[Any, bool]
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        after: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page."),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    return values
+
+
+def sort_order(sort: str, columns: Dict[str, Any]) -> SortOrder:
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+
+    if name not in columns:
+        allowed = ", ".join(sorted(columns))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot sort by '{name}'. Allowed: {allowed}.")
+    return columns[name], descending
+
+
+def _matches_type(value: Any, column) -> bool:
+    column_type = getattr(column.type, "impl", column.type)
+    if isinstance(column_type, String):
+        return isinstance(value, str)
+
+    python_type = column_type.python_type
+    if python_type is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, python_type)
+
+
+async def paginate(db: AsyncSession, query: Select, key, limit: int, after: Optional[str] = None, sort: Optional[SortOrder] = None) -> Page:
+    # Keyset pagination: seek past the last (sort value, key) of the previous
+    # page instead of using OFFSET, so every page costs the same index range
+    # scan. The unique key breaks ties between equal sort values.
+    limit = max(1, min(limit, settings.MAX_PAGE_SIZE))
+    column, descending = sort if sort is not None else (key, False)
+    keys = [key] if column is key else [column, key]
+
+    if after is not None:
+        values = decode_cursor(after)
+        if len(values) != len(keys) or not all(_matches_type(v, c) for v, c in zip(values, keys)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+        if len(keys) == 1:
+            position, last = keys[0], values[0]
+        else:
+            position, last = tuple_(*keys), tuple_(*values)
+        query = query.where(position < last if descending else position > last)
+
+    order_by = [c.desc() if descending else c.asc() for c in keys]
+    result = await db.execute(query.order_by(*order_by).limit(limit + 1))
+
+    # A query over a mapped class yields ORM instances; a query over plain
+    # columns yields dicts, which skip the identity map entirely.
+    entity = len(query.column_descriptions) == 1 and isinstance(query.column_descriptions[0]["expr"], type)
+    items = list(result.scalars().all()) if entity else [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([last[c.key] if isinstance(last, dict) else getattr(last, c.key) for c in keys])
+
+    return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+
+from core import database
+from core.cache import TTLCache
+from core.configs import settings
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "sf_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary does not look like replication lag.
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_health: Dict[str, float] = {"healthy": False, "checked_until": 0.0}
+_pinned_tokens = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.REPLICA_PIN_SECONDS)
+
+
+async def _replica_lag() -> float:
+    async with database.replica_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            return float((await conn.execute(LAG_QUERY)).scalar() or 0)
+        await conn.execute(text("SELECT 1"))
+        return 0.0
+
+
+async def replica_available() -> bool:
+    if database.replica_engine is None:
+        return False
+
+    now = time.monotonic()
+    if now < _health["checked_until"]:
+        return bool(_health["healthy"])
+
+    # Claim the next check window first so concurrent requests keep using the
+    # last known state instead of all probing the replica at once.
+    _health["checked_until"] = now + settings.REPLICA_HEALTH_INTERVAL_SECONDS
+    try:
+        lag = await asyncio.wait_for(_replica_lag(), timeout=settings.REPLICA_HEALTH_TIMEOUT_SECONDS)
+        healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning("Read replica is %.1fs behind, reading from primary", lag)
+    except Exception:
+        logger.warning("Read replica is unreachable, reading from primary", exc_info=True)
+        healthy = False
+
+    _health["healthy"] = healthy
+    return healthy
+
+
+def reset_replica_health() -> None:
+    _health.update(healthy=False, checked_until=0.0)
+    _pinned_tokens.clear()
+
+
+def _client_key(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization")
+    return hashlib.sha256(authorization.encode()).hexdigest() if authorization else None
+
+
+def is_pinned(request: Request) -> bool:
+    try:
+        if float(request.cookies.get(PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+
+    key = _client_key(request)
+    return key is not None and _pinned_tokens.get(key) is not None
+
+
+async def pin_writes_to_primary(request: Request, call_next):
+    # Read-your-writes: after a successful write the client reads from the
+    # primary for REPLICA_PIN_SECONDS, tracked with a cookie (works across
+    # workers) and by bearer token (for clients that drop cookies).
+    response = await call_next(request)
+
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        until = time.time() + settings.REPLICA_PIN_SECONDS
+        response.set_cookie(PIN_COOKIE, f"{until:.3f}", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="lax")
+
+        key = _client_key(request)
+        if key is not None:
+            _pinned_tokens.set(key, True)
+
+    return response
+
+
+def is_replica(session) -> bool:
+    return database.replica_engine is not None and session.bind is database.replica_engine
+
+
+async def read_session_factory(request: Request):
+    if database.ReadSession is not None and not is_pinned(request) and await replica_available():
+        return database.ReadSession
+    return database.Session
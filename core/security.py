@@ -1,9 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from core.configs import settings
+
 CRIPTO = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop; the semaphore caps how many hashes run at once and the rest queue.
+_executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="bcrypt")
+_limiter: Optional[asyncio.Semaphore] = None
+_limiter_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_stats: Dict[str, float] = {
+    "waiting": 0,
+    "running": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds_total": 0.0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+}
+
 def verify_password(password: str, password_hash: str) -> bool:
     return CRIPTO.verify(password, password_hash)
 
 def generate_hash(password: str) -> str:
-    return CRIPTO.hash(password)
\ No newline at end of file
+    return CRIPTO.hash(password)
+
+def _get_limiter() -> asyncio.Semaphore:
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        _limiter = asyncio.Semaphore(settings.HASH_WORKERS)
+        _limiter_loop = loop
+    return _limiter
+
+async def _run_hash(func: Callable[..., Any], *args: Any) -> Any:
+    if _stats["waiting"] >= settings.HASH_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many authentication requests, try again shortly.", headers={"Retry-After": "1"})
+
+    queued_at = time.perf_counter()
+    _stats["waiting"] += 1
+    try:
+        await _get_limiter().acquire()
+    finally:
+        _stats["waiting"] -= 1
+
+    started_at = time.perf_counter()
+    _stats["running"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        _get_limiter().release()
+        elapsed = time.perf_counter() - started_at
+        _stats["running"] -= 1
+        _stats["completed"] += 1
+        _stats["wait_seconds_total"] += started_at - queued_at
+        _stats["hash_seconds_total"] += elapsed
+        _stats["hash_seconds_max"] = max(_stats["hash_seconds_max"], elapsed)
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_hash(verify_password, password, password_hash)
+
+async def generate_hash_async(password: str) -> str:
+    return await _run_hash(generate_hash, password)
+
+def hashing_stats() -> Dict[str, float]:
+    return dict(_stats)
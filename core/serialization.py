@@ -0,0 +1,23 @@
+from typing import Any, List, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Table
+
+
+def columns_for(schema: Type[BaseModel], table: Table) -> List[Any]:
+    # Plain columns in the schema's field order, so rows dumped as-is have
+    # the same keys, in the same order, as the pydantic response model.
+    return [table.c[name] for name in schema.model_fields]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain rows (dicts, lists, scalars and shallow models such as
+    Page) straight to JSON bytes, without validating them again."""
+    return orjson.dumps(content, default=_default)
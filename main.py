@@ -1,11 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from core import database
 from core.configs import settings
 from api.v1.api import api_router
+from core.replica import pin_writes_to_primary
+from core.metrics import MetricsMiddleware, metrics_endpoint, sql_metrics_endpoint
+from services.stock_service import StockService
+from services.job_service import job_runner
+from services.cache_sync_service import cache_sync
+from services.warmup_service import WarmupService, ready_endpoint, set_ready
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warmup runs alongside serving: the port opens at once, and /ready
+    # holds the load balancer off until the pool and hot paths are warm.
+    tasks = [asyncio.create_task(WarmupService.run())]
+    if settings.STOCK_SNAPSHOT_INTERVAL_MINUTES > 0:
+        tasks.append(asyncio.create_task(StockService.run_snapshot_loop()))
+    if settings.CACHE_SYNC_SECONDS > 0:
+        tasks.append(asyncio.create_task(cache_sync.run()))
+    job_runner.start()
+
+    yield
+
+    # Draining: report not ready so the load balancer stops routing here.
+    set_ready(False)
+    await job_runner.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
-app: FastAPI= FastAPI(title="StockFlow - With FastAPI & SQL Model")
+    # Close pooled connections, so the database sees a clean disconnect and
+    # a recycled worker (see serve.py) does not linger on their threads.
+    await database.engine.dispose()
+    if database.replica_engine is not None:
+        await database.replica_engine.dispose()
+
+app: FastAPI= FastAPI(title="StockFlow - With FastAPI & SQL Model", lifespan=lifespan)
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+app.add_api_route("/metrics/sql", sql_metrics_endpoint, include_in_schema=False)
+app.add_api_route("/ready", ready_endpoint, include_in_schema=False)
+
+if settings.DB_REPLICA_URL:
+    app.middleware("http")(pin_writes_to_primary)
+
+# Added last so it is outermost and times the other middleware too.
+app.add_middleware(MetricsMiddleware)
+
 if __name__ == "__main__":
     import uvicorn
 
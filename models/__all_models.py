@@ -1,4 +1,10 @@
 from models.product_model import ProductModel
 from models.category_model import CategoryModel
 from models.supplier_model import SupplierModel
-from models.user_model import UserModel
\ No newline at end of file
+from models.user_model import UserModel
+from models.stock_movement_model import StockMovementModel
+from models.stock_snapshot_model import StockSnapshotModel
+from models.stock_alert_model import StockAlertModel
+from models.inventory_summary_model import InventorySummaryModel
+from models.table_version_model import TableVersionModel
+from models.job_model import JobModel
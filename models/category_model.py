@@ -12,5 +12,7 @@ class CategoryModel(CategorySchemaBase, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(unique=True)
+    # Row version, as on ProductModel.
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
     products: List["ProductModel"] = Relationship(back_populates="category")
\ No newline at end of file
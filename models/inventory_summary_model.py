@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, Field
+
+class InventorySummaryModel(SQLModel, table=True):
+    __tablename__ = "inventory_summary"
+
+    # scope is "total" (scope_id 0), "category" or "supplier".
+    scope: str = Field(primary_key=True)
+    scope_id: int = Field(primary_key=True)
+
+    skus: int = 0
+    units: int = 0
+    value: float = 0.0
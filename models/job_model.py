@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, Column, ForeignKey, Index, Integer
+from sqlmodel import SQLModel, Field
+
+class JobModel(SQLModel, table=True):
+    __tablename__ = "jobs"
+    # Workers claim the oldest job by status, so the queue is an index scan.
+    __table_args__ = (Index("ix_jobs_status_id", "status", "id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    # queued -> running -> succeeded | failed | cancelled; a failed attempt
+    # with retries left goes back to queued.
+    status: str = "queued"
+    params: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    # Handler checkpoint, kept across attempts so a retry resumes the work.
+    state: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    result: Optional[Any] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    progress: float = 0.0
+    attempts: int = 0
+    max_attempts: int = 1
+    cancel_requested: bool = False
+    # Jobs outlive the user who submitted them.
+    user_id: Optional[int] = Field(default=None, sa_column=Column(Integer, ForeignKey("users.id", ondelete="SET NULL")))
+
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Bumped by the running worker; a stale heartbeat means the worker died.
+    heartbeat_at: Optional[datetime] = None
@@ -1,5 +1,6 @@
 from typing import Optional, TYPE_CHECKING
 
+from sqlalchemy import DDL, Index, event, func, text
 from sqlmodel import Field, Relationship
 
 from schemas.product_schema import ProductSchemaBase
@@ -10,11 +11,60 @@ if TYPE_CHECKING:
 
 class ProductModel(ProductSchemaBase, table=True):
     __tablename__ = "products"
+    __table_args__ = (
+        # Filters and sorts of GET /products/, each with id as the keyset
+        # tie-breaker so pages are served straight from the index: a
+        # category or supplier filter under any sort, or the sort alone.
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_category_id_name_id", "category_id", "name", "id"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        Index("ix_products_category_id_qtd_id", "category_id", "qtd", "id"),
+        Index("ix_products_supplier_id_id", "supplier_id", "id"),
+        Index("ix_products_supplier_id_name_id", "supplier_id", "name", "id"),
+        Index("ix_products_supplier_id_price_id", "supplier_id", "price", "id"),
+        Index("ix_products_supplier_id_qtd_id", "supplier_id", "qtd", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_qtd_id", "qtd", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        # Products below their reorder point: the low-stock set, kept by the
+        # database itself and read in O(alerts).
+        Index("ix_products_low_stock", "id", sqlite_where=text("qtd < reorder_point"), postgresql_where=text("qtd < reorder_point")),
+        # Name search on Postgres (pg_trgm): serves ILIKE and <% lookups.
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     
     category_id: int = Field(default=None, foreign_key="categories.id")
     supplier_id: int = Field(default=None, foreign_key="suppliers.id")
+    reorder_point: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Bumped by every write to the row; updates are conditional on it.
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
     category: Optional["CategoryModel"] = Relationship(back_populates="products")
-    supplier: Optional["SupplierModel"] = Relationship(back_populates="products")
\ No newline at end of file
+    supplier: Optional["SupplierModel"] = Relationship(back_populates="products")
+
+# Prefix search: range scans on lower(name), already in result order. The
+# Postgres copy uses the "C" collation so LIKE 'prefix%' and ORDER BY can
+# both be served by it; SQLite compares bytes anyway.
+Index("ix_products_lower_name", func.lower(ProductModel.__table__.c.name)).ddl_if(dialect="sqlite")
+Index("ix_products_lower_name_c", func.lower(ProductModel.__table__.c.name).collate("C")).ddl_if(dialect="postgresql")
+
+# Name search on SQLite: an external-content FTS5 table with the trigram
+# tokenizer, kept in step with products by triggers. Migration
+# 7c1e9b4d2f60 creates the same objects on existing databases.
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_search USING fts5(name, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS products_search_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_search(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_search_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_search(products_search, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS products_search_au AFTER UPDATE OF name ON products BEGIN "
+    "INSERT INTO products_search(products_search, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO products_search(rowid, name) VALUES (new.id, new.name); END",
+)
+
+event.listen(ProductModel.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(ProductModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(ProductModel.__table__, "after_drop", DDL("DROP TABLE IF EXISTS products_search").execute_if(dialect="sqlite"))
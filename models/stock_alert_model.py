@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field
+
+from schemas.stock_schema import StockAlertSchemaBase
+
+class StockAlertModel(StockAlertSchemaBase, table=True):
+    __tablename__ = "stock_alerts"
+
+    # Append-only like the stock ledger; subscribers follow it by id.
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime
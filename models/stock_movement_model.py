@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field
+
+from schemas.stock_schema import StockMovementSchemaBase
+
+class StockMovementModel(StockMovementSchemaBase, table=True):
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_product_id_created_at", "product_id", "created_at"),
+        Index("ix_stock_movements_created_at", "created_at"),
+    )
+
+    # product_id is intentionally not a foreign key: the ledger is append-only
+    # and keeps the history of products that were deleted.
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime
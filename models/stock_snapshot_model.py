@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+class StockSnapshotModel(SQLModel, table=True):
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_id_taken_at", "product_id", "taken_at"),
+        Index("ix_stock_snapshots_taken_at", "taken_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    product_id: int
+    qtd: int
+    taken_at: datetime
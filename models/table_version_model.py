@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+
+class TableVersionModel(SQLModel, table=True):
+    __tablename__ = "table_versions"
+
+    name: str = Field(primary_key=True)
+    version: int = 0
+    updated_at: Optional[datetime] = None
@@ -1,13 +1,16 @@
 from typing import Optional, List
 from sqlmodel import SQLModel
 
-from schemas.product_schema import ProductSchemaResponse
-
 class CategorySchemaBase(SQLModel):
     name: str
 
+class CategorySchemaUpdate(CategorySchemaBase):
+    # As on ProductSchemaUpdate: the version last read, or If-Match.
+    version: Optional[int] = None
+
 class CategorySchemaResponse(CategorySchemaBase):
     id: int
+    version: int
 
-class CategorySchemaProducts(CategorySchemaResponse):
-    products: List[ProductSchemaResponse] = []
\ No newline at end of file
+class CategorySchemaDetail(CategorySchemaResponse):
+    product_count: int = 0
\ No newline at end of file
@@ -0,0 +1,16 @@
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+class InventoryFigures(SQLModel):
+    skus: int = 0
+    units: int = 0
+    value: float = 0.0
+
+class InventoryGroup(InventoryFigures):
+    id: int
+    name: Optional[str] = None
+
+class InventorySummary(SQLModel):
+    total: InventoryFigures
+    by_category: List[InventoryGroup] = []
+    by_supplier: List[InventoryGroup] = []
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from sqlmodel import SQLModel, Field
+
+class JobSchemaCreate(SQLModel):
+    kind: str
+    params: Dict[str, Any] = {}
+    max_attempts: Optional[int] = Field(default=None, ge=1, le=10)
+
+class JobSchemaResponse(SQLModel):
+    id: int
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    progress: float
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ExportJobParams(SQLModel):
+    format: Literal["ndjson", "csv"] = "ndjson"
+    category_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+
+class RepriceJobParams(SQLModel):
+    # Applied as price * (1 + percent / 100), rounded to cents.
+    percent: float = Field(gt=-100, le=1000)
+    category_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+
+class RebuildJobParams(SQLModel):
+    pass
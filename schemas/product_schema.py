@@ -1,5 +1,5 @@
-from typing import Optional
-from sqlmodel import SQLModel
+from typing import Optional, List
+from sqlmodel import Field, SQLModel
 
 class ProductSchemaBase(SQLModel):
     name: str
@@ -7,9 +7,35 @@ class ProductSchemaBase(SQLModel):
     qtd: int
     category_id: int
     supplier_id: int
+    # Stock alerts fire when qtd drops below this; 0 disables them.
+    reorder_point: int = Field(default=0, ge=0)
 
 class ProductSchemaCreate(ProductSchemaBase):
     pass
 
+class ProductSchemaUpdate(ProductSchemaCreate):
+    # The version last read; a stale one is refused with 409. May also be
+    # sent as If-Match.
+    version: Optional[int] = None
+
 class ProductSchemaResponse(ProductSchemaBase):
-    id: int
\ No newline at end of file
+    id: int
+    version: int
+
+class ProductFilter(SQLModel):
+    category_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    min_price: Optional[float] = Field(default=None, ge=0)
+    max_price: Optional[float] = Field(default=None, ge=0)
+    min_qtd: Optional[int] = None
+    max_qtd: Optional[int] = None
+
+class ProductBulkResult(SQLModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class ProductBulkReport(SQLModel):
+    created: int
+    failed: int
+    results: List[ProductBulkResult]
\ No newline at end of file
@@ -0,0 +1,41 @@
+from datetime import datetime
+from sqlmodel import SQLModel
+
+class StockAdjustment(SQLModel):
+    product_id: int
+    delta: int
+    reason: str = "adjustment"
+
+class StockLevel(SQLModel):
+    product_id: int
+    qtd: int
+
+class StockMovementSchemaBase(SQLModel):
+    product_id: int
+    delta: int
+    reason: str
+
+class StockMovementSchemaResponse(StockMovementSchemaBase):
+    id: int
+    created_at: datetime
+
+class StockBalance(SQLModel):
+    product_id: int
+    at: datetime
+    qtd: int
+
+class StockAlertSchemaBase(SQLModel):
+    product_id: int
+    # "low" when qtd drops below reorder_point, "cleared" when it recovers
+    # or the product is deleted.
+    kind: str
+    qtd: int
+    reorder_point: int
+
+class StockAlertSchemaResponse(StockAlertSchemaBase):
+    id: int
+    created_at: datetime
+
+class StockSnapshotRun(SQLModel):
+    taken_at: datetime
+    products: int
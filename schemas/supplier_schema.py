@@ -6,5 +6,10 @@ class SupplierSchemaBase(SQLModel):
     cnpj: str
     address: str
 
+class SupplierSchemaUpdate(SupplierSchemaBase):
+    # As on ProductSchemaUpdate: the version last read, or If-Match.
+    version: Optional[int] = None
+
 class SupplierSchemaResponse(SupplierSchemaBase):
-    id: int
\ No newline at end of file
+    id: int
+    version: int
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""Production entry point: WEB_WORKERS uvicorn processes share one listening
+socket under a small supervisor, so every core serves requests.
+
+    python serve.py [--workers N] [--host HOST] [--port PORT]
+
+SIGHUP restarts the workers one at a time without closing the socket, so
+no connection is refused during a deploy; SIGTERM or SIGINT drains them and
+exits. A worker that exits on its own, recycled after WEB_MAX_REQUESTS or
+crashed, is replaced. `python main.py` remains the single-process,
+auto-reloading development server.
+
+Each worker has its own connection pools, caches and /metrics counters:
+plan DB connections as workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW), and
+scrape or aggregate metrics per process. Caches stay coherent across
+workers through services.cache_sync_service.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import time
+from functools import partial
+
+from uvicorn import Config, Server
+from uvicorn._subprocess import get_subprocess
+
+from core.configs import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+def _signal_when_ready(ready):
+    from services.warmup_service import is_ready
+
+    while not is_ready():
+        time.sleep(0.1)
+    ready.set()
+
+def run_worker(config: Config, ready, sockets=None):
+    # Runs in the worker process; `ready` tells the supervisor this worker
+    # finished its warmup (see services.warmup_service).
+    threading.Thread(target=_signal_when_ready, args=(ready,), daemon=True).start()
+    Server(config=config).run(sockets=sockets)
+
+class Supervisor:
+    def __init__(self, workers: int, host: str, port: int):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.processes = []
+        self.ready = {}
+        self.signals = []
+        self.sockets = [self._config().bind_socket()]
+
+    def _config(self) -> Config:
+        max_requests = None
+        if settings.WEB_MAX_REQUESTS > 0:
+            max_requests = settings.WEB_MAX_REQUESTS + random.randint(0, settings.WEB_MAX_REQUESTS_JITTER)
+        return Config(
+            "main:app",
+            host=self.host,
+            port=self.port,
+            limit_max_requests=max_requests,
+            timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        )
+
+    def spawn(self):
+        # Each worker gets its own config, so each draws its own jitter.
+        config = self._config()
+        ready = multiprocessing.get_context("spawn").Event()
+        process = get_subprocess(config=config, target=partial(run_worker, config, ready), sockets=self.sockets)
+        process.start()
+        self.processes.append(process)
+        self.ready[process] = ready
+        logger.info("Started worker [%s]", process.pid)
+        return process
+
+    def stop(self, process):
+        # SIGTERM makes uvicorn stop accepting and finish in-flight requests.
+        process.terminate()
+        process.join(settings.WEB_GRACEFUL_TIMEOUT + 5)
+        if process.is_alive():
+            logger.warning("Worker [%s] did not stop in time, killing it", process.pid)
+            process.kill()
+            process.join()
+        if process in self.processes:
+            self.processes.remove(process)
+        self.ready.pop(process, None)
+
+    def restart(self):
+        # The old worker drains only once its replacement is warm (or gave
+        # up warming), so the socket always has as many workers serving.
+        for process in list(self.processes):
+            replacement = self.spawn()
+            if not self.ready[replacement].wait(settings.WEB_GRACEFUL_TIMEOUT):
+                logger.warning("Worker [%s] is not ready yet, restarting the next one anyway", replacement.pid)
+            self.stop(process)
+
+    def handle(self, sig, frame):
+        self.signals.append(sig)
+
+    def run(self):
+        logger.info("Supervisor [%s] serving on %s:%s with %d workers", os.getpid(), self.host, self.port, self.workers)
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(sig, self.handle)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while True:
+            while self.signals:
+                sig = self.signals.pop(0)
+                if sig == signal.SIGHUP:
+                    logger.info("Restarting workers")
+                    self.restart()
+                else:
+                    logger.info("Stopping workers")
+                    for process in list(self.processes):
+                        process.terminate()
+                    for process in list(self.processes):
+                        self.stop(process)
+                    return
+
+            for process in list(self.processes):
+                if not process.is_alive():
+                    logger.info("Worker [%s] exited with code %s, replacing it", process.pid, process.exitcode)
+                    self.processes.remove(process)
+                    self.ready.pop(process, None)
+                    self.spawn()
+            time.sleep(0.5)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="worker processes (0: one per CPU)")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    args = parser.parse_args()
+
+    Supervisor(args.workers or os.cpu_count() or 1, args.host, args.port).run()
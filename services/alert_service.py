@@ -0,0 +1,75 @@
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy import func, select as core_select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.product_model import ProductModel
+from models.stock_alert_model import StockAlertModel
+from schemas.product_schema import ProductSchemaResponse
+from schemas.stock_schema import StockAlertSchemaResponse
+from core.configs import settings
+from core.pagination import paginate
+from core.serialization import columns_for
+
+_wakeup: Optional[asyncio.Event] = None
+_wakeup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_wakeup() -> asyncio.Event:
+    global _wakeup, _wakeup_loop
+    loop = asyncio.get_running_loop()
+    if _wakeup is None or _wakeup_loop is not loop:
+        _wakeup = asyncio.Event()
+        _wakeup_loop = loop
+    return _wakeup
+
+def alerts_committed(session) -> None:
+    # after_commit hook registered by StockService.evaluate_alerts: wakes
+    # the streams of this process at once. Streams in other processes pick
+    # the alerts up on their next poll.
+    global _wakeup
+    if _wakeup is not None:
+        _wakeup.set()
+        _wakeup = None
+
+def _sse(alert: StockAlertModel) -> str:
+    data = StockAlertSchemaResponse.model_validate(alert).model_dump_json()
+    return f"id: {alert.id}\nevent: {alert.kind}\ndata: {data}\n\n"
+
+class AlertService:
+    @staticmethod
+    async def get_low_stock(db: AsyncSession, limit: int, after: Optional[str] = None):
+        # Served by the partial index ix_products_low_stock: the cost follows
+        # the number of products below their reorder point, not the catalog.
+        query = core_select(*columns_for(ProductSchemaResponse, ProductModel.__table__)).where(ProductModel.qtd < ProductModel.reorder_point)
+        return await paginate(db, query, ProductModel.id, limit, after)
+
+    @staticmethod
+    async def get_alerts(db: AsyncSession, limit: int, after: Optional[str] = None):
+        return await paginate(db, select(StockAlertModel), StockAlertModel.id, limit, after)
+
+    @staticmethod
+    async def stream_alerts(session_factory: Callable[[], AsyncSession], last_id: Optional[int] = None) -> AsyncIterator[str]:
+        # Server-sent events following the alert log by id. A reconnecting
+        # client passes the last id it saw (Last-Event-ID) and resumes there;
+        # a new one starts from now.
+        if last_id is None:
+            async with session_factory() as db:
+                last_id = (await db.execute(core_select(func.coalesce(func.max(StockAlertModel.id), 0)))).scalar_one()
+
+        while True:
+            wakeup = _get_wakeup()
+            async with session_factory() as db:
+                query = select(StockAlertModel).where(StockAlertModel.id > last_id).order_by(StockAlertModel.id).limit(settings.ALERT_STREAM_BATCH)
+                alerts = (await db.execute(query)).scalars().all()
+
+            for alert in alerts:
+                last_id = alert.id
+                yield _sse(alert)
+            if len(alerts) == settings.ALERT_STREAM_BATCH:
+                continue
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.ALERT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from models.table_version_model import TableVersionModel
+from core.cache import response_cache
+from core.configs import settings
+from core.database import Session
+from core.deps import clear_auth_cache
+from services.version_service import local_versions
+
+logger = logging.getLogger(__name__)
+
+# table_versions name -> response cache resources to drop when it moves.
+# Product writes also change category details, the same pairs the
+# services invalidate locally.
+RESOURCES: Dict[str, Tuple[str, ...]] = {
+    "products": ("products", "categories"),
+    "categories": ("categories",),
+    "suppliers": ("suppliers",),
+}
+
+class CacheSync:
+    """Keeps this process's caches coherent with writes made by other
+    processes (other workers of serve.py, other instances, background jobs).
+
+    Every write already bumps its table's row in table_versions inside the
+    writer's transaction, so polling that small table is enough to see that
+    something changed anywhere: one primary-key scan of a handful of rows
+    per interval. A resource whose version moved is dropped as a whole,
+    since the version does not say which rows changed, unless every step
+    of that move was committed by this process, whose writers already
+    invalidated what they changed. Entries a concurrent read stored just
+    after a drop can still be stale, at most until the response cache TTL.
+    """
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+        self.versions: Optional[Dict[str, int]] = None
+
+    async def poll(self):
+        table = TableVersionModel.__table__
+        async with self.session_factory() as db:
+            versions = dict((await db.execute(select(table.c.name, table.c.version))).all())
+
+        previous, self.versions = self.versions, versions
+        if previous is None:
+            local_versions.clear()
+            return []
+
+        changed = []
+        for name, version in sorted(versions.items()):
+            moved = set(range(previous.get(name, 0) + 1, version + 1))
+            local = local_versions.pop(name, set())
+            if not moved <= local:
+                changed.append(name)
+            # A local commit seen only by the next poll is kept for it.
+            local_versions[name].update(v for v in local if v > version)
+        for name in changed:
+            if name == "users":
+                clear_auth_cache()
+            elif not (response_cache.backend and response_cache.backend.shared):
+                for resource in RESOURCES.get(name, ()):
+                    await response_cache.drop(resource)
+        return changed
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Cache sync poll failed")
+            await asyncio.sleep(settings.CACHE_SYNC_SECONDS)
+
+cache_sync = CacheSync()
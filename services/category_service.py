@@ -1,17 +1,37 @@
+from typing import Optional
+
+from sqlalchemy import and_, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from models.category_model import CategoryModel
-from schemas.category_schema import CategorySchemaBase
+from models.product_model import ProductModel
+from models.inventory_summary_model import InventorySummaryModel
+from schemas.category_schema import CategorySchemaBase, CategorySchemaResponse, CategorySchemaDetail
 from fastapi import HTTPException, status
+from core.cache import response_cache
+from core.pagination import paginate, sort_order
+from core.serialization import columns_for
+from services.product_service import PRODUCT_COLUMNS, SORTABLE_COLUMNS
+from services.version_service import VersionService
+
+CATEGORY_COLUMNS = columns_for(CategorySchemaResponse, CategoryModel.__table__)
 
 class CategoryService:
     @staticmethod
     async def create_category(category_data: CategorySchemaBase, db: AsyncSession):
-        new_category = CategoryModel(**category_data.model_dump())
-        db.add(new_category)
+        query = insert(CategoryModel.__table__).values(**category_data.model_dump()).returning(*CATEGORY_COLUMNS)
+        row = (await db.execute(query)).mappings().one()
+        await VersionService.bump(db, "categories")
         await db.commit()
-        await db.refresh(new_category)
-        return new_category
+        await response_cache.invalidate("categories")
+        return CategorySchemaResponse(**row)
     
+    @staticmethod
+    async def get_all_categories(db: AsyncSession, limit: int, after: Optional[str] = None):
+        query = select(*CATEGORY_COLUMNS)
+        return await paginate(db, query, CategoryModel.id, limit, after)
+
     @staticmethod
     async def get_category_by_id(category_id: int, db: AsyncSession):
         category = await db.get(CategoryModel, category_id)
@@ -21,19 +41,61 @@ class CategoryService:
         return category
     
     @staticmethod
-    async def update_category(category_id: int, category_data: CategorySchemaBase, db: AsyncSession):
-        category_up = await CategoryService.get_category_by_id(category_id, db)
+    async def get_category_detail(category_id: int, db: AsyncSession):
+        # The product count comes from the maintained inventory summary, so
+        # the detail costs one indexed lookup however large the category is.
+        summary = InventorySummaryModel.__table__
+        query = (
+            select(CategoryModel.id, CategoryModel.name, CategoryModel.version, func.coalesce(summary.c.skus, 0).label("product_count"))
+            .outerjoin(summary, and_(summary.c.scope == "category", summary.c.scope_id == CategoryModel.id))
+            .where(CategoryModel.id == category_id)
+        )
+        row = (await db.execute(query)).first()
 
-        category_dict = category_data.model_dump(exclude_unset=True)
-        category_up.sqlmodel_update(category_dict)
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
+        return CategorySchemaDetail(**row._asdict())
+
+    @staticmethod
+    async def get_category_products(category_id: int, db: AsyncSession, limit: int, after: Optional[str] = None, sort: str = "id"):
+        order = sort_order(sort, SORTABLE_COLUMNS)
+        await CategoryService.get_category_by_id(category_id, db)
 
+        query = select(*PRODUCT_COLUMNS).where(ProductModel.category_id == category_id)
+        return await paginate(db, query, ProductModel.id, limit, after, order)
+
+    @staticmethod
+    async def update_category(category_id: int, category_data: CategorySchemaBase, db: AsyncSession, version: Optional[int] = None):
+        table = CategoryModel.__table__
+        category_dict = category_data.model_dump(exclude_unset=True, exclude={"version"})
+        row = await VersionService.update_row(db, table, category_id, category_dict, version, CATEGORY_COLUMNS)
+        if row is None:
+            raise await VersionService.conflict_error(db, table, category_id, "Category")
+
+        await VersionService.bump(db, "categories")
         await db.commit()
-        await db.refresh(category_up)
-        return category_up
+        await response_cache.invalidate("categories", category_id)
+        return CategorySchemaResponse(**row)
 
     @staticmethod
     async def delete_category(category_id: int, db: AsyncSession):
         category_del = await CategoryService.get_category_by_id(category_id, db)
 
+        # Every product needs a category, so one still in use is refused;
+        # the foreign key also catches a product added since the check.
+        in_use = select(ProductModel.id).where(ProductModel.category_id == category_id).limit(1)
+        if (await db.execute(in_use)).first() is not None:
+            raise _in_use_error()
         await db.delete(category_del)
-        await db.commit()
\ No newline at end of file
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            raise _in_use_error()
+
+        await VersionService.bump(db, "categories")
+        await db.commit()
+        await response_cache.invalidate("categories", category_id)
+
+def _in_use_error() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Category still has products.")
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.inventory_summary_model import InventorySummaryModel
+from models.product_model import ProductModel
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+from schemas.inventory_schema import InventoryFigures, InventoryGroup, InventorySummary
+from core.database import dialect_insert
+
+# A product as the summary sees it: (price, qtd, category_id, supplier_id).
+ProductFigures = Tuple[float, int, int, int]
+
+def figures_of(product) -> ProductFigures:
+    return (product.price, product.qtd, product.category_id, product.supplier_id)
+
+def _upsert(db: AsyncSession):
+    table = InventorySummaryModel.__table__
+    query = dialect_insert(db)(table)
+    return query.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.scope_id],
+        set_={
+            "skus": table.c.skus + query.excluded.skus,
+            "units": table.c.units + query.excluded.units,
+            "value": table.c.value + query.excluded.value,
+        },
+    )
+
+class InventoryService:
+    @staticmethod
+    async def apply_changes(db: AsyncSession, changes: Iterable[Tuple[Optional[ProductFigures], Optional[ProductFigures]]]):
+        # Each change is (before, after) for one product; None means the
+        # product did not exist on that side. The summary rows are bumped by
+        # the difference, in the caller's transaction, so totals never need
+        # a scan of the products table.
+        deltas: Dict[Tuple[str, int], List[float]] = defaultdict(lambda: [0, 0, 0.0])
+
+        for before, after in changes:
+            for sign, figures in ((-1, before), (1, after)):
+                if figures is None:
+                    continue
+                price, qtd, category_id, supplier_id = figures
+                for key in (("total", 0), ("category", category_id), ("supplier", supplier_id)):
+                    delta = deltas[key]
+                    delta[0] += sign
+                    delta[1] += sign * qtd
+                    delta[2] += sign * qtd * price
+
+        rows = [
+            {"scope": scope, "scope_id": scope_id, "skus": skus, "units": units, "value": value}
+            for (scope, scope_id), (skus, units, value) in sorted(deltas.items())
+            if skus or units or value
+        ]
+        if rows:
+            await db.execute(_upsert(db), rows)
+
+    @staticmethod
+    async def rebuild(db: AsyncSession):
+        product = ProductModel.__table__
+        table = InventorySummaryModel.__table__
+
+        def grouped(scope: str, column=None):
+            query = select(
+                literal(scope).label("scope"),
+                (column if column is not None else literal(0)).label("scope_id"),
+                func.count().label("skus"),
+                func.coalesce(func.sum(product.c.qtd), 0).label("units"),
+                func.coalesce(func.sum(product.c.qtd * product.c.price), 0.0).label("value"),
+            )
+            return query.group_by(column) if column is not None else query
+
+        totals = union_all(
+            grouped("total"),
+            grouped("category", product.c.category_id),
+            grouped("supplier", product.c.supplier_id),
+        )
+
+        await db.execute(delete(table))
+        await db.execute(insert(table).from_select(["scope", "scope_id", "skus", "units", "value"], totals))
+        await db.commit()
+
+    @staticmethod
+    async def get_summary(db: AsyncSession):
+        table = InventorySummaryModel.__table__
+        columns = (table.c.scope_id, table.c.skus, table.c.units, table.c.value)
+
+        total = (await db.execute(select(*columns[1:]).where(table.c.scope == "total"))).first()
+        summary = InventorySummary(total=InventoryFigures(**total._asdict()) if total else InventoryFigures())
+
+        for scope, model, target in (("category", CategoryModel, summary.by_category), ("supplier", SupplierModel, summary.by_supplier)):
+            query = (
+                select(*columns, model.name)
+                .outerjoin(model, model.id == table.c.scope_id)
+                .where(table.c.scope == scope, table.c.skus > 0)
+                .order_by(table.c.scope_id)
+            )
+            for row in await db.execute(query):
+                target.append(InventoryGroup(id=row.scope_id, name=row.name, skus=row.skus, units=row.units, value=row.value))
+
+        return summary
@@ -0,0 +1,111 @@
+import os
+
+from sqlalchemy import bindparam, func, select, update
+
+from models.job_model import JobModel
+from models.product_model import ProductModel
+from schemas.job_schema import ExportJobParams, RebuildJobParams, RepriceJobParams
+from core.configs import settings
+from core.cache import response_cache
+from services.inventory_service import InventoryService
+from services.job_service import JobContext, job_handler
+from services.product_service import ProductService
+from services.version_service import VersionService
+
+def export_path(job_id: int, fmt: str) -> str:
+    return os.path.join(settings.JOB_RESULTS_DIR, f"products-{job_id}.{fmt}")
+
+def _scoped(query, table, params):
+    if params.category_id is not None:
+        query = query.where(table.c.category_id == params.category_id)
+    if params.supplier_id is not None:
+        query = query.where(table.c.supplier_id == params.supplier_id)
+    return query
+
+@job_handler("export_products", ExportJobParams)
+async def export_products(context: JobContext):
+    params = context.params
+    table = ProductModel.__table__
+    path = export_path(context.job_id, params.format)
+    os.makedirs(settings.JOB_RESULTS_DIR, exist_ok=True)
+
+    async with context.session() as db:
+        total = (await db.execute(_scoped(select(func.count()).select_from(table), table, params))).scalar_one()
+
+    # Keyset chunks, each read in its own short transaction, rather than one
+    # cursor held open for the whole export: a long job should not pin a
+    # snapshot (or, on SQLite, block writers) while it runs. Exports are
+    # cheap to redo and a partial file is useless, so a retry starts over.
+    rows, last_id = 0, 0
+    with open(path + ".part", "w", encoding="utf-8", newline="") as output:
+        output.write(ProductService.format_export([], params.format, header=params.format == "csv"))
+        while True:
+            query = ProductService.export_query(params.category_id, params.supplier_id)
+            async with context.session() as db:
+                chunk = (await db.execute(query.where(table.c.id > last_id).limit(settings.EXPORT_CHUNK_SIZE))).all()
+            if not chunk:
+                break
+
+            output.write(ProductService.format_export(chunk, params.format))
+            rows += len(chunk)
+            last_id = chunk[-1].id
+            await context.report(rows / total if total else 1.0)
+
+    os.replace(path + ".part", path)
+    return {"file": os.path.basename(path), "rows": rows, "bytes": os.path.getsize(path)}
+
+@job_handler("rebuild_inventory", RebuildJobParams)
+async def rebuild_inventory(context: JobContext):
+    async with context.session() as db:
+        await InventoryService.rebuild(db)
+    return {"rebuilt": True}
+
+@job_handler("reprice_products", RepriceJobParams)
+async def reprice_products(context: JobContext):
+    params = context.params
+    table = ProductModel.__table__
+    factor = 1 + params.percent / 100
+    last_id = context.state.get("last_id", 0)
+    updated = context.state.get("updated", 0)
+
+    async with context.session() as db:
+        total = (await db.execute(_scoped(select(func.count()).select_from(table), table, params))).scalar_one()
+
+    # One transaction per chunk, in id order, carrying its own checkpoint:
+    # a retry or a restart picks up after the last chunk that landed and
+    # never applies the change twice to the same product. The checkpoint
+    # only moves from the value this chunk started at, so a worker that lost
+    # the job (or raced another one for it) rolls its chunk back instead.
+    while True:
+        start_id = last_id
+        async with context.session() as db:
+            query = (
+                _scoped(select(table.c.id, table.c.price, table.c.qtd, table.c.category_id, table.c.supplier_id), table, params)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(settings.BULK_CHUNK_SIZE)
+                .with_for_update()
+            )
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+
+            prices = [{"_id": row.id, "price": round(row.price * factor, 2)} for row in rows]
+            await db.execute(
+                update(table).where(table.c.id == bindparam("_id")).values(price=bindparam("price"), version=table.c.version + 1),
+                prices,
+            )
+            await InventoryService.apply_changes(db, [
+                ((row.price, row.qtd, row.category_id, row.supplier_id), (new["price"], row.qtd, row.category_id, row.supplier_id))
+                for row, new in zip(rows, prices)
+            ])
+            await VersionService.bump(db, "products")
+
+            last_id = rows[-1].id
+            updated += len(rows)
+            checkpoint = func.coalesce(JobModel.state["last_id"].as_integer(), 0) == start_id
+            await context.report(updated / total if total else 1.0, {"last_id": last_id, "updated": updated}, db, where=checkpoint)
+            await db.commit()
+            await response_cache.invalidate("products", *(row.id for row in rows))
+
+    return {"updated": updated, "percent": params.percent}
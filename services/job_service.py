@@ -0,0 +1,316 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select, update
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from models.job_model import JobModel
+from schemas.job_schema import JobSchemaCreate
+from core.configs import settings
+from core.database import Session
+from core.pagination import paginate
+from services.stock_service import utcnow
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[["JobContext"], Awaitable[Any]]
+
+# kind -> (handler, params schema). Handlers register themselves with
+# @job_handler; see services/job_handlers.py.
+JOB_HANDLERS: Dict[str, Tuple[Handler, Type[SQLModel]]] = {}
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+def job_handler(kind: str, params: Type[SQLModel]):
+    def register(handler: Handler) -> Handler:
+        JOB_HANDLERS[kind] = (handler, params)
+        return handler
+    return register
+
+class JobLost(Exception):
+    """The job was reclaimed by another worker (its heartbeat went stale)
+    while this one was still running it."""
+
+def _owned(job_id: int, claim: int):
+    # A worker holds its job only while the row is still running under the
+    # attempt it claimed: a stale reclaim bumps `attempts`, after which every
+    # write from the old worker matches nothing.
+    return and_(JobModel.id == job_id, JobModel.status == "running", JobModel.attempts == claim)
+
+def _claimable():
+    stale = utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    return or_(
+        JobModel.status == "queued",
+        and_(JobModel.status == "running", JobModel.heartbeat_at < stale),
+    )
+
+class JobContext:
+    """What a handler sees of its job: its parameters, the checkpoint left
+    by a previous attempt, and a way to report progress."""
+
+    def __init__(self, runner: "JobRunner", job_id: int, claim: int, params: SQLModel, state: Optional[Dict[str, Any]]):
+        self.runner = runner
+        self.job_id = job_id
+        self.claim = claim
+        self.params = params
+        self.state = state or {}
+
+    def session(self) -> AsyncSession:
+        return self.runner.session_factory()
+
+    async def report(self, progress: float, state: Optional[Dict[str, Any]] = None, db: Optional[AsyncSession] = None, where=None):
+        # With `db` the update joins the caller's transaction, so a
+        # checkpoint commits together with the work it records and a retry
+        # never resumes from a point the job had not actually reached.
+        # `where` adds a condition on the stored row, e.g. the checkpoint
+        # the work started from. Raises JobLost when the row no longer
+        # matches, rolling back the caller's work with it.
+        values: Dict[str, Any] = {"progress": min(max(progress, 0.0), 1.0), "heartbeat_at": utcnow()}
+        if state is not None:
+            values["state"] = state
+        query = update(JobModel).where(_owned(self.job_id, self.claim)).values(**values)
+        if where is not None:
+            query = query.where(where)
+
+        if db is not None:
+            matched = (await db.execute(query)).rowcount
+        else:
+            async with self.session() as session:
+                matched = (await session.execute(query)).rowcount
+                await session.commit()
+        if matched == 0:
+            raise JobLost(f"Job {self.job_id} is no longer held by this worker.")
+        if state is not None:
+            self.state = state
+
+class JobRunner:
+    def __init__(self, session_factory=Session, workers: Optional[int] = None):
+        self.session_factory = session_factory
+        self.workers = settings.JOB_WORKERS if workers is None else workers
+        self._tasks = []
+        self._running: Dict[int, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Jobs interrupted by shutdown go back to the queue untouched; the
+        # next process to start (or another worker process) picks them up.
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, job_id: int) -> bool:
+        task = self._running.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            # Whatever escapes _run (bad stored params, a database error while
+            # finishing) fails this job only; the worker goes on to the next.
+            try:
+                await self._run(job)
+            except Exception as error:
+                logger.exception("Job %s (%s) crashed its worker", job.id, job.kind)
+                try:
+                    await self._finish(job, status="failed", error=str(error) or type(error).__name__, finished_at=utcnow())
+                except Exception:
+                    logger.exception("Marking job %s failed did not work", job.id)
+
+    async def _claim(self):
+        # The conditional UPDATE is the lock: of several workers (or
+        # processes) racing for the same row only one sees it still
+        # claimable, the others get no row back and look again.
+        now = utcnow()
+        candidate = select(JobModel.id).where(_claimable()).order_by(JobModel.id).limit(1).scalar_subquery()
+        query = (
+            update(JobModel)
+            .where(JobModel.id == candidate, _claimable())
+            .values(status="running", attempts=JobModel.attempts + 1, started_at=now, heartbeat_at=now, finished_at=None)
+            .returning(JobModel.id, JobModel.kind, JobModel.params, JobModel.state, JobModel.attempts, JobModel.max_attempts, JobModel.cancel_requested)
+        )
+        async with self.session_factory() as db:
+            job = (await db.execute(query)).first()
+            await db.commit()
+        return job
+
+    async def _finish(self, job, **values):
+        async with self.session_factory() as db:
+            matched = (await db.execute(update(JobModel).where(_owned(job.id, job.attempts)).values(**values))).rowcount
+            await db.commit()
+        if matched == 0:
+            logger.warning("Job %s was reclaimed by another worker; attempt %s leaves it alone", job.id, job.attempts)
+
+    async def _heartbeat(self, job) -> bool:
+        # True when the job should stop: cancellation was requested, or the
+        # job is no longer this worker's to run.
+        query = (
+            update(JobModel)
+            .where(_owned(job.id, job.attempts))
+            .values(heartbeat_at=utcnow())
+            .returning(JobModel.cancel_requested)
+        )
+        async with self.session_factory() as db:
+            cancel_requested = (await db.execute(query)).scalar()
+            await db.commit()
+        return cancel_requested is None or bool(cancel_requested)
+
+    async def _run(self, job):
+        if job.cancel_requested:
+            await self._finish(job, status="cancelled", finished_at=utcnow())
+            return
+
+        handler, params_schema = JOB_HANDLERS.get(job.kind, (None, None))
+        if handler is None:
+            await self._finish(job, status="failed", error=f"Unknown job kind {job.kind!r}.", finished_at=utcnow())
+            return
+
+        context = JobContext(self, job.id, job.attempts, params_schema.model_validate(job.params), job.state)
+        task = asyncio.create_task(handler(context))
+        self._running[job.id] = task
+
+        try:
+            # The handler runs as its own task while this one keeps the
+            # heartbeat fresh and watches for cancellation requested from
+            # any process.
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=settings.JOB_HEARTBEAT_SECONDS)
+                if done:
+                    break
+                if await self._heartbeat(job):
+                    task.cancel()
+        except asyncio.CancelledError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.shield(self._finish(job, status="queued", attempts=job.attempts - 1, heartbeat_at=None))
+            raise
+        except Exception:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        finally:
+            self._running.pop(job.id, None)
+
+        now = utcnow()
+        if task.cancelled():
+            await self._finish(job, status="cancelled", finished_at=now)
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.warning("Job %s (%s) failed on attempt %s: %r", job.id, job.kind, job.attempts, error)
+            retry = job.attempts < job.max_attempts
+            await self._finish(
+                job,
+                status="queued" if retry else "failed",
+                error=str(getattr(error, "detail", None) or error) or type(error).__name__,
+                finished_at=None if retry else now,
+            )
+        else:
+            result = jsonable_encoder(task.result())
+            await self._finish(job, status="succeeded", progress=1.0, result=result, error=None, finished_at=now)
+
+job_runner = JobRunner()
+
+class JobService:
+    @staticmethod
+    async def get_job(job_id: int, db: AsyncSession):
+        job = await db.get(JobModel, job_id, populate_existing=True)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+        return job
+
+    @staticmethod
+    async def get_jobs(db: AsyncSession, limit: int, after: Optional[str] = None, job_status: Optional[str] = None):
+        query = select(JobModel)
+        if job_status is not None:
+            query = query.where(JobModel.status == job_status)
+        return await paginate(db, query, JobModel.id, limit, after)
+
+    @staticmethod
+    async def submit_job(job_data: JobSchemaCreate, db: AsyncSession, user_id: Optional[int] = None):
+        handler, params_schema = JOB_HANDLERS.get(job_data.kind, (None, None))
+        if handler is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown job kind. Use one of: {', '.join(sorted(JOB_HANDLERS))}.")
+        try:
+            params = params_schema.model_validate(job_data.params)
+        except ValidationError as error:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=jsonable_encoder(error.errors(include_url=False)))
+
+        job = JobModel(
+            kind=job_data.kind,
+            params=params.model_dump(mode="json"),
+            max_attempts=job_data.max_attempts or settings.JOB_MAX_ATTEMPTS,
+            user_id=user_id,
+            created_at=utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+        job_runner.notify()
+        return job
+
+    @staticmethod
+    async def cancel_job(job_id: int, db: AsyncSession):
+        job = await JobService.get_job(job_id, db)
+        if job.status in FINISHED:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status}.")
+
+        # A queued job is cancelled outright; a running one is flagged, and
+        # whichever worker holds it stops it at its next heartbeat (at once
+        # if that worker is in this process).
+        query = (
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status == "queued")
+            .values(status="cancelled", cancel_requested=True, finished_at=utcnow())
+        )
+        if (await db.execute(query)).rowcount == 0:
+            await db.execute(update(JobModel).where(JobModel.id == job_id, JobModel.status == "running").values(cancel_requested=True))
+        await db.commit()
+
+        job_runner.cancel(job_id)
+        return await JobService.get_job(job_id, db)
+
+    @staticmethod
+    async def retry_job(job_id: int, db: AsyncSession):
+        job = await JobService.get_job(job_id, db)
+        if job.status not in ("failed", "cancelled"):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed or cancelled jobs can be retried.")
+
+        # The checkpoint is kept, so the retry resumes where the job stopped.
+        query = (
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status.in_(("failed", "cancelled")))
+            .values(status="queued", attempts=0, cancel_requested=False, error=None, finished_at=None)
+        )
+        await db.execute(query)
+        await db.commit()
+
+        job_runner.notify()
+        return await JobService.get_job(job_id, db)
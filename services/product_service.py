@@ -1,28 +1,237 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, column, func, insert, literal, literal_column, select as core_select, table
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 from models.product_model import ProductModel
 from models.category_model import CategoryModel
 from models.supplier_model import SupplierModel
-from schemas.product_schema import ProductSchemaCreate
+from schemas.product_schema import ProductSchemaCreate, ProductSchemaResponse, ProductFilter, ProductBulkResult, ProductBulkReport
+from core.configs import settings
+from core.cache import response_cache
+from core.pagination import paginate, sort_order
+from core.serialization import columns_for
+from services.stock_service import StockService
+from services.inventory_service import InventoryService, figures_of
+from services.version_service import VersionService
+
+EXPORT_COLUMNS = ("id", "name", "price", "qtd", "category_id", "supplier_id")
+
+# Read path columns: GETs select these as plain rows instead of loading
+# ProductModel instances and validating them into ProductSchemaResponse.
+PRODUCT_COLUMNS = columns_for(ProductSchemaResponse, ProductModel.__table__)
+
+SORTABLE_COLUMNS = {
+    "id": ProductModel.id,
+    "name": ProductModel.name,
+    "price": ProductModel.price,
+    "qtd": ProductModel.qtd,
+}
+
+# SQLite side of the name search (see models.product_model).
+PRODUCTS_SEARCH = table("products_search", column("rowid"))
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+def _apply_filters(query, filters: Optional[ProductFilter], sort_column=None):
+    if filters is None:
+        return query
+
+    # With a category or supplier filter, its (filter, sort, id) index
+    # already yields the matching rows in sort order, and a range on
+    # another column is best checked on those: `column + 0` keeps the
+    # planner from range-scanning that column's index and sorting instead.
+    narrowed = sort_column is not None and (filters.category_id is not None or filters.supplier_id is not None)
+
+    def ranged(column):
+        return column + 0 if narrowed and column is not sort_column else column
+
+    # Without one, a range on another column than the sort one is searched
+    # on its own index and the matching rows sorted. SQLite, lacking
+    # statistics, would rather walk the rowid or sort index and filter
+    # every row, so it is told which index to use; a two-sided range wins.
+    bounds = {
+        ProductModel.price: (filters.min_price, filters.max_price),
+        ProductModel.qtd: (filters.min_qtd, filters.max_qtd),
+    }
+    bounded = [column for column, values in bounds.items() if values != (None, None)]
+    if not narrowed and bounded and all(column is not sort_column for column in bounded):
+        column = max(bounded, key=lambda column: None not in bounds[column])
+        query = query.with_hint(ProductModel.__table__, f"INDEXED BY ix_products_{column.key}_id", "sqlite")
+
+    if filters.category_id is not None:
+        query = query.where(ProductModel.category_id == filters.category_id)
+    if filters.supplier_id is not None:
+        query = query.where(ProductModel.supplier_id == filters.supplier_id)
+    if filters.min_price is not None:
+        query = query.where(ranged(ProductModel.price) >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.where(ranged(ProductModel.price) <= filters.max_price)
+    if filters.min_qtd is not None:
+        query = query.where(ranged(ProductModel.qtd) >= filters.min_qtd)
+    if filters.max_qtd is not None:
+        query = query.where(ranged(ProductModel.qtd) <= filters.max_qtd)
+    return query
+
+def _prefix_query(q: str, limit: int, postgres: bool):
+    # Range scan on the lower(name) index, already in output order.
+    lowered = func.lower(ProductModel.name)
+    if postgres:
+        lowered = lowered.collate("C")
+        where = lowered.like(_like_escape(q.lower()) + "%", escape="\\")
+    else:
+        where = and_(lowered >= q.lower(), lowered < q.lower() + "\uffff")
+    return core_select(*PRODUCT_COLUMNS).where(where).order_by(lowered, ProductModel.id).limit(limit)
+
+def _substring_query(q: str, limit: int, postgres: bool):
+    if postgres:
+        return core_select(*PRODUCT_COLUMNS).where(ProductModel.name.ilike(f"%{_like_escape(q)}%", escape="\\")).limit(limit)
+    return _fts_query(_fts_phrase(q)).limit(limit)
+
+def _fuzzy_postgres_query(q: str, limit: int, postgres: bool):
+    name = ProductModel.name
+    return (
+        core_select(*PRODUCT_COLUMNS)
+        .where(literal(q).op("<%")(name))
+        .order_by(func.word_similarity(q, name).desc(), func.length(name), ProductModel.id)
+        .limit(limit)
+    )
+
+def _fuzzy_sqlite_query(q: str, limit: int, postgres: bool):
+    # One typo leaves either half of the query intact, so candidates must
+    # contain one half as a substring; short queries fall back to any
+    # shared trigram. Candidates are scored by _rank_fuzzy.
+    if len(q) >= 6:
+        terms = {q[:(len(q) + 1) // 2], q[len(q) // 2:]}
+    else:
+        terms = _trigrams(q)
+    return _fts_query(" OR ".join(_fts_phrase(term) for term in sorted(terms))).limit(limit * 10)
+
+def _fts_query(match: str):
+    return (
+        core_select(*PRODUCT_COLUMNS)
+        .select_from(PRODUCTS_SEARCH.join(ProductModel.__table__, ProductModel.id == PRODUCTS_SEARCH.c.rowid))
+        .where(literal_column("products_search").op("MATCH")(match))
+    )
+
+def _rank_fuzzy(q: str, rows) -> List[Dict]:
+    # Share of the query's trigrams found in the name, as pg_trgm's
+    # word_similarity does; ties go to names starting like the query.
+    trigrams = _trigrams(q)
+    scored = []
+    for row in rows:
+        score = len(trigrams & _trigrams(row["name"])) / len(trigrams)
+        if score >= settings.SEARCH_MIN_SIMILARITY:
+            prefix = row["name"].lower().startswith(q[:3].lower())
+            scored.append((-score, not prefix, len(row["name"]), row["id"], row))
+    return [row for *_, row in sorted(scored)]
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def _invalidate(product_ids: Iterable[int], category_ids: Iterable[int]):
+    # Called after commit. A read that loaded the old row before then does
+    # not store it: ResponseCache skips the store when an invalidation
+    # happened while it was loading. Category details carry a product
+    # count, hence the category items.
+    await response_cache.invalidate("products", *product_ids)
+    await response_cache.invalidate("categories", *set(category_ids), lists=False)
+
+async def _existing_ids(db: AsyncSession, column, ids: Set[int]) -> Set[int]:
+    found: Set[int] = set()
+    for chunk in _chunks(sorted(ids), settings.BULK_CHUNK_SIZE):
+        result = await db.execute(core_select(column).where(column.in_(chunk)))
+        found.update(result.scalars().all())
+    return found
+
+async def _missing_reference(db: AsyncSession, products_data: List[ProductSchemaCreate], error: IntegrityError) -> Exception:
+    # Writes leave the category and supplier checks to the foreign keys;
+    # only when one fails is it worth a query to say which.
+    await db.rollback()
+    category_ids = {p.category_id for p in products_data}
+    if await _existing_ids(db, CategoryModel.id, category_ids) != category_ids:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
+    supplier_ids = {p.supplier_id for p in products_data}
+    if await _existing_ids(db, SupplierModel.id, supplier_ids) != supplier_ids:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
+    return error
 
 class ProductService:
     @staticmethod
     async def create_product(product_data: ProductSchemaCreate, db: AsyncSession):
-        category = await db.get(CategoryModel, product_data.category_id)
-        if not category:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
-        
-        supplier = await db.get(SupplierModel, product_data.supplier_id)
-        if not supplier:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
-        
-        new_product = ProductModel(**product_data.model_dump())
-        db.add(new_product)
+        # INSERT ... RETURNING hands back the stored row, id and defaults
+        # included, in the same round trip: no existence reads before it
+        # and no refresh after the commit.
+        table = ProductModel.__table__
+        try:
+            query = insert(table).values(**product_data.model_dump()).returning(*PRODUCT_COLUMNS)
+            row = (await db.execute(query)).mappings().one()
+        except IntegrityError as error:
+            raise await _missing_reference(db, [product_data], error)
+
+        await StockService.record_movements(db, [(row["id"], row["qtd"])], "initial")
+        await InventoryService.apply_changes(db, [(None, (row["price"], row["qtd"], row["category_id"], row["supplier_id"]))])
+        await StockService.evaluate_alerts(db, [(row["id"], None, (row["qtd"], row["reorder_point"]))])
+        await VersionService.bump(db, "products")
         await db.commit()
-        await db.refresh(new_product)
-        return new_product
+        await _invalidate([], [row["category_id"]])
+        return ProductSchemaResponse(**row)
     
+    @staticmethod
+    async def create_products_bulk(products_data: List[ProductSchemaCreate], db: AsyncSession):
+        # Foreign keys are checked once per table for the whole batch, and the
+        # valid rows go out as chunked executemany INSERTs in one transaction.
+        category_ids = await _existing_ids(db, CategoryModel.id, {p.category_id for p in products_data})
+        supplier_ids = await _existing_ids(db, SupplierModel.id, {p.supplier_id for p in products_data})
+
+        results: List[ProductBulkResult] = []
+        valid_rows = []
+        for index, product in enumerate(products_data):
+            if product.category_id not in category_ids:
+                results.append(ProductBulkResult(index=index, error="Category not found."))
+            elif product.supplier_id not in supplier_ids:
+                results.append(ProductBulkResult(index=index, error="Supplier not found."))
+            else:
+                result = ProductBulkResult(index=index)
+                results.append(result)
+                valid_rows.append((result, product.model_dump()))
+
+        # A category or supplier deleted after the check above fails the
+        # whole batch, which is rolled back and can simply be resent.
+        table = ProductModel.__table__
+        query = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        for chunk in _chunks(valid_rows, settings.BULK_CHUNK_SIZE):
+            try:
+                inserted = await db.execute(query, [row for _, row in chunk])
+            except IntegrityError as error:
+                raise await _missing_reference(db, [ProductSchemaCreate(**row) for _, row in valid_rows], error)
+            for (result, _), new_id in zip(chunk, inserted.scalars().all()):
+                result.id = new_id
+            await StockService.record_movements(db, [(result.id, row["qtd"]) for result, row in chunk], "initial")
+            await InventoryService.apply_changes(db, [(None, (row["price"], row["qtd"], row["category_id"], row["supplier_id"])) for _, row in chunk])
+            await StockService.evaluate_alerts(db, [(result.id, None, (row["qtd"], row["reorder_point"])) for result, row in chunk])
+
+        if valid_rows:
+            await VersionService.bump(db, "products")
+        await db.commit()
+        if valid_rows:
+            await _invalidate([], {row["category_id"] for _, row in valid_rows})
+        return ProductBulkReport(created=len(valid_rows), failed=len(results) - len(valid_rows), results=results)
+
     @staticmethod
     async def get_product_by_id(product_id: int, db: AsyncSession):
         product_up = await db.get(ProductModel, product_id)
@@ -32,34 +241,137 @@ class ProductService:
         return product_up
     
     @staticmethod
-    async def get_all_products(db: AsyncSession):
-        query = select(ProductModel)
-        result = await db.execute(query)
-        return result.scalars().all()
+    async def get_product_row(product_id: int, db: AsyncSession):
+        query = core_select(*PRODUCT_COLUMNS).where(ProductModel.id == product_id)
+        row = (await db.execute(query)).mappings().first()
+
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found.")
+        return dict(row)
 
     @staticmethod
-    async def update_product(product_id: int, product_data: ProductSchemaCreate, db: AsyncSession):
-        product_up = await ProductService.get_product_by_id(product_id, db)
-        
-        category = await db.get(CategoryModel, product_data.category_id)
-        if not category:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found.")
-        
-        supplier = await db.get(SupplierModel, product_data.supplier_id)
-        if not supplier:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
-        
-        product_dict = product_data.model_dump(exclude_unset=True)
-        product_up.sqlmodel_update(product_dict)
-
-        db.add(product_up)
-        await db.commit()
-        await db.refresh(product_up)
-        return product_up
+    async def get_product_for_update(product_id: int, db: AsyncSession):
+        # Fresh, locked read: ledger and summary deltas must be computed from
+        # the row actually stored, not from a copy cached in the session.
+        product = await db.get(ProductModel, product_id, populate_existing=True, with_for_update=True)
+
+        if not product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found.")
+        return product
+
+    @staticmethod
+    async def get_all_products(db: AsyncSession, limit: int, after: Optional[str] = None, sort: str = "id", filters: Optional[ProductFilter] = None):
+        order = sort_order(sort, SORTABLE_COLUMNS)
+        query = _apply_filters(core_select(*PRODUCT_COLUMNS), filters, order[0])
+        return await paginate(db, query, ProductModel.id, limit, after, order)
+
+    @staticmethod
+    async def search_products(q: str, db: AsyncSession, limit: int):
+        # Three bounded stages, each an index lookup that stops at `limit`:
+        # names starting with q, names containing q, then names within a
+        # typo or two of q. Later stages only run to fill what is left.
+        q = " ".join(q.split())
+        limit = max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+        if len(q) < 3:
+            return []
+
+        postgres = db.bind.dialect.name == "postgresql"
+        stages = (_prefix_query, _substring_query, _fuzzy_postgres_query if postgres else _fuzzy_sqlite_query)
+
+        results: Dict[int, Dict] = {}
+        for stage in stages:
+            rows = (await db.execute(stage(q, limit, postgres))).mappings()
+            if stage is _fuzzy_sqlite_query:
+                rows = _rank_fuzzy(q, rows)
+            for row in rows:
+                if len(results) == limit:
+                    break
+                results.setdefault(row["id"], dict(row))
+            if len(results) == limit:
+                break
+        return list(results.values())
+
+    @staticmethod
+    def export_query(category_id: Optional[int] = None, supplier_id: Optional[int] = None):
+        table = ProductModel.__table__
+        query = core_select(*(table.c[name] for name in EXPORT_COLUMNS)).order_by(table.c.id)
+
+        if category_id is not None:
+            query = query.where(table.c.category_id == category_id)
+        if supplier_id is not None:
+            query = query.where(table.c.supplier_id == supplier_id)
+        return query
+
+    @staticmethod
+    def format_export(rows, fmt: str, header: bool = False) -> str:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if header:
+                writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(rows)
+            return buffer.getvalue()
+        return "".join(json.dumps(row._asdict(), ensure_ascii=False) + "\n" for row in rows)
+
+    @staticmethod
+    async def export_products(db: AsyncSession, fmt: str = "ndjson", category_id: Optional[int] = None, supplier_id: Optional[int] = None) -> AsyncIterator[str]:
+        query = ProductService.export_query(category_id, supplier_id)
+
+        # Server-side cursor: rows are fetched and written out one chunk at a
+        # time, so memory stays flat regardless of the catalog size.
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+
+        if fmt == "csv":
+            yield ProductService.format_export([], fmt, header=True)
+        async for rows in result.partitions():
+            yield ProductService.format_export(rows, fmt)
+
+    @staticmethod
+    async def update_product(product_id: int, product_data: ProductSchemaCreate, db: AsyncSession, version: Optional[int] = None):
+        table = ProductModel.__table__
+        product_dict = product_data.model_dump(exclude_unset=True, exclude={"version"})
+
+        # Optimistic: the row is read without a lock and written back only if
+        # its version is still the one read, so the ledger and summary deltas
+        # below are exact. A stale client version is refused; an update sent
+        # without one is re-read and re-applied instead.
+        for _ in range(settings.UPDATE_MAX_ATTEMPTS):
+            current = await ProductService.get_product_row(product_id, db)
+            if version is not None and current["version"] != version:
+                break
+            # The read transaction ends here: on SQLite two writers holding
+            # read locks on the same database could not both upgrade them.
+            await db.commit()
+
+            try:
+                row = await VersionService.update_row(db, table, product_id, product_dict, current["version"], PRODUCT_COLUMNS)
+            except IntegrityError as error:
+                raise await _missing_reference(db, [product_data], error)
+            if row is None:
+                await db.rollback()
+                continue
+
+            before = (current["price"], current["qtd"], current["category_id"], current["supplier_id"])
+            after = (row["price"], row["qtd"], row["category_id"], row["supplier_id"])
+            await StockService.record_movements(db, [(product_id, after[1] - before[1])], "update")
+            await InventoryService.apply_changes(db, [(before, after)])
+            await StockService.evaluate_alerts(db, [(product_id, (current["qtd"], current["reorder_point"]), (row["qtd"], row["reorder_point"]))])
+            await VersionService.bump(db, "products")
+            await db.commit()
+            await _invalidate([product_id], [current["category_id"], row["category_id"]])
+            return ProductSchemaResponse(**row)
+
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Product was changed by another request; read it again and retry.")
     
     @staticmethod
     async def delete_product(product_id: int, db: AsyncSession):
-        product_del = await ProductService.get_product_by_id(product_id, db)
+        product_del = await ProductService.get_product_for_update(product_id, db)
 
+        await StockService.record_movements(db, [(product_id, -product_del.qtd)], "delete")
+        await InventoryService.apply_changes(db, [(figures_of(product_del), None)])
+        await StockService.evaluate_alerts(db, [(product_id, (product_del.qtd, product_del.reorder_point), None)])
+        await VersionService.bump(db, "products")
+        category_id = product_del.category_id
         await db.delete(product_del)
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+        await _invalidate([product_id], [category_id])
\ No newline at end of file
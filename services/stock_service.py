@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import HTTPException, status
+from models.product_model import ProductModel
+from models.stock_movement_model import StockMovementModel
+from models.stock_snapshot_model import StockSnapshotModel
+from models.stock_alert_model import StockAlertModel
+from schemas.stock_schema import StockAdjustment, StockLevel, StockBalance, StockSnapshotRun
+from core.configs import settings
+from core.cache import response_cache
+from core.database import Session
+from core.pagination import paginate
+from services.alert_service import alerts_committed
+from services.inventory_service import InventoryService
+from services.version_service import VersionService
+
+logger = logging.getLogger(__name__)
+
+# A product's stock position as the alert engine sees it: (qtd, reorder_point).
+StockPosition = Tuple[int, int]
+
+def is_low(position: Optional[StockPosition]) -> bool:
+    return position is not None and position[0] < position[1]
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def as_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+class StockService:
+    @staticmethod
+    async def record_movements(db: AsyncSession, movements: Iterable[Tuple[int, int]], reason: str):
+        # Append-only: the ledger is never updated or deleted, only inserted
+        # into, in the same transaction as the qtd change it describes.
+        created_at = utcnow()
+        rows = [
+            {"product_id": product_id, "delta": delta, "reason": reason, "created_at": created_at}
+            for product_id, delta in movements if delta
+        ]
+        if rows:
+            await db.execute(insert(StockMovementModel.__table__), rows)
+
+    @staticmethod
+    async def evaluate_alerts(db: AsyncSession, changes: Iterable[Tuple[int, Optional[StockPosition], Optional[StockPosition]]]):
+        # Each change is (product_id, before, after), None meaning the product
+        # did not exist on that side. Only threshold crossings are recorded,
+        # in the caller's transaction, so the cost follows the write and not
+        # the catalog.
+        created_at = utcnow()
+        rows = []
+        for product_id, before, after in changes:
+            if is_low(after) == is_low(before):
+                continue
+            qtd, reorder_point = after if after is not None else before
+            kind = "low" if is_low(after) else "cleared"
+            rows.append({"product_id": product_id, "kind": kind, "qtd": qtd, "reorder_point": reorder_point, "created_at": created_at})
+
+        if rows:
+            # The alert stream follows the log by id, so ids must commit in
+            # order: on Postgres a lower id taken by a slower transaction
+            # would land behind readers already past it. The counter row
+            # lock, taken before the ids are, serializes alert writers until
+            # commit. Taken ahead of the products counter, as every writer
+            # does, so the two never deadlock.
+            await VersionService.bump(db, "stock_alerts")
+            await db.execute(insert(StockAlertModel.__table__), rows)
+            event.listen(db.sync_session, "after_commit", alerts_committed, once=True)
+
+    @staticmethod
+    async def adjust_stock(adjustments: List[StockAdjustment], db: AsyncSession):
+        deltas: Dict[int, int] = defaultdict(int)
+        for adjustment in adjustments:
+            deltas[adjustment.product_id] += adjustment.delta
+
+        table = ProductModel.__table__
+        levels: List[StockLevel] = []
+        changes = []
+        positions = []
+
+        # Each row is changed in place (qtd = qtd + delta) so concurrent batches
+        # never lose updates, and rows are always locked in ascending id order
+        # so two batches touching the same products cannot deadlock.
+        for product_id in sorted(deltas):
+            delta = deltas[product_id]
+            query = (
+                update(table)
+                .where(table.c.id == product_id, table.c.qtd + delta >= 0)
+                .values(qtd=table.c.qtd + delta, version=table.c.version + 1)
+                .returning(table.c.price, table.c.qtd, table.c.category_id, table.c.supplier_id, table.c.reorder_point)
+            )
+            row = (await db.execute(query)).first()
+
+            if row is None:
+                await db.rollback()
+                if not await db.get(ProductModel, product_id):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found.")
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Insufficient stock for product {product_id}.")
+
+            price, qtd, category_id, supplier_id, reorder_point = row
+            levels.append(StockLevel(product_id=product_id, qtd=qtd))
+            changes.append(((price, qtd - delta, category_id, supplier_id), (price, qtd, category_id, supplier_id)))
+            positions.append((product_id, (qtd - delta, reorder_point), (qtd, reorder_point)))
+
+        by_reason: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for adjustment in adjustments:
+            by_reason[adjustment.reason].append((adjustment.product_id, adjustment.delta))
+        for reason, movements in by_reason.items():
+            await StockService.record_movements(db, movements, reason)
+        await InventoryService.apply_changes(db, changes)
+        await StockService.evaluate_alerts(db, positions)
+        if changes:
+            await VersionService.bump(db, "products")
+
+        await db.commit()
+        await response_cache.invalidate("products", *(level.product_id for level in levels))
+        return levels
+
+    @staticmethod
+    async def get_movements(product_id: int, db: AsyncSession, limit: int, after: Optional[str] = None):
+        query = select(StockMovementModel).where(StockMovementModel.product_id == product_id)
+        return await paginate(db, query, StockMovementModel.id, limit, after)
+
+    @staticmethod
+    async def get_balance_at(product_id: int, at: datetime, db: AsyncSession):
+        at = as_utc(at)
+        snapshot = StockSnapshotModel.__table__
+        movement = StockMovementModel.__table__
+
+        # Latest snapshot at or before `at`, then only the movements recorded
+        # between that snapshot and `at`: both are index range scans on
+        # (product_id, timestamp), so the cost does not grow with history.
+        query = (
+            select(snapshot.c.taken_at, snapshot.c.qtd)
+            .where(snapshot.c.product_id == product_id, snapshot.c.taken_at <= at)
+            .order_by(snapshot.c.taken_at.desc())
+            .limit(1)
+        )
+        base = (await db.execute(query)).first()
+
+        query = select(func.coalesce(func.sum(movement.c.delta), 0)).where(
+            movement.c.product_id == product_id, movement.c.created_at <= at
+        )
+        if base is not None:
+            query = query.where(movement.c.created_at > base.taken_at)
+        delta = (await db.execute(query)).scalar_one()
+
+        return StockBalance(product_id=product_id, at=at, qtd=(base.qtd if base else 0) + delta)
+
+    @staticmethod
+    async def take_snapshot(db: AsyncSession, until: Optional[datetime] = None):
+        # Snapshots are built from the ledger itself: each run folds the
+        # movements of the window (previous run, until] into the last
+        # snapshot of every product that moved. `until` lags behind now so
+        # transactions still in flight have committed their movements.
+        until = as_utc(until) if until else utcnow() - timedelta(seconds=settings.STOCK_SNAPSHOT_SETTLE_SECONDS)
+        snapshot = StockSnapshotModel.__table__
+        movement = StockMovementModel.__table__
+
+        # Runs overlap (every serve.py worker has a loop, and POST
+        # /stock/snapshots can come at any time), so the first statement
+        # takes a row lock on the run's version counter: a second run waits
+        # for the first to commit and then reads the `since` it left.
+        await VersionService.bump(db, "stock_snapshots")
+        since = (await db.execute(select(func.max(snapshot.c.taken_at)))).scalar()
+        if since is not None and until <= since:
+            await db.rollback()
+            return StockSnapshotRun(taken_at=since, products=0)
+
+        query = select(movement.c.product_id, func.sum(movement.c.delta)).where(movement.c.created_at <= until)
+        if since is not None:
+            query = query.where(movement.c.created_at > since)
+        deltas: Dict[int, int] = dict((await db.execute(query.group_by(movement.c.product_id))).all())
+
+        if not deltas:
+            await db.rollback()
+            return StockSnapshotRun(taken_at=until, products=0)
+
+        product_ids = sorted(deltas)
+        for start in range(0, len(product_ids), settings.BULK_CHUNK_SIZE):
+            chunk = product_ids[start:start + settings.BULK_CHUNK_SIZE]
+            base: Dict[int, int] = {}
+            if since is not None:
+                # The base must predate the deltas: a snapshot after `since`
+                # already counts some of the movements being added.
+                latest = (
+                    select(snapshot.c.product_id, func.max(snapshot.c.taken_at).label("taken_at"))
+                    .where(snapshot.c.product_id.in_(chunk), snapshot.c.taken_at <= since)
+                    .group_by(snapshot.c.product_id)
+                    .subquery()
+                )
+                query = select(snapshot.c.product_id, snapshot.c.qtd).join(
+                    latest, and_(snapshot.c.product_id == latest.c.product_id, snapshot.c.taken_at == latest.c.taken_at)
+                )
+                base = dict((await db.execute(query)).all())
+
+            rows = [
+                {"product_id": product_id, "qtd": base.get(product_id, 0) + deltas[product_id], "taken_at": until}
+                for product_id in chunk
+            ]
+            await db.execute(insert(snapshot), rows)
+
+        await db.commit()
+        return StockSnapshotRun(taken_at=until, products=len(product_ids))
+
+    @staticmethod
+    async def run_snapshot_loop():
+        interval = settings.STOCK_SNAPSHOT_INTERVAL_MINUTES * 60
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with Session() as session:
+                    await StockService.take_snapshot(session)
+            except Exception:
+                logger.exception("Stock snapshot run failed")
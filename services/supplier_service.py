@@ -1,19 +1,31 @@
+from typing import Optional
+
 from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from models.product_model import ProductModel
 from models.supplier_model import SupplierModel
-from schemas.supplier_schema import SupplierSchemaBase
+from schemas.supplier_schema import SupplierSchemaBase, SupplierSchemaResponse
+from core.cache import response_cache
+from core.pagination import paginate
+from core.serialization import columns_for
+from services.version_service import VersionService
+
+SUPPLIER_COLUMNS = columns_for(SupplierSchemaResponse, SupplierModel.__table__)
 
 
 class SupplierService:
     @staticmethod
     async def create_supplier(supplier_data: SupplierSchemaBase, db: AsyncSession):
-        new_supplier = SupplierModel(**supplier_data.model_dump())
-        db.add(new_supplier)
+        query = insert(SupplierModel.__table__).values(**supplier_data.model_dump()).returning(*SUPPLIER_COLUMNS)
+        row = (await db.execute(query)).mappings().one()
+        await VersionService.bump(db, "suppliers")
         await db.commit()
-        await db.refresh(new_supplier)
+        await response_cache.invalidate("suppliers")
 
-        return new_supplier
+        return SupplierSchemaResponse(**row)
     
     @staticmethod
     async def get_supplier_by_id(supplier_id: int, db: AsyncSession):
@@ -22,28 +34,54 @@ class SupplierService:
         if not supplier:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
         return supplier
+
+    @staticmethod
+    async def get_supplier_row(supplier_id: int, db: AsyncSession):
+        query = select(*SUPPLIER_COLUMNS).where(SupplierModel.id == supplier_id)
+        row = (await db.execute(query)).mappings().first()
+
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Supplier not found.")
+        return dict(row)
     
     @staticmethod
-    async def get_all_suppliers(db: AsyncSession):
-        query = select(SupplierModel)
-        result = await db.execute(query)
-        return result.scalars().all()
+    async def get_all_suppliers(db: AsyncSession, limit: int, after: Optional[str] = None):
+        query = select(*SUPPLIER_COLUMNS)
+        return await paginate(db, query, SupplierModel.id, limit, after)
     
     @staticmethod
-    async def update_supplier(supplier_id: int, supplier_data: SupplierModel, db: AsyncSession):
-        supplier_up = await SupplierService.get_supplier_by_id(supplier_id, db)
-
-        supplier_dict = supplier_data.model_dump(exclude_unset=True)
-        supplier_up.sqlmodel_update(supplier_dict)
+    async def update_supplier(supplier_id: int, supplier_data: SupplierSchemaBase, db: AsyncSession, version: Optional[int] = None):
+        table = SupplierModel.__table__
+        supplier_dict = supplier_data.model_dump(exclude_unset=True, exclude={"version"})
+        row = await VersionService.update_row(db, table, supplier_id, supplier_dict, version, SUPPLIER_COLUMNS)
+        if row is None:
+            raise await VersionService.conflict_error(db, table, supplier_id, "Supplier")
 
+        await VersionService.bump(db, "suppliers")
         await db.commit()
-        await db.refresh(supplier_up)
+        await response_cache.invalidate("suppliers", supplier_id)
 
-        return supplier_up
+        return SupplierSchemaResponse(**row)
     
     @staticmethod
     async def delete_supplier(supplier_id: int, db: AsyncSession):
         supplier_del = await SupplierService.get_supplier_by_id(supplier_id, db)
 
+        # As for categories: a supplier its products still name is refused.
+        in_use = select(ProductModel.id).where(ProductModel.supplier_id == supplier_id).limit(1)
+        if (await db.execute(in_use)).first() is not None:
+            raise _in_use_error()
         await db.delete(supplier_del)
-        await db.commit()
\ No newline at end of file
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            raise _in_use_error()
+
+        await VersionService.bump(db, "suppliers")
+        await db.commit()
+        await response_cache.invalidate("suppliers", supplier_id)
+
+
+def _in_use_error() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Supplier still has products.")
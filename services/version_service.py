@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import Table, event, select, update
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.table_version_model import TableVersionModel
+from core.database import dialect_insert
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" and "x" are the same tag.
+    candidates = {_opaque_tag(tag) for tag in header.split(",")}
+    return "*" in candidates or _opaque_tag(etag) in candidates
+
+# Versions that transactions committed by this process moved each table
+# to. Their writers already invalidated this process's caches, so
+# services.cache_sync_service does not drop anything for them.
+local_versions: Dict[str, Set[int]] = defaultdict(set)
+
+@event.listens_for(Session, "after_commit")
+def _record_local_versions(session):
+    for name, version in session.info.pop("bumped_versions", []):
+        local_versions[name].add(version)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_local_versions(session):
+    session.info.pop("bumped_versions", None)
+
+class VersionService:
+    @staticmethod
+    async def bump(db: AsyncSession, *names: str) -> Dict[str, int]:
+        # One counter row per table, bumped in the writer's transaction, so a
+        # reader can tell whether anything changed without running its query.
+        # Returns the new versions, which count as local once committed.
+        table = TableVersionModel.__table__
+        now = _utcnow()
+        query = dialect_insert(db)(table).values([{"name": name, "version": 1, "updated_at": now} for name in sorted(set(names))])
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"version": table.c.version + 1, "updated_at": query.excluded.updated_at},
+        ).returning(table.c.name, table.c.version)
+        versions = dict((await db.execute(query)).all())
+        db.info.setdefault("bumped_versions", []).extend(versions.items())
+        return versions
+
+    @staticmethod
+    def expected_version(if_match: Optional[str], version: Optional[int]) -> Optional[int]:
+        # The row version a write is conditional on, from If-Match ("3" or
+        # W/"3") or the body. A write must name one: without it, two clients
+        # editing the same row silently overwrite each other. If-Match: *
+        # is the explicit way to overwrite whatever is stored (None).
+        if if_match is None:
+            if version is None:
+                raise HTTPException(status_code=status.HTTP_428_PRECONDITION_REQUIRED, detail='Send the version last read, as If-Match: "3" or "version": 3 in the body.')
+            return version
+        if if_match.strip() == "*":
+            return version
+        try:
+            tagged = int(_opaque_tag(if_match).strip('"'))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='If-Match must be the version last read, e.g. "3".')
+        if version is not None and version != tagged:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match and the body name different versions.")
+        return tagged
+
+    @staticmethod
+    async def update_row(db: AsyncSession, table: Table, row_id: int, values: Dict[str, Any], version: Optional[int], columns: List[Any]):
+        # UPDATE ... WHERE id = :id AND version = :v. A stale write matches no
+        # row and returns None; nothing was locked to read the row first, and
+        # the UPDATE's own row lock only lasts until the caller commits.
+        query = update(table).where(table.c.id == row_id)
+        if version is not None:
+            query = query.where(table.c.version == version)
+        query = query.values(**values, version=table.c.version + 1).returning(*columns)
+        return (await db.execute(query)).mappings().first()
+
+    @staticmethod
+    async def conflict_error(db: AsyncSession, table: Table, row_id: int, label: str) -> HTTPException:
+        await db.rollback()
+        if (await db.execute(select(table.c.id).where(table.c.id == row_id))).first() is None:
+            return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{label} not found.")
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{label} was changed by another request; read it again and retry.")
+
+    @staticmethod
+    async def get_version(db: AsyncSession, name: str) -> Tuple[int, Optional[datetime]]:
+        table = TableVersionModel.__table__
+        row = (await db.execute(select(table.c.version, table.c.updated_at).where(table.c.name == name))).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    @staticmethod
+    def not_modified(request: Request, response: Response, name: str, current: Tuple[int, Optional[datetime]]) -> Optional[Response]:
+        # `current` is get_version's result; the caller keeps the version to
+        # key its cached body by, so the body always matches the ETag.
+        version, updated_at = current
+        headers = {"ETag": f'W/"{name}-{version}"', "Cache-Control": "no-cache"}
+        if updated_at is not None:
+            headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+
+        if if_none_match is not None:
+            fresh = _etag_matches(if_none_match, headers["ETag"])
+        elif if_modified_since is not None and updated_at is not None:
+            try:
+                fresh = updated_at.replace(microsecond=0, tzinfo=timezone.utc) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                fresh = False
+        else:
+            fresh = False
+
+        if fresh:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return None
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from core import database
+from core.auth import create_token_access
+from core.configs import settings
+from core.deps import _decode_subject
+from core.security import generate_hash_async
+from core.serialization import dumps
+from schemas.inventory_schema import InventorySummary
+from services.inventory_service import InventoryService
+from services.product_service import ProductService
+
+logger = logging.getLogger(__name__)
+
+_state: Dict[str, Optional[float]] = {"ready": False, "seconds": None}
+
+def is_ready() -> bool:
+    return bool(_state["ready"])
+
+def set_ready(ready: bool, seconds: Optional[float] = None):
+    _state["ready"] = ready
+    _state["seconds"] = seconds
+
+class WarmupService:
+    @staticmethod
+    async def open_connections(engine: AsyncEngine, count: int) -> int:
+        # All connections are checked out at once, so each one is a distinct
+        # new connection, and then returned together to sit idle in the pool.
+        async def checkout():
+            conn = await engine.connect().start()
+            try:
+                await conn.execute(text("SELECT 1"))
+            except Exception:
+                await conn.close()
+                raise
+            return conn
+
+        results = await asyncio.gather(*(checkout() for _ in range(count)), return_exceptions=True)
+        for result in results:
+            if not isinstance(result, BaseException):
+                await result.close()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return count
+
+    @staticmethod
+    async def warm_up(engine: Optional[AsyncEngine] = None, session_factory=None):
+        engine = engine or database.engine
+        session_factory = session_factory or database.Session
+        started = time.perf_counter()
+
+        engines = [engine]
+        if engine is database.engine and database.replica_engine is not None:
+            engines.append(database.replica_engine)
+        for target in engines:
+            size = database.pool_status(target)["size"]
+            await WarmupService.open_connections(target, min(settings.WARMUP_CONNECTIONS or size, size))
+
+        # One-time costs on the auth path: the bcrypt backend and its worker
+        # thread, and the JWT encode/decode machinery.
+        await generate_hash_async("warmup")
+        _decode_subject(create_token_access("0"), HTTPException(status_code=status.HTTP_401_UNAUTHORIZED))
+
+        # Sync dependencies run through anyio's thread pool, whose backend
+        # module is imported on first use: tens of milliseconds otherwise
+        # paid by the first real request.
+        await run_in_threadpool(lambda: None)
+
+        # Compile and serialize the hottest reads once, so their statements
+        # are in SQLAlchemy's cache before the first real request.
+        async with session_factory() as db:
+            dumps(await ProductService.get_all_products(db, 1))
+            TypeAdapter(InventorySummary).dump_json(await InventoryService.get_summary(db))
+
+        set_ready(True, time.perf_counter() - started)
+
+    @staticmethod
+    async def run():
+        if not settings.WARMUP_ENABLED:
+            set_ready(True)
+            return
+
+        while True:
+            try:
+                await WarmupService.warm_up()
+                logger.info("Warmup finished in %.2fs", _state["seconds"])
+                return
+            except Exception:
+                logger.exception("Warmup failed, retrying in %.0fs", settings.WARMUP_RETRY_SECONDS)
+                await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
+
+async def ready_endpoint(request: Request):
+    if not is_ready():
+        return JSONResponse({"status": "warming_up"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+    return JSONResponse({"status": "ready", "warmup_seconds": _state["seconds"]})
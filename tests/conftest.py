@@ -1,3 +1,4 @@
+import os
 import pytest
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -6,9 +7,24 @@ from sqlmodel import SQLModel
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+os.environ.setdefault("DB_URL", DATABASE_URL)
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
+import models.__all_models
+from core.cache import response_cache
+from core.database import enforce_foreign_keys
+from core.deps import clear_auth_cache
+
+@pytest.fixture(autouse=True)
+async def reset_caches():
+    clear_auth_cache()
+    await response_cache.clear()
+    yield
+
 @pytest.fixture(name="db")
 async def db_fixture():
     engine = create_async_engine(DATABASE_URL, echo=False)
+    enforce_foreign_keys(engine)
 
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
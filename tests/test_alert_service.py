@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.configs import settings
+from models.category_model import CategoryModel
+from models.stock_alert_model import StockAlertModel
+from models.supplier_model import SupplierModel
+from schemas.product_schema import ProductSchemaCreate
+from schemas.stock_schema import StockAdjustment
+from services.alert_service import AlertService
+from services.product_service import ProductService
+from services.stock_service import StockService
+from services.version_service import VersionService
+
+async def _seed(db, *positions):
+    cat = CategoryModel(name="Bebidas")
+    sup = SupplierModel(name="Distribuidora", cnpj="999", address="Rua B")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    report = await ProductService.create_products_bulk([
+        ProductSchemaCreate(name=f"Item {i}", price=1.0, qtd=qtd, reorder_point=reorder_point, category_id=cat.id, supplier_id=sup.id)
+        for i, (qtd, reorder_point) in enumerate(positions)
+    ], db)
+    return [result.id for result in report.results]
+
+async def _alerts(db):
+    rows = (await db.execute(select(StockAlertModel).order_by(StockAlertModel.id))).scalars().all()
+    return [(a.product_id, a.kind, a.qtd) for a in rows]
+
+@pytest.mark.asyncio
+async def test_alerts_fire_on_threshold_crossings_only(db):
+    first, second, third = await _seed(db, (10, 5), (3, 5), (8, 0))
+    assert await _alerts(db) == [(second, "low", 3)]
+
+    await StockService.adjust_stock([StockAdjustment(product_id=first, delta=-4)], db)
+    await StockService.adjust_stock([StockAdjustment(product_id=first, delta=-2), StockAdjustment(product_id=third, delta=-8)], db)
+    await StockService.adjust_stock([StockAdjustment(product_id=first, delta=-1)], db)
+    assert await _alerts(db) == [(second, "low", 3), (first, "low", 4)]
+
+    product = await ProductService.get_product_by_id(second, db)
+    data = ProductSchemaCreate(name=product.name, price=1.0, qtd=3, reorder_point=2, category_id=product.category_id, supplier_id=product.supplier_id)
+    await ProductService.update_product(second, data, db)
+    await ProductService.delete_product(first, db)
+
+    assert (await _alerts(db))[2:] == [(second, "cleared", 3), (first, "cleared", 3)]
+    # Only writes that logged alerts took the alert log lock.
+    assert (await VersionService.get_version(db, "stock_alerts"))[0] == 4
+
+@pytest.mark.asyncio
+async def test_low_stock_set_reads_the_partial_index(db):
+    ids = await _seed(db, (1, 5), (9, 5), (0, 1), (4, 0))
+
+    page = await AlertService.get_low_stock(db, 10)
+    assert [p["id"] for p in page.items] == [ids[0], ids[2]]
+
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT id FROM products WHERE products.qtd < products.reorder_point ORDER BY id"
+    )).all()
+    assert "ix_products_low_stock" in plan[0][-1]
+
+@pytest.mark.asyncio
+async def test_stream_wakes_on_commit_and_resumes(db, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_POLL_SECONDS", 30)
+    (product_id,) = await _seed(db, (10, 5))
+    session_factory = sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+
+    stream = AlertService.stream_alerts(session_factory)
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.05)
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=-6)], db)
+
+    frame = await asyncio.wait_for(pending, timeout=1)
+    await stream.aclose()
+    assert frame.startswith("id: 1\nevent: low\n")
+
+    replay = AlertService.stream_alerts(session_factory, last_id=0)
+    assert (await replay.__anext__()) == frame
+    await replay.aclose()
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from core.auth import create_token_access
+from core.cache import TTLCache
+from core.deps import get_current_user, invalidate_user
+from models.user_model import UserModel
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_get_current_user_is_cached_until_invalidated(db):
+    user = UserModel(name="Ana", email="ana@stockflow.com", is_admin=False, password="hash")
+    db.add(user)
+    await db.commit()
+    user_id = user.id
+    token = create_token_access(user_id)
+
+    first = await get_current_user(db, token)
+    await db.execute(delete(UserModel).where(UserModel.id == user_id))
+    await db.commit()
+
+    cached = await get_current_user(db, token)
+    assert cached.id == first.id == user_id
+
+    invalidate_user(user_id)
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(db, token)
+    assert exc.value.status_code == 401
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.cache import response_cache
+from core.deps import _user_cache
+from models.table_version_model import TableVersionModel
+from services.cache_sync_service import CacheSync
+from services.version_service import VersionService
+
+async def _load():
+    return {"id": 1}
+
+async def _read(resource):
+    await response_cache.item(resource, 1, _load)
+    await response_cache.listing(resource, {"limit": 10}, _load)
+
+async def _bump_elsewhere(db, name):
+    # A write in another process: only its version bump is visible here.
+    table = TableVersionModel.__table__
+    await db.execute(update(table).where(table.c.name == name).values(version=table.c.version + 1))
+    await db.commit()
+
+@pytest.mark.asyncio
+async def test_poll_drops_resources_changed_by_other_processes(db):
+    sync = CacheSync(sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False))
+    await VersionService.bump(db, "products", "suppliers")
+    await db.commit()
+    assert await sync.poll() == []
+
+    for resource in ("products", "categories", "suppliers"):
+        await _read(resource)
+
+    await _bump_elsewhere(db, "products")
+    assert await sync.poll() == ["products"]
+    assert await sync.poll() == []
+
+    for resource in ("products", "categories", "suppliers"):
+        await _read(resource)
+    assert response_cache.stats() == {
+        "categories": {"hits": 0, "misses": 4},
+        "products": {"hits": 0, "misses": 4},
+        "suppliers": {"hits": 2, "misses": 2},
+    }
+
+@pytest.mark.asyncio
+async def test_poll_clears_cached_users_after_a_user_write(db):
+    sync = CacheSync(sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False))
+    await VersionService.bump(db, "users")
+    await db.commit()
+    await sync.poll()
+    _user_cache.set("1", object())
+
+    await _bump_elsewhere(db, "users")
+    assert await sync.poll() == ["users"]
+    assert _user_cache.get("1") is None
+
+@pytest.mark.asyncio
+async def test_poll_skips_versions_this_process_committed(db):
+    sync = CacheSync(sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False))
+    await VersionService.bump(db, "products")
+    await db.commit()
+    await sync.poll()
+    await _read("products")
+
+    assert await VersionService.bump(db, "products") == {"products": 2}
+    await db.commit()
+    await VersionService.bump(db, "products")
+    await db.rollback()
+    assert await sync.poll() == []
+    await _read("products")
+    assert response_cache.stats()["products"] == {"hits": 2, "misses": 2}
+
+    # Moves that mix a local and a foreign version are still dropped.
+    await VersionService.bump(db, "products")
+    await db.commit()
+    await _bump_elsewhere(db, "products")
+    assert await sync.poll() == ["products"]
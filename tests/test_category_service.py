@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+from services.category_service import CategoryService
+from services.product_service import ProductService
+from schemas.product_schema import ProductSchemaCreate
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+
+async def _seed_category(db, prices):
+    cat = CategoryModel(name="Hortifruti")
+    sup = SupplierModel(name="Ceasa", cnpj="555", address="Rua J")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    await ProductService.create_products_bulk([
+        ProductSchemaCreate(name=f"Item {i}", price=price, qtd=1, category_id=cat.id, supplier_id=sup.id)
+        for i, price in enumerate(prices)
+    ], db)
+    return cat
+
+@pytest.mark.asyncio
+async def test_get_category_detail_counts_products(db):
+    cat = await _seed_category(db, [1.0, 2.0, 3.0])
+
+    detail = await CategoryService.get_category_detail(cat.id, db)
+
+    assert detail.name == "Hortifruti"
+    assert detail.product_count == 3
+
+@pytest.mark.asyncio
+async def test_get_category_detail_not_found(db):
+    with pytest.raises(HTTPException) as exc:
+        await CategoryService.get_category_detail(999, db)
+
+    assert exc.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_category_products_sorted_pages(db):
+    cat = await _seed_category(db, [5.0, 1.0, 5.0, 3.0, 2.0])
+
+    prices, cursor = [], None
+    while True:
+        page = await CategoryService.get_category_products(cat.id, db, limit=2, after=cursor, sort="-price")
+        prices += [p["price"] for p in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert prices == [5.0, 5.0, 3.0, 2.0, 1.0]
+
+@pytest.mark.asyncio
+async def test_get_category_products_rejects_unknown_sort(db):
+    cat = await _seed_category(db, [1.0])
+
+    with pytest.raises(HTTPException) as exc:
+        await CategoryService.get_category_products(cat.id, db, limit=10, sort="password")
+
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_category_products_sorted_by_name(db):
+    cat = await _seed_category(db, [1.0, 2.0, 3.0])
+
+    first = await CategoryService.get_category_products(cat.id, db, limit=2, sort="-name")
+    rest = await CategoryService.get_category_products(cat.id, db, limit=2, after=first.next_cursor, sort="-name")
+
+    assert [p["name"] for p in first.items + rest.items] == ["Item 2", "Item 1", "Item 0"]
+
+@pytest.mark.asyncio
+async def test_delete_category_refuses_one_with_products(db):
+    cat = await _seed_category(db, [1.0])
+
+    with pytest.raises(HTTPException) as exc:
+        await CategoryService.delete_category(cat.id, db)
+    assert exc.value.status_code == 409
+    assert (await CategoryService.get_category_detail(cat.id, db)).product_count == 1
+
+    empty = CategoryModel(name="Vazia")
+    db.add(empty)
+    await db.commit()
+    await CategoryService.delete_category(empty.id, db)
+    with pytest.raises(HTTPException) as exc:
+        await CategoryService.get_category_by_id(empty.id, db)
+    assert exc.value.status_code == 404
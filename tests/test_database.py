@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from core.configs import settings
+from core.database import InstrumentedPool, engine_options, pool_status
+
+def test_engine_options_per_dialect():
+    memory = engine_options("sqlite+aiosqlite:///:memory:")
+    assert memory["poolclass"] is StaticPool
+
+    sqlite_file = engine_options("sqlite+aiosqlite:///stockflow.db")
+    assert sqlite_file["poolclass"] is InstrumentedPool
+    assert sqlite_file["pool_size"] == settings.DB_POOL_SIZE
+    assert "connect_args" not in sqlite_file
+
+    postgres = engine_options("postgresql+asyncpg://user:pw@localhost/stockflow")
+    assert postgres["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert postgres["connect_args"] == {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+@pytest.mark.asyncio
+async def test_pool_status_reports_checkouts_and_waiters(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    options = {**engine_options(url), "pool_size": 1, "max_overflow": 0}
+    engine = create_async_engine(url, **options)
+
+    try:
+        async with engine.connect() as first:
+            await first.execute(text("SELECT 1"))
+            assert pool_status(engine)["checked_out"] == 1
+
+            async def second():
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+
+            waiter = asyncio.create_task(second())
+            await asyncio.sleep(0.05)
+            assert pool_status(engine)["waiting"] == 1
+
+        await waiter
+        status = pool_status(engine)
+        assert status["checked_out"] == 0
+        assert status["waiting"] == 0
+    finally:
+        await engine.dispose()
@@ -0,0 +1,59 @@
+import pytest
+from services.inventory_service import InventoryService
+from services.product_service import ProductService
+from services.stock_service import StockService
+from schemas.product_schema import ProductSchemaCreate
+from schemas.stock_schema import StockAdjustment
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+
+async def _seed_references(db):
+    cats = [CategoryModel(name="Bebidas"), CategoryModel(name="Snacks")]
+    sups = [SupplierModel(name="Ambev", cnpj="10", address="Rua A"), SupplierModel(name="Elma", cnpj="20", address="Rua B")]
+    db.add_all(cats + sups)
+    await db.commit()
+    return cats, sups
+
+def _figures(summary):
+    return (
+        summary.total.model_dump(),
+        [g.model_dump() for g in summary.by_category],
+        [g.model_dump() for g in summary.by_supplier],
+    )
+
+@pytest.mark.asyncio
+async def test_summary_tracks_product_writes(db):
+    (drinks, snacks), (ambev, elma) = await _seed_references(db)
+
+    soda = await ProductService.create_product(ProductSchemaCreate(name="Soda", price=5.0, qtd=10, category_id=drinks.id, supplier_id=ambev.id), db)
+    await ProductService.create_product(ProductSchemaCreate(name="Chips", price=8.0, qtd=3, category_id=snacks.id, supplier_id=elma.id), db)
+
+    summary = await InventoryService.get_summary(db)
+    assert summary.total.skus == 2
+    assert summary.total.units == 13
+    assert summary.total.value == 74.0
+    assert [(g.name, g.units) for g in summary.by_category] == [("Bebidas", 10), ("Snacks", 3)]
+
+    await ProductService.update_product(soda.id, ProductSchemaCreate(name="Soda", price=6.0, qtd=10, category_id=snacks.id, supplier_id=ambev.id), db)
+    summary = await InventoryService.get_summary(db)
+    assert summary.total.value == 84.0
+    assert [(g.name, g.skus, g.value) for g in summary.by_category] == [("Snacks", 2, 84.0)]
+
+@pytest.mark.asyncio
+async def test_summary_matches_rebuild_after_mixed_writes(db):
+    (drinks, snacks), (ambev, elma) = await _seed_references(db)
+
+    water = await ProductService.create_product(ProductSchemaCreate(name="Water", price=2.0, qtd=50, category_id=drinks.id, supplier_id=ambev.id), db)
+    nuts = await ProductService.create_product(ProductSchemaCreate(name="Nuts", price=12.5, qtd=4, category_id=snacks.id, supplier_id=elma.id), db)
+    await ProductService.create_products_bulk([
+        ProductSchemaCreate(name="Juice", price=7.0, qtd=6, category_id=drinks.id, supplier_id=elma.id),
+    ], db)
+    await StockService.adjust_stock([StockAdjustment(product_id=water.id, delta=-20), StockAdjustment(product_id=nuts.id, delta=2)], db)
+    await ProductService.delete_product(nuts.id, db)
+
+    incremental = _figures(await InventoryService.get_summary(db))
+    await InventoryService.rebuild(db)
+    rebuilt = _figures(await InventoryService.get_summary(db))
+
+    assert incremental == rebuilt
+    assert incremental[0] == {"skus": 2, "units": 36, "value": 102.0}
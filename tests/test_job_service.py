@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api.v1.endpoints.user import delete_user
+from core.configs import settings
+from core.database import enforce_foreign_keys
+from models.job_model import JobModel
+from models.user_model import UserModel
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+from schemas.job_schema import JobSchemaCreate, RebuildJobParams
+from schemas.product_schema import ProductSchemaCreate
+from services import job_handlers
+from services.inventory_service import InventoryService
+from services.job_service import JOB_HANDLERS, JobRunner, JobService, job_handler
+from services.product_service import ProductService
+from services.stock_service import utcnow
+
+@pytest.fixture(name="session_factory")
+async def session_factory_fixture(tmp_path):
+    # Workers and the test talk over separate connections, as they would in
+    # production; the shared in-memory database would mix their transactions.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    enforce_foreign_keys(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.fixture(name="db")
+async def db_fixture(session_factory):
+    async with session_factory() as session:
+        yield session
+
+@pytest.fixture(name="runner")
+async def runner_fixture(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.05)
+    runner = JobRunner(session_factory, workers=1)
+    monkeypatch.setattr("services.job_service.job_runner", runner)
+    runner.start()
+    yield runner
+    await runner.stop()
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr("services.job_service.JOB_HANDLERS", dict(JOB_HANDLERS))
+
+async def _wait(db, job_id, *statuses):
+    for _ in range(200):
+        job = await JobService.get_job(job_id, db)
+        # End the read so the worker's writes are not blocked behind it.
+        await db.commit()
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {job.status}")
+
+async def _seed(db, prices):
+    cat = CategoryModel(name="Mercearia")
+    sup = SupplierModel(name="Atacado", cnpj="321", address="Rua M")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    await ProductService.create_products_bulk([
+        ProductSchemaCreate(name=f"Item {i}", price=price, qtd=2, category_id=cat.id, supplier_id=sup.id)
+        for i, price in enumerate(prices)
+    ], db)
+    return cat
+
+@pytest.mark.asyncio
+async def test_submit_rejects_unknown_kind_and_bad_params(db):
+    with pytest.raises(HTTPException) as exc:
+        await JobService.submit_job(JobSchemaCreate(kind="nope"), db)
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        await JobService.submit_job(JobSchemaCreate(kind="reprice_products", params={"percent": -100}), db)
+    assert exc.value.status_code == 422
+
+@pytest.mark.asyncio
+async def test_reprice_job_runs_in_background_and_checkpoints(db, runner, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    await _seed(db, [10.0, 20.0, 5.0])
+
+    job = await JobService.submit_job(JobSchemaCreate(kind="reprice_products", params={"percent": 10}), db)
+    assert job.status == "queued"
+
+    job = await _wait(db, job.id, "succeeded", "failed")
+    assert job.status == "succeeded"
+    assert job.progress == 1.0 and job.attempts == 1
+    assert job.result == {"updated": 3, "percent": 10.0}
+    assert job.state == {"last_id": 3, "updated": 3}
+
+    page = await ProductService.get_all_products(db, 10)
+    assert [p["price"] for p in page.items] == [11.0, 22.0, 5.5]
+    summary = await InventoryService.get_summary(db)
+    assert summary.total.value == pytest.approx(77.0)
+
+@pytest.mark.asyncio
+async def test_reclaimed_job_is_not_applied_twice(db, session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    await _seed(db, [10.0, 20.0, 5.0])
+    job = await JobService.submit_job(JobSchemaCreate(kind="reprice_products", params={"percent": 10}), db)
+
+    # Worker A claims the job, then stalls long enough for its heartbeat to
+    # go stale, and worker B reclaims it.
+    first, second = JobRunner(session_factory, workers=0), JobRunner(session_factory, workers=0)
+    held_by_first = await first._claim()
+    stale = utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS + 1)
+    await db.execute(update(JobModel).where(JobModel.id == job.id).values(heartbeat_at=stale))
+    await db.commit()
+    held_by_second = await second._claim()
+    assert (held_by_first.id, held_by_second.id) == (job.id, job.id)
+
+    # A wakes up: nothing it writes lands, and it leaves the job to B.
+    await first._run(held_by_first)
+    job = await JobService.get_job(job.id, db)
+    await db.commit()
+    assert (job.status, job.attempts, job.state) == ("running", 2, None)
+
+    await second._run(held_by_second)
+    job = await JobService.get_job(job.id, db)
+    assert (job.status, job.result) == ("succeeded", {"updated": 3, "percent": 10.0})
+    page = await ProductService.get_all_products(db, 10)
+    assert [p["price"] for p in page.items] == [11.0, 22.0, 5.5]
+
+@pytest.mark.asyncio
+async def test_failed_attempts_are_retried_until_max(db, runner, handlers):
+    attempts = []
+
+    @job_handler("flaky", RebuildJobParams)
+    async def flaky(context):
+        attempts.append(context.job_id)
+        if len(attempts) < 3:
+            raise RuntimeError("boom")
+        return "ok"
+
+    job = await JobService.submit_job(JobSchemaCreate(kind="flaky", max_attempts=2), db)
+    job = await _wait(db, job.id, "succeeded", "failed")
+    assert (job.status, job.attempts, job.error) == ("failed", 2, "boom")
+
+    job = await JobService.retry_job(job.id, db)
+    assert job.status == "queued"
+    job = await _wait(db, job.id, "succeeded", "failed")
+    assert (job.status, job.result, job.error) == ("succeeded", "ok", None)
+
+@pytest.mark.asyncio
+async def test_job_with_bad_stored_params_does_not_block_the_queue(db, runner):
+    # Submitted before a params schema changed, say: it no longer validates.
+    bad = JobModel(kind="reprice_products", params={}, created_at=utcnow())
+    db.add(bad)
+    await db.commit()
+    good = await JobService.submit_job(JobSchemaCreate(kind="rebuild_inventory"), db)
+
+    bad = await _wait(db, bad.id, "succeeded", "failed")
+    assert bad.status == "failed" and "percent" in bad.error
+    good = await _wait(db, good.id, "succeeded", "failed")
+    assert good.status == "succeeded"
+
+@pytest.mark.asyncio
+async def test_cancel_stops_running_job(db, runner, handlers):
+    started = asyncio.Event()
+
+    @job_handler("slow", RebuildJobParams)
+    async def slow(context):
+        started.set()
+        await asyncio.sleep(30)
+
+    job = await JobService.submit_job(JobSchemaCreate(kind="slow"), db)
+    await asyncio.wait_for(started.wait(), timeout=2)
+
+    await JobService.cancel_job(job.id, db)
+    job = await _wait(db, job.id, "cancelled")
+    assert job.cancel_requested and job.finished_at is not None
+
+    with pytest.raises(HTTPException) as exc:
+        await JobService.cancel_job(job.id, db)
+    assert exc.value.status_code == 409
+
+@pytest.mark.asyncio
+async def test_export_job_writes_file(db, runner, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RESULTS_DIR", str(tmp_path))
+    await _seed(db, [1.0, 2.0])
+
+    job = await JobService.submit_job(JobSchemaCreate(kind="export_products", params={"format": "csv"}), db)
+    job = await _wait(db, job.id, "succeeded", "failed")
+
+    assert job.result["rows"] == 2
+    with open(job_handlers.export_path(job.id, "csv"), encoding="utf-8") as exported:
+        assert exported.readline().strip() == "id,name,price,qtd,category_id,supplier_id"
+
+@pytest.mark.asyncio
+async def test_deleting_a_user_keeps_their_jobs(db):
+    user = UserModel(name="Ana", email="ana@stockflow.com", is_admin=True, password="hash")
+    db.add(user)
+    await db.commit()
+    job = await JobService.submit_job(JobSchemaCreate(kind="rebuild_inventory"), db, user_id=user.id)
+
+    response = await delete_user(user.id, db, user)
+    assert response.status_code == 204
+    assert (await JobService.get_job(job.id, db)).user_id is None
@@ -0,0 +1,135 @@
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.configs import settings
+from core.database import QueryLog, instrument_queries, normalize_sql, query_log
+from core.metrics import CONTENT_TYPE, MetricsMiddleware, QueryStats, RequestMetrics, metrics_endpoint, render
+
+def _app(metrics):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="Item not found.")
+        return {"id": item_id}
+
+    app.add_api_route("/metrics", metrics_endpoint)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+@pytest.mark.asyncio
+async def test_requests_are_keyed_by_route_template():
+    metrics = RequestMetrics()
+    transport = httpx.ASGITransport(app=_app(metrics))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for path in ("/items/1", "/items/2", "/items/0", "/nowhere"):
+            await client.get(path)
+
+    assert metrics.requests == {
+        ("GET", "/items/{item_id}", "200"): 2,
+        ("GET", "/items/{item_id}", "404"): 1,
+        ("GET", "unmatched", "404"): 1,
+    }
+    assert metrics.in_progress == 0
+
+    text = render(metrics)
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",le="+Inf"} 3' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched"} 1' in text
+
+def test_histogram_buckets_are_cumulative():
+    metrics = RequestMetrics()
+    for seconds in (0.0005, 0.003, 0.003, 20.0):
+        metrics.observe("GET", "/x", 200, seconds)
+
+    text = render(metrics)
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.001"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.005"} 3' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="10.0"} 3' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="+Inf"} 4' in text
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_pool_and_hashing_gauges():
+    transport = httpx.ASGITransport(app=_app(RequestMetrics()))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert 'db_pool_checked_out{pool="primary"}' in response.text
+    assert "# TYPE bcrypt_waiting gauge" in response.text
+    assert "# TYPE bcrypt_completed_total counter" in response.text
+
+def test_normalize_sql_folds_values_and_in_lists():
+    first = normalize_sql("SELECT * FROM products WHERE id IN (?, ?, ?) AND name = 'a''b' LIMIT 10")
+    second = normalize_sql("SELECT *  FROM products\nWHERE id IN ($1, $2) AND name = $3 LIMIT $4")
+
+    assert first == second == "SELECT * FROM products WHERE id IN (?, ...) AND name = ? LIMIT ?"
+
+@pytest.mark.asyncio
+async def test_queries_are_counted_per_request_and_repeats_flagged(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_DEBUG_HEADERS", True)
+    monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_queries(engine)
+
+    app = FastAPI()
+
+    @app.get("/items/{count}")
+    async def get_items(count: int):
+        async with engine.connect() as conn:
+            for item_id in range(count):
+                await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {}
+
+    queries = QueryStats()
+    app.add_middleware(MetricsMiddleware, metrics=RequestMetrics(), queries=queries)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        few = await client.get("/items/2")
+        many = await client.get("/items/4")
+    await engine.dispose()
+
+    assert few.headers["X-DB-Statements"] == "2"
+    assert few.headers["X-DB-Repeated-Statements"] == "0"
+    assert many.headers["X-DB-Statements"] == "4"
+    assert many.headers["X-DB-Repeated-Statements"] == "4"
+
+    (route,) = queries.report()["routes"]
+    assert (route["route"], route["requests"], route["statements"], route["max_statements"]) == ("/items/{count}", 2, 6, 4)
+    assert route["n_plus_one"] == [{"sql": "SELECT ?", "requests": 1, "max_repeats": 4}]
+    assert route["slow_statements"] == 6
+    assert queries.report()["slow"][0]["sql"] == "SELECT ?"
+    assert 'db_n_plus_one_requests_total{method="GET",route="/items/{count}"} 1' in render(RequestMetrics(), queries)
+
+@pytest.mark.asyncio
+async def test_statements_outside_requests_are_not_recorded():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_queries(engine)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert not conn.sync_connection.info
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_no_timing_behind():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_queries(engine)
+    log = QueryLog()
+    token = query_log.set(log)
+    try:
+        async with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    await conn.execute(text("SELECT * FROM missing"))
+            await conn.execute(text("SELECT 1"))
+            assert not conn.sync_connection.info
+    finally:
+        query_log.reset(token)
+        await engine.dispose()
+    assert log.count == 1
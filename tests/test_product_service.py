@@ -1,10 +1,27 @@
+import asyncio
+import csv
+import io
+import json
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.inventory_service import InventoryService
+from services import product_service
 from services.product_service import ProductService
-from schemas.product_schema import ProductSchemaCreate, ProductSchemaBase
+from pydantic import TypeAdapter
+from schemas.page_schema import Page
+from schemas.product_schema import ProductSchemaCreate, ProductSchemaBase, ProductSchemaResponse, ProductFilter
+from core.database import QueryLog, instrument_queries, query_log
+from core.pagination import encode_cursor
+from core.serialization import dumps
 from models.category_model import CategoryModel
 from models.supplier_model import SupplierModel
 from models.product_model import ProductModel
+from models.stock_movement_model import StockMovementModel
 
 @pytest.mark.asyncio
 async def test_create_product_success(db):
@@ -127,4 +144,343 @@ async def test_delete_product_success(db):
 
     with pytest.raises(HTTPException) as exc:
         await ProductService.get_product_by_id(prod.id, db)
-    assert exc.value.status_code == 404
\ No newline at end of file
+    assert exc.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_all_products_paginates_by_cursor(db):
+    cat = CategoryModel(name="Papelaria")
+    sup = SupplierModel(name="Tilibra", cnpj="321", address="Rua D")
+    db.add_all([cat, sup])
+    await db.commit()
+    await db.refresh(cat)
+    await db.refresh(sup)
+
+    db.add_all([
+        ProductModel(name=f"Caderno {i}", price=10.0, qtd=i, category_id=cat.id, supplier_id=sup.id)
+        for i in range(5)
+    ])
+    await db.commit()
+
+    first = await ProductService.get_all_products(db, limit=2)
+    second = await ProductService.get_all_products(db, limit=2, after=first.next_cursor)
+    last = await ProductService.get_all_products(db, limit=2, after=second.next_cursor)
+
+    ids = [p["id"] for p in first.items + second.items + last.items]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 5
+    assert last.next_cursor is None
+
+@pytest.mark.asyncio
+async def test_get_all_products_invalid_cursor(db):
+    for cursor in ("not-a-cursor", encode_cursor(["abc"])):
+        with pytest.raises(HTTPException) as exc:
+            await ProductService.get_all_products(db, limit=10, after=cursor)
+
+        assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_read_rows_keep_response_wire_format(db):
+    cat = CategoryModel(name="Limpeza")
+    sup = SupplierModel(name="Ypê", cnpj="654", address="Rua L")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    db.add_all([
+        ProductModel(name=f"Sabão {i}", price=2.5 * i, qtd=i, category_id=cat.id, supplier_id=sup.id)
+        for i in range(3)
+    ])
+    await db.commit()
+
+    page = await ProductService.get_all_products(db, limit=2)
+    row = await ProductService.get_product_row(page.items[0]["id"], db)
+
+    products = [await ProductService.get_product_by_id(item["id"], db) for item in page.items]
+    adapter = TypeAdapter(Page[ProductSchemaResponse])
+    expected = adapter.dump_json(adapter.validate_python(Page(items=products, next_cursor=page.next_cursor), from_attributes=True))
+
+    assert dumps(page) == expected
+    assert dumps(row) == ProductSchemaResponse.model_validate(products[0]).model_dump_json().encode()
+
+async def _seed_names(db, names):
+    cat = CategoryModel(name="Mercearia")
+    sup = SupplierModel(name="Atacadão", cnpj="888", address="Rua M")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    report = await ProductService.create_products_bulk([
+        ProductSchemaCreate(name=name, price=1.0, qtd=1, category_id=cat.id, supplier_id=sup.id) for name in names
+    ], db)
+    return [result.id for result in report.results]
+
+@pytest.mark.asyncio
+async def test_search_products_ranks_prefix_matches_first(db):
+    await _seed_names(db, ["Pão de Queijo", "Queijo Minas", "Queijo Prato Fatiado", "Leite"])
+
+    results = await ProductService.search_products("queijo", db, limit=10)
+
+    assert [r["name"] for r in results] == ["Queijo Minas", "Queijo Prato Fatiado", "Pão de Queijo"]
+
+@pytest.mark.asyncio
+async def test_search_products_tolerates_typos(db):
+    await _seed_names(db, ["Chocolate ao Leite", "Achocolatado", "Arroz Integral"])
+
+    results = await ProductService.search_products("chocolatte", db, limit=10)
+
+    assert [r["name"] for r in results] == ["Chocolate ao Leite", "Achocolatado"]
+
+@pytest.mark.asyncio
+async def test_search_products_follows_writes(db):
+    ids = await _seed_names(db, ["Feijão Preto", "Feijão Carioca"])
+    product = await ProductService.get_product_by_id(ids[0], db)
+    data = ProductSchemaCreate(name="Lentilha", price=1.0, qtd=1, category_id=product.category_id, supplier_id=product.supplier_id)
+
+    await ProductService.update_product(ids[0], data, db)
+    await ProductService.delete_product(ids[1], db)
+
+    assert await ProductService.search_products("feijão", db, limit=10) == []
+    assert [r["id"] for r in await ProductService.search_products("lentil", db, limit=10)] == [ids[0]]
+
+@pytest.mark.asyncio
+async def test_search_products_limits_results(db):
+    await _seed_names(db, [f"Biscoito {i}" for i in range(5)])
+
+    assert len(await ProductService.search_products("biscoito", db, limit=3)) == 3
+    assert await ProductService.search_products("bi", db, limit=3) == []
+
+@pytest.mark.asyncio
+async def test_get_all_products_filters_and_sorts(db):
+    ids = await _seed_names(db, ["Arroz", "Feijão", "Açúcar", "Café"])
+    other = CategoryModel(name="Outros")
+    db.add(other)
+    await db.commit()
+    for product_id, price, qtd in zip(ids, [5.0, 8.0, 3.0, 12.0], [10, 0, 4, 7]):
+        product = await ProductService.get_product_by_id(product_id, db)
+        product.price, product.qtd = price, qtd
+    product.category_id = other.id
+    await db.commit()
+
+    page = await ProductService.get_all_products(db, 10, sort="-price", filters=ProductFilter(min_price=4, max_qtd=9))
+    assert [p["name"] for p in page.items] == ["Café", "Feijão"]
+
+    page = await ProductService.get_all_products(db, 10, sort="qtd", filters=ProductFilter(category_id=other.id))
+    assert [p["name"] for p in page.items] == ["Café"]
+
+    first = await ProductService.get_all_products(db, 2, sort="name", filters=ProductFilter(min_qtd=1))
+    rest = await ProductService.get_all_products(db, 2, first.next_cursor, sort="name", filters=ProductFilter(min_qtd=1))
+    assert [p["name"] for p in first.items + rest.items] == ["Arroz", "Açúcar", "Café"]
+
+async def _query_plan(db, call):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.bind.sync_engine, "before_cursor_execute", capture)
+    try:
+        await call()
+    finally:
+        event.remove(db.bind.sync_engine, "before_cursor_execute", capture)
+
+    statement, parameters = statements[-1]
+    connection = await db.connection()
+    rows = (await connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+    return [row[-1] for row in rows]
+
+INDEXED_FILTERS = [
+    ProductFilter(),
+    ProductFilter(category_id=1),
+    ProductFilter(supplier_id=1),
+    ProductFilter(category_id=1, supplier_id=1),
+    ProductFilter(category_id=1, min_price=2, max_price=4),
+    ProductFilter(supplier_id=1, max_qtd=5),
+]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["id", "-id", "name", "-name", "price", "-price", "qtd", "-qtd"])
+@pytest.mark.parametrize("filters", INDEXED_FILTERS + [
+    ProductFilter(min_price=2, max_price=4),
+    ProductFilter(max_qtd=5),
+    ProductFilter(min_price=2, min_qtd=1),
+])
+async def test_get_all_products_uses_indexes(db, filters, sort):
+    await _seed_names(db, [f"Produto {i}" for i in range(20)])
+    first = await ProductService.get_all_products(db, 5, sort=sort, filters=filters)
+    plan = await _query_plan(db, lambda: ProductService.get_all_products(db, 5, first.next_cursor, sort=sort, filters=filters))
+
+    assert plan, plan
+    ranged = {"price", "qtd"} & {name.split("_")[1] for name in filters.model_dump(exclude_none=True)}
+    if filters not in INDEXED_FILTERS and sort.lstrip("-") not in ranged:
+        # A bare range under another sort searches the range's own index
+        # and sorts the matching rows.
+        assert plan[0].startswith("SEARCH products USING INDEX"), plan
+        assert all(step.startswith("USE TEMP B-TREE FOR") for step in plan[1:]), plan
+        return
+
+    assert all(step.startswith(("SEARCH products USING", "SCAN products USING INDEX")) for step in plan), plan
+    if filters.model_dump(exclude_none=True):
+        assert plan[0].startswith("SEARCH products USING"), plan
+
+async def _collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+@pytest.mark.asyncio
+async def test_export_products_ndjson_filters_by_category(db):
+    cat_a = CategoryModel(name="Hortifruti")
+    cat_b = CategoryModel(name="Padaria")
+    sup = SupplierModel(name="Ceasa", cnpj="654", address="Rua E")
+    db.add_all([cat_a, cat_b, sup])
+    await db.commit()
+
+    db.add_all([
+        ProductModel(name="Banana", price=4.5, qtd=30, category_id=cat_a.id, supplier_id=sup.id),
+        ProductModel(name="Pão", price=0.8, qtd=100, category_id=cat_b.id, supplier_id=sup.id),
+    ])
+    await db.commit()
+
+    body = await _collect(ProductService.export_products(db, "ndjson", category_id=cat_a.id))
+    rows = [json.loads(line) for line in body.splitlines()]
+
+    assert [row["name"] for row in rows] == ["Banana"]
+    assert rows[0]["price"] == 4.5
+
+@pytest.mark.asyncio
+async def test_export_products_csv(db):
+    cat = CategoryModel(name="Bazar")
+    sup = SupplierModel(name="Tramontina", cnpj="987", address="Rua F")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    db.add(ProductModel(name="Faca, inox", price=25.0, qtd=3, category_id=cat.id, supplier_id=sup.id))
+    await db.commit()
+
+    body = await _collect(ProductService.export_products(db, "csv"))
+    rows = list(csv.reader(io.StringIO(body)))
+
+    assert rows[0] == ["id", "name", "price", "qtd", "category_id", "supplier_id"]
+    assert rows[1][1] == "Faca, inox"
+
+@pytest.mark.asyncio
+async def test_create_products_bulk_reports_each_row(db):
+    cat = CategoryModel(name="Mercearia")
+    sup = SupplierModel(name="Camil", cnpj="111", address="Rua G")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    rows = [
+        ProductSchemaCreate(name="Arroz", price=6.0, qtd=10, category_id=cat.id, supplier_id=sup.id),
+        ProductSchemaCreate(name="Feijão", price=8.0, qtd=5, category_id=999, supplier_id=sup.id),
+        ProductSchemaCreate(name="Lentilha", price=9.0, qtd=2, category_id=cat.id, supplier_id=999),
+        ProductSchemaCreate(name="Grão de bico", price=12.0, qtd=1, category_id=cat.id, supplier_id=sup.id),
+    ]
+
+    report = await ProductService.create_products_bulk(rows, db)
+
+    assert report.created == 2
+    assert report.failed == 2
+    assert [r.error for r in report.results] == [None, "Category not found.", "Supplier not found.", None]
+
+    created = await ProductService.get_product_by_id(report.results[3].id, db)
+    assert created.name == "Grão de bico"
+
+@pytest.mark.asyncio
+async def test_create_products_bulk_maps_a_reference_deleted_mid_import(db, monkeypatch):
+    cat = CategoryModel(name="Mercearia")
+    sup = SupplierModel(name="Camil", cnpj="111", address="Rua G")
+    db.add_all([cat, sup])
+    await db.commit()
+    cat_id, sup_id = cat.id, sup.id
+    existing_ids = product_service._existing_ids
+
+    async def check_then_delete(session, column, ids):
+        # The category goes away between the existence check and the INSERT.
+        found = await existing_ids(session, column, ids)
+        if column is CategoryModel.id and found:
+            await session.execute(delete(CategoryModel).where(CategoryModel.id == cat_id))
+            await session.commit()
+        return found
+
+    monkeypatch.setattr(product_service, "_existing_ids", check_then_delete)
+    rows = [ProductSchemaCreate(name="Arroz", price=6.0, qtd=10, category_id=cat_id, supplier_id=sup_id)]
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.create_products_bulk(rows, db)
+    assert (exc.value.status_code, exc.value.detail) == (404, "Category not found.")
+
+@pytest.mark.asyncio
+async def test_update_product_refuses_a_stale_version(db):
+    ids = await _seed_names(db, ["Caneta"])
+    product = await ProductService.get_product_by_id(ids[0], db)
+    data = ProductSchemaCreate(name="Caneta Azul", price=2.0, qtd=1, category_id=product.category_id, supplier_id=product.supplier_id)
+
+    updated = await ProductService.update_product(ids[0], data, db, version=1)
+    assert updated.version == 2
+
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.update_product(ids[0], data, db, version=1)
+    assert exc.value.status_code == 409
+
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.update_product(999, data, db, version=1)
+    assert exc.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_parallel_updates_lose_nothing(tmp_path):
+    # Each writer reads the product and writes qtd + 1 back conditional on
+    # the version it read, retrying on 409, over its own connection.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'occ.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        ids = await _seed_names(db, ["Caderno"])
+    conflicts = []
+
+    async def writer():
+        async with session_factory() as db:
+            while True:
+                row = await ProductService.get_product_row(ids[0], db)
+                await db.commit()
+                data = ProductSchemaCreate(**{**row, "qtd": row["qtd"] + 1})
+                try:
+                    return await ProductService.update_product(ids[0], data, db, version=row["version"])
+                except HTTPException as error:
+                    assert error.status_code == 409
+                    conflicts.append(1)
+
+    writers = 8
+    try:
+        await asyncio.gather(*(writer() for _ in range(writers)))
+
+        async with session_factory() as db:
+            row = await ProductService.get_product_row(ids[0], db)
+            ledger = await db.scalar(select(func.sum(StockMovementModel.delta)).where(StockMovementModel.product_id == ids[0]))
+            summary = await InventoryService.get_summary(db)
+    finally:
+        await engine.dispose()
+
+    assert row["qtd"] == 1 + writers
+    assert row["version"] == 1 + writers
+    assert ledger == row["qtd"]
+    assert summary.total.units == row["qtd"]
+    assert conflicts
+
+@pytest.mark.asyncio
+async def test_writes_return_the_row_without_extra_reads(db):
+    instrument_queries(db.bind)
+    ids = await _seed_names(db, ["Borracha"])
+    product = await ProductService.get_product_by_id(ids[0], db)
+    data = ProductSchemaCreate(name="Apontador", price=3.0, qtd=4, category_id=product.category_id, supplier_id=product.supplier_id)
+
+    log = QueryLog()
+    token = query_log.set(log)
+    try:
+        created = await ProductService.create_product(data, db)
+    finally:
+        query_log.reset(token)
+
+    assert created.name == "Apontador" and created.version == 1
+    assert not [shape for shape in log.shapes if shape.startswith("SELECT")]
+
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.update_product(created.id, ProductSchemaCreate(**{**data.model_dump(), "category_id": 999}), db)
+    assert exc.value.detail == "Category not found."
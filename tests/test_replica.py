@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core import database, replica
+
+def _request(method="GET", headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "headers": raw})
+
+@pytest.fixture
+async def replica_db(tmp_path, monkeypatch):
+    replica.reset_replica_health()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "replica_engine", engine)
+    monkeypatch.setattr(database, "ReadSession", sessionmaker(bind=engine, class_=AsyncSession))
+    yield engine
+    await engine.dispose()
+    replica.reset_replica_health()
+
+@pytest.mark.asyncio
+async def test_reads_use_primary_without_replica():
+    assert await replica.read_session_factory(_request()) is database.Session
+
+@pytest.mark.asyncio
+async def test_reads_use_healthy_replica(replica_db):
+    assert await replica.read_session_factory(_request()) is database.ReadSession
+
+@pytest.mark.asyncio
+async def test_writer_is_pinned_to_primary(replica_db):
+    async def call_next(request):
+        return Response(status_code=201)
+
+    response = await replica.pin_writes_to_primary(_request("POST", {"Authorization": "Bearer abc"}), call_next)
+    assert replica.PIN_COOKIE in response.headers["set-cookie"]
+
+    by_token = _request(headers={"Authorization": "Bearer abc"})
+    by_cookie = _request(headers={"Cookie": f"{replica.PIN_COOKIE}={time.time() + 5}"})
+    other = _request(headers={"Authorization": "Bearer xyz"})
+
+    assert await replica.read_session_factory(by_token) is database.Session
+    assert await replica.read_session_factory(by_cookie) is database.Session
+    assert await replica.read_session_factory(other) is database.ReadSession
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(tmp_path, monkeypatch):
+    replica.reset_replica_health()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "replica_engine", engine)
+    monkeypatch.setattr(database, "ReadSession", sessionmaker(bind=engine, class_=AsyncSession))
+
+    assert await replica.read_session_factory(_request()) is database.Session
+    await engine.dispose()
+    replica.reset_replica_health()
+
+@pytest.mark.asyncio
+async def test_is_replica_tells_sessions_apart(replica_db):
+    async with database.ReadSession() as read, database.Session() as primary:
+        assert replica.is_replica(read)
+        assert not replica.is_replica(primary)
@@ -0,0 +1,195 @@
+import json
+import re
+
+import pytest
+from fastapi import HTTPException
+
+from core.cache import ExternalBackend, MemoryBackend, ResponseCache, response_cache
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+from schemas.page_schema import Page
+from schemas.product_schema import ProductSchemaCreate, ProductSchemaResponse
+from schemas.stock_schema import StockAdjustment
+from services.product_service import ProductService
+from services.stock_service import StockService
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    async def scan_iter(self, match):
+        # Enough of Redis's glob for the `<escaped prefix>*` patterns used.
+        assert match.endswith("*")
+        prefix = re.sub(r"\\(.)", r"\1", match[:-1])
+        for key in [key for key in self.data if key.startswith(prefix)]:
+            yield key
+
+async def _row(row):
+    return row
+
+def _loader(values):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+    return load, calls
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [lambda: MemoryBackend(16, 60), lambda: ExternalBackend(FakeRedis())])
+async def test_response_cache_hits_and_invalidates(backend):
+    cache = ResponseCache(backend(), ttl=60)
+    load, calls = _loader([{"id": 1, "name": "a"}, {"id": 1, "name": "b"}])
+
+    first = await cache.item("things", 1, load, dict)
+    second = await cache.item("things", 1, load, dict)
+    assert first.body == second.body == b'{"id":1,"name":"a"}'
+    assert len(calls) == 1
+    assert cache.stats() == {"things": {"hits": 1, "misses": 1}}
+
+    await cache.invalidate("things", 1)
+    third = await cache.item("things", 1, load, dict)
+    assert json.loads(third.body)["name"] == "b"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [lambda: MemoryBackend(16, 60), lambda: ExternalBackend(FakeRedis())])
+async def test_response_cache_does_not_store_a_row_invalidated_while_loading(backend):
+    cache = ResponseCache(backend(), ttl=60)
+
+    async def load_then_write():
+        # A write commits and invalidates after this read, before the store.
+        await cache.invalidate("things", 1)
+        return {"name": "old"}
+
+    first = await cache.item("things", 1, load_then_write, dict)
+    assert json.loads(first.body)["name"] == "old"
+    second = await cache.item("things", 1, lambda: _row({"name": "new"}), dict)
+    assert json.loads(second.body)["name"] == "new"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [lambda: MemoryBackend(16, 60), lambda: ExternalBackend(FakeRedis())])
+async def test_response_cache_drop_and_clear(backend):
+    cache = ResponseCache(backend(), ttl=60)
+    load, calls = _loader([{"name": "a"}, {"name": "b"}, {"name": "c"}, {"name": "d"}])
+
+    await cache.item("things", 1, load, dict)
+    await cache.item("others", 1, load, dict)
+    await cache.drop("things")
+    assert json.loads((await cache.item("things", 1, load, dict)).body)["name"] == "c"
+    assert json.loads((await cache.item("others", 1, load, dict)).body)["name"] == "b"
+
+    await cache.clear()
+    assert json.loads((await cache.item("others", 1, load, dict)).body)["name"] == "d"
+
+@pytest.mark.asyncio
+async def test_external_backend_clear_keeps_other_apps_keys():
+    client = FakeRedis()
+    await client.set("other:things:item:1", b"{}")
+    cache = ResponseCache(ExternalBackend(client), ttl=60)
+    await cache.item("things", 1, lambda: _row({"name": "a"}), dict)
+    await cache.invalidate("things")
+
+    await cache.clear()
+    assert client.data == {"other:things:item:1": b"{}"}
+
+@pytest.mark.asyncio
+async def test_response_cache_lists_follow_generation():
+    cache = ResponseCache(MemoryBackend(16, 60), ttl=60)
+    load, calls = _loader([[1], [1], [1, 2]])
+
+    await cache.listing("things", {"limit": 10, "after": None}, load, list)
+    await cache.listing("things", {"after": None, "limit": 10}, load, list)
+    await cache.listing("things", {"limit": 5}, load, list)
+    assert len(calls) == 2
+
+    await cache.invalidate("things", lists=True)
+    page = await cache.listing("things", {"limit": 10}, load, list)
+    assert json.loads(page.body) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_response_cache_lists_follow_table_version():
+    # A write in another process bumps the table version but not this
+    # process's generation: the body must still follow the version its
+    # ETag is built from.
+    cache = ResponseCache(MemoryBackend(16, 60), ttl=60)
+    load, calls = _loader([[1], [1, 2]])
+
+    await cache.listing("things", {"limit": 10}, load, list, version=1)
+    await cache.listing("things", {"limit": 10}, load, list, version=1)
+    page = await cache.listing("things", {"limit": 10}, load, list, version=2)
+    assert len(calls) == 2
+    assert json.loads(page.body) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_response_cache_keeps_replica_rows_apart():
+    cache = ResponseCache(MemoryBackend(16, 60), ttl=60)
+    load, calls = _loader([{"name": "lagging"}, {"name": "fresh"}, {"name": "caught up"}])
+
+    await cache.item("things", 1, load, dict, replica=True)
+    primary = await cache.item("things", 1, load, dict)
+    assert json.loads(primary.body)["name"] == "fresh"
+
+    await cache.invalidate("things", 1)
+    replica = await cache.item("things", 1, load, dict, replica=True)
+    assert json.loads(replica.body)["name"] == "caught up"
+
+@pytest.mark.asyncio
+async def test_response_cache_does_not_store_errors():
+    cache = ResponseCache(MemoryBackend(16, 60), ttl=60)
+
+    async def missing():
+        raise HTTPException(status_code=404, detail="Not found.")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await cache.item("things", 1, missing, dict)
+    assert cache.stats() == {"things": {"hits": 0, "misses": 2}}
+
+@pytest.mark.asyncio
+async def test_product_writes_invalidate_cached_reads(db):
+    cat = CategoryModel(name="Padaria")
+    sup = SupplierModel(name="Moinho", cnpj="777", address="Rua P")
+    db.add_all([cat, sup])
+    await db.commit()
+    ids = {"category_id": cat.id, "supplier_id": sup.id}
+    product = await ProductService.create_product(ProductSchemaCreate(name="Pao", price=1.0, qtd=10, **ids), db)
+    product_id = product.id
+
+    async def read_item():
+        response = await response_cache.item("products", product_id, lambda: ProductService.get_product_by_id(product_id, db), ProductSchemaResponse)
+        return json.loads(response.body)
+
+    async def read_list():
+        response = await response_cache.listing("products", {"limit": 10}, lambda: ProductService.get_all_products(db, 10), Page[ProductSchemaResponse])
+        return json.loads(response.body)
+
+    assert (await read_item())["qtd"] == 10
+    assert (await read_list())["items"][0]["qtd"] == 10
+
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=-3)], db)
+    db.expire_all()  # requests get a fresh session; this test shares one
+    assert (await read_item())["qtd"] == 7
+    assert (await read_list())["items"][0]["qtd"] == 7
+
+    await ProductService.update_product(product_id, ProductSchemaCreate(name="Pao frances", price=1.0, qtd=7, **ids), db)
+    db.expire_all()
+    assert (await read_item())["name"] == "Pao frances"
+
+    await ProductService.delete_product(product_id, db)
+    with pytest.raises(HTTPException):
+        await read_item()
+    assert (await read_list())["items"] == []
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core import security
+from core.configs import settings
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    password_hash = await security.generate_hash_async("s3cret")
+    assert await security.verify_password_async("s3cret", password_hash)
+    task.cancel()
+
+    assert ticks > 0
+
+@pytest.mark.asyncio
+async def test_hashing_stats_track_completed_hashes():
+    before = security.hashing_stats()["completed"]
+
+    await asyncio.gather(*(security.generate_hash_async(f"pw{i}") for i in range(3)))
+
+    stats = security.hashing_stats()
+    assert stats["completed"] == before + 3
+    assert stats["waiting"] == 0
+    assert stats["running"] == 0
+
+@pytest.mark.asyncio
+async def test_hashing_rejects_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(settings, "HASH_MAX_QUEUE", 0)
+
+    with pytest.raises(HTTPException) as exc:
+        await security.generate_hash_async("pw")
+
+    assert exc.value.status_code == 503
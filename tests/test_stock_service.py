@@ -0,0 +1,130 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.stock_service import StockService, utcnow
+from services.product_service import ProductService
+from schemas.stock_schema import StockAdjustment
+from schemas.product_schema import ProductSchemaCreate
+from models.category_model import CategoryModel
+from models.supplier_model import SupplierModel
+from models.product_model import ProductModel
+from models.stock_movement_model import StockMovementModel
+from models.stock_snapshot_model import StockSnapshotModel
+
+async def _seed_products(db, *quantities):
+    cat = CategoryModel(name="Estoque")
+    sup = SupplierModel(name="Atacado", cnpj="222", address="Rua H")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    products = [ProductModel(name=f"Item {i}", price=2.0, qtd=qtd, category_id=cat.id, supplier_id=sup.id) for i, qtd in enumerate(quantities)]
+    db.add_all(products)
+    await db.commit()
+    return products
+
+@pytest.mark.asyncio
+async def test_adjust_stock_applies_deltas(db):
+    first, second = await _seed_products(db, 10, 4)
+
+    levels = await StockService.adjust_stock([
+        StockAdjustment(product_id=second.id, delta=-3),
+        StockAdjustment(product_id=first.id, delta=5),
+        StockAdjustment(product_id=second.id, delta=1),
+    ], db)
+
+    assert [(l.product_id, l.qtd) for l in levels] == [(first.id, 15), (second.id, 2)]
+
+@pytest.mark.asyncio
+async def test_adjust_stock_rejects_negative_balance(db):
+    first, second = await _seed_products(db, 10, 1)
+    first_id, second_id = first.id, second.id
+
+    with pytest.raises(HTTPException) as exc:
+        await StockService.adjust_stock([
+            StockAdjustment(product_id=first_id, delta=-2),
+            StockAdjustment(product_id=second_id, delta=-2),
+        ], db)
+
+    assert exc.value.status_code == 409
+
+    product = await ProductService.get_product_by_id(first_id, db)
+    assert product.qtd == 10
+
+@pytest.mark.asyncio
+async def test_adjust_stock_product_not_found(db):
+    with pytest.raises(HTTPException) as exc:
+        await StockService.adjust_stock([StockAdjustment(product_id=999, delta=1)], db)
+
+    assert exc.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_product_writes_are_recorded_in_ledger(db):
+    cat = CategoryModel(name="Ledger")
+    sup = SupplierModel(name="Ledger", cnpj="333", address="Rua I")
+    db.add_all([cat, sup])
+    await db.commit()
+
+    product = await ProductService.create_product(ProductSchemaCreate(name="Café", price=12.0, qtd=8, category_id=cat.id, supplier_id=sup.id), db)
+    await StockService.adjust_stock([StockAdjustment(product_id=product.id, delta=-2, reason="sale")], db)
+    await ProductService.update_product(product.id, ProductSchemaCreate(name="Café", price=12.0, qtd=20, category_id=cat.id, supplier_id=sup.id), db)
+
+    page = await StockService.get_movements(product.id, db, limit=10)
+
+    assert [(m.delta, m.reason) for m in page.items] == [(8, "initial"), (-2, "sale"), (14, "update")]
+
+@pytest.mark.asyncio
+async def test_balance_at_uses_snapshot_and_later_movements(db):
+    (product,) = await _seed_products(db, 0)
+    product_id = product.id
+
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=10)], db)
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=-3)], db)
+    first_run = await StockService.take_snapshot(db, until=utcnow())
+
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=5)], db)
+    second_run = await StockService.take_snapshot(db, until=utcnow())
+    await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=-1)], db)
+
+    assert first_run.products == 1
+    assert second_run.products == 1
+    assert (await StockService.get_balance_at(product_id, first_run.taken_at, db)).qtd == 7
+    assert (await StockService.get_balance_at(product_id, second_run.taken_at, db)).qtd == 12
+    assert (await StockService.get_balance_at(product_id, utcnow(), db)).qtd == 11
+
+@pytest.mark.asyncio
+async def test_overlapping_snapshot_runs_do_not_double_count(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'snapshots.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        (product,) = await _seed_products(db, 0)
+        product_id = product.id
+        for delta in (10, -3, 5):
+            await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=delta)], db)
+        await StockService.take_snapshot(db, until=utcnow())
+        await StockService.adjust_stock([StockAdjustment(product_id=product_id, delta=4)], db)
+
+    async def run(until):
+        async with session_factory() as db:
+            return await StockService.take_snapshot(db, until=until)
+
+    now = utcnow()
+    await asyncio.gather(run(now), run(now + timedelta(seconds=1)), run(now + timedelta(seconds=2)))
+
+    # Every snapshot must equal the ledger up to its own timestamp.
+    async with session_factory() as db:
+        snapshots = (await db.execute(select(StockSnapshotModel.taken_at, StockSnapshotModel.qtd))).all()
+        for taken_at, qtd in snapshots:
+            query = select(func.sum(StockMovementModel.delta)).where(StockMovementModel.created_at <= taken_at)
+            assert (await db.execute(query)).scalar_one() == qtd
+    assert [qtd for _, qtd in snapshots][-1] == 16
+    await engine.dispose()
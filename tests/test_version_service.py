@@ -0,0 +1,73 @@
+import pytest
+from fastapi import HTTPException, Request, Response
+from services.version_service import VersionService
+from services.category_service import CategoryService
+from schemas.category_schema import CategorySchemaBase
+
+def _request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+@pytest.mark.asyncio
+async def test_writes_bump_table_version(db):
+    assert await VersionService.get_version(db, "categories") == (0, None)
+
+    category = await CategoryService.create_category(CategorySchemaBase(name="Bebidas"), db)
+    await CategoryService.update_category(category.id, CategorySchemaBase(name="Drinks"), db)
+
+    version, updated_at = await VersionService.get_version(db, "categories")
+    assert version == 2
+    assert updated_at is not None
+
+@pytest.mark.asyncio
+async def test_matching_etag_returns_not_modified(db):
+    await CategoryService.create_category(CategorySchemaBase(name="Bebidas"), db)
+
+    response = Response()
+    assert VersionService.not_modified(_request(), response, "categories", await VersionService.get_version(db, "categories")) is None
+    etag = response.headers["etag"]
+
+    cached = VersionService.not_modified(_request({"If-None-Match": etag}), Response(), "categories", await VersionService.get_version(db, "categories"))
+    assert cached.status_code == 304
+
+    since = VersionService.not_modified(_request({"If-Modified-Since": response.headers["last-modified"]}), Response(), "categories", await VersionService.get_version(db, "categories"))
+    assert since.status_code == 304
+
+@pytest.mark.asyncio
+async def test_stale_etag_after_write(db):
+    await CategoryService.create_category(CategorySchemaBase(name="Bebidas"), db)
+    response = Response()
+    VersionService.not_modified(_request(), response, "categories", await VersionService.get_version(db, "categories"))
+
+    await CategoryService.create_category(CategorySchemaBase(name="Snacks"), db)
+
+    assert VersionService.not_modified(_request({"If-None-Match": response.headers["etag"]}), Response(), "categories", await VersionService.get_version(db, "categories")) is None
+
+def test_expected_version_reads_if_match_or_body():
+    assert VersionService.expected_version(None, 4) == 4
+    assert VersionService.expected_version('"3"', None) == 3
+    assert VersionService.expected_version('W/"3"', 3) == 3
+    assert VersionService.expected_version("*", None) is None
+
+    for if_match, version in (('"categories-3"', None), ('"3"', 4)):
+        with pytest.raises(HTTPException) as exc:
+            VersionService.expected_version(if_match, version)
+        assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        VersionService.expected_version(None, None)
+    assert exc.value.status_code == 428
+
+@pytest.mark.asyncio
+async def test_stale_category_update_is_refused(db):
+    category = await CategoryService.create_category(CategorySchemaBase(name="Bebidas"), db)
+    category_id = category.id
+    assert category.version == 1
+
+    updated = await CategoryService.update_category(category_id, CategorySchemaBase(name="Drinks"), db, version=1)
+    assert updated.version == 2
+
+    with pytest.raises(HTTPException) as exc:
+        await CategoryService.update_category(category_id, CategorySchemaBase(name="Sodas"), db, version=1)
+    assert exc.value.status_code == 409
+    assert (await CategoryService.get_category_detail(category_id, db)).name == "Drinks"
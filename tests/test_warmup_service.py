@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.configs import settings
+from core.database import engine_options, pool_status
+from services.warmup_service import WarmupService, is_ready, ready_endpoint, set_ready
+
+@pytest.fixture(autouse=True)
+def not_ready():
+    set_ready(False)
+    yield
+    set_ready(False)
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_the_pool_and_reports_ready(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 4)
+    monkeypatch.setattr(settings, "WARMUP_CONNECTIONS", 3)
+    url = f"sqlite+aiosqlite:///{tmp_path / 'warmup.db'}"
+    engine = create_async_engine(url, **engine_options(url))
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    await engine.dispose()
+
+    response = await ready_endpoint(None)
+    assert response.status_code == 503
+
+    try:
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await WarmupService.warm_up(engine, session_factory)
+
+        assert pool_status(engine)["checked_in"] == 3
+        assert pool_status(engine)["checked_out"] == 0
+    finally:
+        await engine.dispose()
+
+    assert is_ready()
+    response = await ready_endpoint(None)
+    assert response.status_code == 200
+    assert json.loads(response.body)["status"] == "ready"
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_leaves_instance_not_ready(tmp_path):
+    # No tables: the warm reads fail, so the instance must not report ready.
+    url = f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}"
+    engine = create_async_engine(url, **engine_options(url))
+    try:
+        with pytest.raises(Exception):
+            await WarmupService.warm_up(engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    finally:
+        await engine.dispose()
+
+    assert not is_ready()